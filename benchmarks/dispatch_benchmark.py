@@ -0,0 +1,163 @@
+"""Instructions/sec of the opcode dispatcher on the bundled ROMs.
+
+Compares the precompiled dispatch table against the original decoder, which
+rebuilt a dict of closures for every opcode, and against the basic-block JIT.
+ROMs that stop in FX0A waiting for a key are reported and skipped. Run from
+the repository root:
+
+    python benchmarks/dispatch_benchmark.py [instruction_count]
+"""
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from chip8.emulator.chip8_emulator import Chip8Emulator
+from chip8.emulator.instructions import Instructions, CPUHalted
+
+FRAMES = 60  # The instruction count is spread over this many frames
+
+class LegacyInstructions(Instructions):
+    """The per-opcode dict-of-lambdas decoder the dispatch table replaced."""
+
+    def execute(self, opcode):
+        x = (opcode & 0x0F00) >> 8
+        y = (opcode & 0x00F0) >> 4
+        n = opcode & 0x000F
+        nn = opcode & 0x00FF
+        nnn = opcode & 0x0FFF
+
+        instruction_map = {
+            0x0000: lambda: self._execute_0(opcode),
+            0x1000: lambda: self.jump(nnn),
+            0x2000: lambda: self.call_subroutine(nnn),
+            0x3000: lambda: self.skip_if_equal(x, nn),
+            0x4000: lambda: self.skip_if_not_equal(x, nn),
+            0x5000: lambda: self.skip_if_registers_equal(x, y),
+            0x6000: lambda: self.set_register(x, nn),
+            0x7000: lambda: self.add_to_register(x, nn),
+            0x8000: lambda: self.register_operations(x, y, n),
+            0x9000: lambda: self.skip_if_registers_not_equal(x, y),
+            0xA000: lambda: self.set_index_register(nnn),
+            0xB000: lambda: self.jump_with_offset(nnn),
+            0xC000: lambda: self.random(x, nn),
+            0xD000: lambda: self.draw(x, y, n),
+            0xE000: lambda: self.skip_if_key(x, nn),
+            0xF000: lambda: self.execute_f_instructions(x, nn),
+        }
+        instruction_map[opcode & 0xF000]()
+
+    def _execute_0(self, opcode):
+        if opcode == 0x00E0:
+            self.clear_screen()
+        elif opcode == 0x00EE:
+            self.return_from_subroutine()
+        elif opcode == 0x0000:
+            self._nop()
+        else:
+            self._unknown_opcode(opcode)
+
+    def register_operations(self, x, y, operation):
+        operations = {
+            0x0: lambda: self.set_register(x, self.emulator.cpu.v[y]),
+            0x1: lambda: self.set_register(x, self.emulator.cpu.v[x] | self.emulator.cpu.v[y]),
+            0x2: lambda: self.set_register(x, self.emulator.cpu.v[x] & self.emulator.cpu.v[y]),
+            0x3: lambda: self.set_register(x, self.emulator.cpu.v[x] ^ self.emulator.cpu.v[y]),
+            0x4: lambda: self._add_with_carry(x, y),
+            0x5: lambda: self._subtract_with_borrow(x, y),
+            0x6: lambda: self._shift_right(x, y),
+            0x7: lambda: self._subtract_from_with_borrow(x, y),
+            0xE: lambda: self._shift_left(x, y),
+        }
+        op = operations.get(operation)
+        if op:
+            op()
+        else:
+            self._unknown_register_operation(operation)
+
+    def skip_if_key(self, x, operation):
+        if operation == 0x9E:
+            self.skip_if_key_pressed(x)
+        elif operation == 0xA1:
+            self.skip_if_key_not_pressed(x)
+        else:
+            self._unknown_key_operation(operation)
+
+    def execute_f_instructions(self, x, operation):
+        operations = {
+            0x07: lambda: self._load_delay_timer(x),
+            0x0A: lambda: self._wait_for_key_press(x),
+            0x15: lambda: setattr(self.emulator.timer, 'delay_timer', self.emulator.cpu.v[x]),
+            0x18: lambda: setattr(self.emulator.timer, 'sound_timer', self.emulator.cpu.v[x]),
+            0x1E: lambda: self._add_to_index(x),
+            0x29: lambda: self._set_index_to_sprite_location(x),
+            0x33: lambda: self._store_bcd(x),
+            0x55: lambda: self._store_registers(x),
+            0x65: lambda: self._load_registers(x),
+        }
+        op = operations.get(operation)
+        if op:
+            op()
+        else:
+            self._unknown_f_operation(operation)
+
+
+def legacy_run(cpu, count):
+    # CPU.run through the old decoder; a halted CPU idles for the rest of the budget
+    for _ in range(count):
+        if cpu.key_wait_register is not None or cpu.frame_wait:
+            break
+        try:
+            cpu.execute(cpu.fetch())
+        except CPUHalted:
+            pass
+    return count
+
+
+def measure(rom_path, count, mode):
+    """Instructions/sec over FRAMES unpaced frames, or None if the ROM halts waiting for a key.
+
+    Every mode runs through Chip8Emulator.run_frames, so the JIT and the
+    interpreters are timed on the same path and the same budget. Idle
+    skipping is off: it would time skipped loops rather than dispatch.
+    """
+    emulator = Chip8Emulator(count * 60 // FRAMES, execution_mode="jit" if mode == "jit" else "interpreter",
+                             paced=False, seed=1, skip_idle=False)
+    if mode == "legacy":
+        emulator.instructions = LegacyInstructions(emulator)
+        emulator.cpu.instructions = emulator.instructions
+        emulator.instructions.bind()
+    emulator.load_rom(rom_path)
+    if mode == "legacy":
+        cpu = emulator.cpu
+        cpu.run = lambda count: legacy_run(cpu, count)
+
+    start = time.perf_counter()
+    emulator.run_frames(FRAMES)
+    elapsed = time.perf_counter() - start
+    if emulator.cpu.key_wait_register is not None:
+        # Halted on FX0A: the budget was spent idle, so the rate means nothing
+        return None
+    return emulator.instruction_count / elapsed
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    roms_dir = os.path.join(os.path.dirname(__file__), "..", "roms")
+
+    print(f"{'ROM':<20}{'before (ips)':>16}{'after (ips)':>16}{'speedup':>10}{'jit (ips)':>16}{'speedup':>10}")
+    for rom_path in sorted(glob.glob(os.path.join(roms_dir, "*.ch8"))):
+        name = os.path.basename(rom_path)
+        before = measure(rom_path, count, "legacy")
+        after = measure(rom_path, count, "table")
+        jit = measure(rom_path, count, "jit")
+        if None in (before, after, jit):
+            print(f"{name:<20}{'skipped: waits for a key (FX0A)':>68}")
+            continue
+        print(f"{name:<20}{before:>16,.0f}{after:>16,.0f}{after / before:>9.2f}x{jit:>16,.0f}{jit / before:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Load test for the frame-streaming server.
+
+Starts the server in its own process, connects many clients that each open
+a session on one of the bundled ROMs and press keys now and then, and
+reports what the server spent: CPU per session and bytes per frame. Run from
+the repository root:
+
+    python benchmarks/stream_load_test.py --sessions 100 --seconds 10
+"""
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from chip8.emulator.stream_server import StreamClient
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+
+async def wait_for_server(port):
+    for _ in range(100):
+        try:
+            client = StreamClient()
+            client.reader, client.writer = await asyncio.open_connection("127.0.0.1", port)
+            return client
+        except ConnectionError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError("Server did not start")
+
+
+async def viewer(rom_name, port, seconds, seed):
+    client = StreamClient()
+    await client.connect(rom_name, port=port)
+    rng = random.Random(seed)
+
+    async def watch():
+        async for _ in client.frames():
+            if rng.random() < 0.05:
+                client.press(rng.randrange(16), rng.random() < 0.5)
+
+    # Static screens send nothing, so stop on a timer rather than a frame
+    try:
+        await asyncio.wait_for(watch(), seconds)
+    except asyncio.TimeoutError:
+        pass
+    await client.close()
+    return client.bytes_received
+
+
+async def run(args):
+    server = subprocess.Popen(
+        [sys.executable, "-m", "chip8.emulator.stream_server", "roms", "--port", str(args.port), "--ips", str(args.ips)],
+        cwd=ROOT, stdout=subprocess.DEVNULL,
+    )
+    try:
+        control = await wait_for_server(args.port)
+        before = await control.stats()
+
+        roms = sorted(name for name in os.listdir(os.path.join(ROOT, "roms")) if name.endswith(".ch8"))
+        start = time.perf_counter()
+        received = await asyncio.gather(*(
+            viewer(roms[index % len(roms)], args.port, args.seconds, index)
+            for index in range(args.sessions)
+        ))
+        elapsed = time.perf_counter() - start
+        after = await control.stats()
+        await control.close()
+    finally:
+        server.terminate()
+        server.wait()
+
+    emulated = after["frames_emulated"] - before["frames_emulated"]
+    sent = after["frames_sent"] - before["frames_sent"]
+    payload = sum(received)
+    utilization = (after["cpu_seconds"] - before["cpu_seconds"]) / elapsed
+
+    print(f"sessions: {args.sessions} for {elapsed:.1f}s")
+    print(f"emulated frame rate per session: {emulated / args.sessions / elapsed:.1f}")
+    print(f"server CPU: {utilization * 100:.0f}% of one core")
+    if utilization > 0:
+        print(f"sessions per core: {args.sessions / utilization:.0f}")
+    print(f"frames sent: {sent} of {emulated} emulated")
+    print(f"bytes per emulated frame: {payload / max(emulated, 1):.1f} (full frame: 256)")
+    print(f"bytes per sent frame: {payload / max(sent, 1):.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the CHIP-8 frame-streaming server.")
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--ips", type=int, default=2000)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""Performance regression suite over the bundled ROMs.
+
+Runs every ROM in roms/ headless and measures, for each execution mode:
+
+    ips         instructions/sec over a fixed budget, idle skipping off
+    fps         unpaced frames/sec at the default 2000 instructions/sec
+    memory_kb   memory held by one emulator after a second of emulation
+    reset_us    Chip8Emulator.reset() latency
+    load_us     load_rom() latency
+
+and, per ROM, render_us: the cost of one RenderWindow.update_texture call
+with every GL call replaced by a no-op. It is skipped when imgui or PyOpenGL
+are not installed.
+
+Each metric is the median of --repeat samples, taken in rounds over all the
+ROMs. Results go to JSON. The suite compares them against a baseline, by
+default the reference run checked in as benchmarks/baseline.json, and exits
+with status 1 if even the best sample of a metric is worse than the
+baseline's median by more than the tolerance. Timings depend on the
+machine, so regenerate the baseline on your own before a change, with more
+rounds so its medians are typical. Run from the repository root:
+
+    python benchmarks/suite.py --repeat 21 --output benchmarks/baseline.json --baseline ''
+    python benchmarks/suite.py --tolerance 0.25
+"""
+import argparse
+import gc
+import glob
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from chip8.emulator.chip8_emulator import Chip8Emulator
+from chip8.emulator.input_source import InputSource
+
+try:
+    from chip8.ui.windows import render_window
+except ImportError:
+    render_window = None
+
+VERSION = 1
+FRAMES = 600
+MIN_SAMPLE_SECONDS = 0.02
+LOWER_IS_BETTER = ("memory_kb", "reset_us", "load_us", "render_us")
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+class KeyMasher(InputSource):
+    """Always holds one key, moving to the next every few frames.
+
+    A held key completes FX0A at once, so no ROM spends its budget halted.
+    """
+
+    def poll(self, keyboard, frame):
+        if frame % 4 == 0:
+            key = frame // 4 % 16
+            keyboard.key_down(key)
+            keyboard.key_up((key - 1) % 16)
+
+
+def new_emulator(rom_path, mode, instructions_per_second=2000, skip_idle=True):
+    emulator = Chip8Emulator(instructions_per_second, execution_mode=mode, paced=False,
+                             input_source=KeyMasher(), seed=0, skip_idle=skip_idle)
+    emulator.load_rom(rom_path)
+    return emulator
+
+
+def time_per_call(setup, function):
+    """Seconds per call of function(setup()); setup is not timed.
+
+    Keeps calling until MIN_SAMPLE_SECONDS have been timed, so calls of a
+    few microseconds or milliseconds are not lost in timer noise.
+    """
+    elapsed = 0.0
+    calls = 0
+    while elapsed < MIN_SAMPLE_SECONDS:
+        argument = setup()
+        start = time.perf_counter()
+        function(argument)
+        elapsed += time.perf_counter() - start
+        calls += 1
+    return elapsed / calls
+
+
+def measure_ips(rom_path, mode, instructions):
+    # Frame-sized batches, so key presses still arrive
+    frames = 100
+    setup = lambda: new_emulator(rom_path, mode, instructions * 60 // frames, skip_idle=False)
+    return instructions / time_per_call(setup, lambda emulator: emulator.run_frames(frames))
+
+
+def measure_fps(rom_path, mode):
+    setup = lambda: new_emulator(rom_path, mode)
+    return FRAMES / time_per_call(setup, lambda emulator: emulator.run_frames(FRAMES))
+
+
+def measure_memory(rom_path, mode):
+    # A first emulator builds the dispatch tables every emulator shares, which are not part of the footprint
+    new_emulator(rom_path, mode).run_frames(60)
+    gc.collect()
+    tracemalloc.start()
+    emulator = new_emulator(rom_path, mode)
+    emulator.run_frames(60)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size / 1024
+
+
+def measure_latency(rom_path, mode):
+    emulator = new_emulator(rom_path, mode)
+    reset = time_per_call(lambda: emulator, Chip8Emulator.reset)
+    load = time_per_call(lambda: emulator, lambda emulator: emulator.load_rom(rom_path))
+    return reset * 1e6, load * 1e6
+
+
+def mock_gl():
+    """Replace the GL functions RenderWindow uses with no-ops."""
+    for name in dir(render_window):
+        if name.startswith("gl") and callable(getattr(render_window, name)):
+            setattr(render_window, name, lambda *args: 1)
+
+
+def measure_render(rom_path):
+    emulator = new_emulator(rom_path, "interpreter")
+    window = render_window.RenderWindow(emulator)
+    elapsed = 0
+    for _ in range(FRAMES):
+        emulator.run_frame()
+        start = time.perf_counter()
+        window.update_texture()
+        elapsed += time.perf_counter() - start
+    return elapsed / FRAMES * 1e6
+
+
+def measure_rom(rom_path, instructions):
+    """One sample of every metric for a ROM."""
+    metrics = {}
+    for mode in Chip8Emulator.EXECUTION_MODES:
+        metrics[f"{mode}.ips"] = measure_ips(rom_path, mode, instructions)
+        metrics[f"{mode}.fps"] = measure_fps(rom_path, mode)
+        metrics[f"{mode}.memory_kb"] = measure_memory(rom_path, mode)
+        metrics[f"{mode}.reset_us"], metrics[f"{mode}.load_us"] = measure_latency(rom_path, mode)
+    if render_window is not None:
+        metrics["render_us"] = measure_render(rom_path)
+    return metrics
+
+
+def measure_round(rom_paths, instructions, first):
+    """One sample of every metric for every ROM, starting at rom_paths[first]."""
+    if render_window is not None:
+        mock_gl()
+    # Start each round at a different ROM, so no ROM is always measured at the same point in a round
+    return {os.path.basename(rom_path): measure_rom(rom_path, instructions)
+            for rom_path in rom_paths[first:] + rom_paths[:first]}
+
+
+def run_suite(instructions, repeat):
+    """The median of repeat samples of every metric.
+
+    The samples are taken in rounds over all the ROMs rather than back to
+    back, so a stretch of time when the machine runs slow or fast moves only
+    some samples of each metric, and the median drops them. Each round runs
+    in a new process, with string hashing seeded the same in every one:
+    with random seeds, one process can run a ROM a third faster than the next.
+    """
+    os.environ["PYTHONHASHSEED"] = "0"  # Read by each worker process as it starts
+    roms_dir = os.path.join(os.path.dirname(__file__), "..", "roms")
+    rom_paths = sorted(glob.glob(os.path.join(roms_dir, "*.ch8")))
+    samples = {os.path.basename(rom_path): [] for rom_path in rom_paths}
+    with multiprocessing.get_context("spawn").Pool(1, maxtasksperchild=1) as pool:
+        for round_number in range(repeat):
+            print(f"round {round_number + 1}/{repeat}", flush=True)
+            for name, metrics in pool.apply(measure_round, (rom_paths, instructions, round_number)).items():
+                samples[name].append(metrics)
+
+    results = {}
+    ranges = {}  # rom -> metric -> [lowest, highest] sample
+    for name, rounds in samples.items():
+        results[name] = {metric: statistics.median(sample[metric] for sample in rounds) for metric in rounds[0]}
+        ranges[name] = {metric: [min(sample[metric] for sample in rounds), max(sample[metric] for sample in rounds)]
+                        for metric in rounds[0]}
+        print(name, " ".join(f"{metric}={value:,.1f}" for metric, value in results[name].items()), flush=True)
+    return {
+        "version": VERSION,
+        "python": platform.python_version(),
+        "instructions": instructions,
+        "repeat": repeat,
+        "results": results,
+        "ranges": ranges,
+    }
+
+
+def compare(current, baseline, tolerance):
+    """Metrics worse than the baseline by more than tolerance, as (rom, metric, old, new).
+
+    The best of the current samples is compared against the baseline's
+    median, so noise has to slow every sample of a metric to flag it, while
+    a real slowdown moves the best sample too.
+    """
+    regressions = []
+    for rom, metrics in baseline["results"].items():
+        for metric, old in metrics.items():
+            new = current["results"].get(rom, {}).get(metric)
+            if new is None or not old:
+                continue
+            lowest, highest = current["ranges"][rom][metric]
+            if metric.endswith(LOWER_IS_BETTER):
+                worse = lowest > old * (1 + tolerance)
+            else:
+                worse = highest < old * (1 - tolerance)
+            if worse:
+                regressions.append((rom, metric, old, new))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every bundled ROM and compare against a baseline.")
+    parser.add_argument("--instructions", type=int, default=200_000, help="instruction budget for ips")
+    parser.add_argument("--repeat", type=int, default=7, help="samples per metric; the median counts")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE,
+                        help="JSON results to compare against (default: benchmarks/baseline.json); '' for none")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown, as a fraction")
+    args = parser.parse_args()
+
+    if render_window is None:
+        print("imgui or PyOpenGL not installed; skipping render_us")
+    results = run_suite(args.instructions, args.repeat)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        if baseline.get("instructions") != results["instructions"]:
+            print("warning: baseline used a different instruction budget")
+        regressions = compare(results, baseline, args.tolerance)
+        for rom, metric, old, new in regressions:
+            print(f"REGRESSION {rom} {metric}: {old:,.1f} -> {new:,.1f}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%}")
+    elif args.baseline:
+        print(f"No baseline at {args.baseline}; nothing to compare against")
+
+
+if __name__ == "__main__":
+    main()
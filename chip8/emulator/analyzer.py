@@ -0,0 +1,444 @@
+"""Static analysis of CHIP-8 ROMs: disassembly and control-flow graphs.
+
+Code is found by following control flow from 0x200 with the same decoder the
+interpreter uses: jumps, calls, returns, skips and BNNN (followed for V0 = 0
+and flagged as indirect). Everything else in the ROM is reported as data.
+Results are keyed by the ROM's SHA-1 and platform and cached in memory, and
+on disk when given a cache directory. From the repository root:
+
+    python -m chip8.emulator.analyzer roms/trip8.ch8
+    python -m chip8.emulator.analyzer game.ch8 --platform xochip
+"""
+import argparse
+import hashlib
+import json
+import os
+
+from .instructions import Instructions
+from .memory import Memory
+
+VERSION = 2  # Bump when the analysis changes so stale cache files are ignored
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "chip8", "analysis")
+
+I = Instructions
+MNEMONICS = {
+    I.clear_screen: "CLS",
+    I.return_from_subroutine: "RET",
+    I.jump: "JP {nnn:03X}",
+    I.call_subroutine: "CALL {nnn:03X}",
+    I.skip_if_equal: "SE V{x:X}, {nn:02X}",
+    I.skip_if_not_equal: "SNE V{x:X}, {nn:02X}",
+    I.skip_if_registers_equal: "SE V{x:X}, V{y:X}",
+    I.set_register: "LD V{x:X}, {nn:02X}",
+    I.add_to_register: "ADD V{x:X}, {nn:02X}",
+    I._copy_register: "LD V{x:X}, V{y:X}",
+    I._or_registers: "OR V{x:X}, V{y:X}",
+    I._and_registers: "AND V{x:X}, V{y:X}",
+    I._xor_registers: "XOR V{x:X}, V{y:X}",
+    I._add_with_carry: "ADD V{x:X}, V{y:X}",
+    I._subtract_with_borrow: "SUB V{x:X}, V{y:X}",
+    I._shift_right: "SHR V{x:X}",
+    I._subtract_from_with_borrow: "SUBN V{x:X}, V{y:X}",
+    I._shift_left: "SHL V{x:X}",
+    I.skip_if_registers_not_equal: "SNE V{x:X}, V{y:X}",
+    I.set_index_register: "LD I, {nnn:03X}",
+    I.jump_with_offset: "JP V0, {nnn:03X}",
+    I.random: "RND V{x:X}, {nn:02X}",
+    I.draw: "DRW V{x:X}, V{y:X}, {n:X}",
+    I.skip_if_key_pressed: "SKP V{x:X}",
+    I.skip_if_key_not_pressed: "SKNP V{x:X}",
+    I._load_delay_timer: "LD V{x:X}, DT",
+    I._wait_for_key_press: "LD V{x:X}, K",
+    I._set_delay_timer: "LD DT, V{x:X}",
+    I._set_sound_timer: "LD ST, V{x:X}",
+    I._add_to_index: "ADD I, V{x:X}",
+    I._set_index_to_sprite_location: "LD F, V{x:X}",
+    I._store_bcd: "LD B, V{x:X}",
+    I._store_registers: "LD [I], V{x:X}",
+    I._load_registers: "LD V{x:X}, [I]",
+    # SCHIP
+    I._scroll_down: "SCD {n:X}",
+    I._scroll_right: "SCR",
+    I._scroll_left: "SCL",
+    I._exit: "EXIT",
+    I._low_resolution: "LOW",
+    I._high_resolution: "HIGH",
+    I._draw_extended: "DRW V{x:X}, V{y:X}, {n:X}",
+    I._set_index_to_big_sprite: "LD HF, V{x:X}",
+    I._store_flags: "LD R, V{x:X}",
+    I._load_flags: "LD V{x:X}, R",
+    # XO-CHIP
+    I._scroll_up: "SCU {n:X}",
+    I._skip_if_equal_long: "SE V{x:X}, {nn:02X}",
+    I._skip_if_not_equal_long: "SNE V{x:X}, {nn:02X}",
+    I._skip_if_registers_equal_long: "SE V{x:X}, V{y:X}",
+    I._skip_if_registers_not_equal_long: "SNE V{x:X}, V{y:X}",
+    I._skip_if_key_pressed_long: "SKP V{x:X}",
+    I._skip_if_key_not_pressed_long: "SKNP V{x:X}",
+    I._store_register_range: "LD [I], V{x:X}-V{y:X}",
+    I._load_register_range: "LD V{x:X}-V{y:X}, [I]",
+    I._load_long_index: "LD I, long",
+    I._add_to_long_index: "ADD I, V{x:X}",
+    I._select_planes: "PLANE {x:X}",
+    I._load_audio_pattern: "AUDIO",
+    I._set_pitch: "PITCH V{x:X}",
+}
+SKIPS = {I.skip_if_equal, I.skip_if_not_equal, I.skip_if_registers_equal, I.skip_if_registers_not_equal,
+         I.skip_if_key_pressed, I.skip_if_key_not_pressed}
+LONG_SKIPS = {I._skip_if_equal_long, I._skip_if_not_equal_long, I._skip_if_registers_equal_long,
+              I._skip_if_registers_not_equal_long, I._skip_if_key_pressed_long, I._skip_if_key_not_pressed_long}
+# Anything that touches the display, keypad, timers, random numbers, flags or memory
+IMPURE = {I.clear_screen, I.draw, I.random, I.skip_if_key_pressed, I.skip_if_key_not_pressed,
+          I._load_delay_timer, I._wait_for_key_press, I._set_delay_timer, I._set_sound_timer,
+          I._store_bcd, I._store_registers,
+          I._scroll_down, I._scroll_right, I._scroll_left, I._low_resolution, I._high_resolution,
+          I._draw_extended, I._store_flags, I._load_flags, I._scroll_up, I._skip_if_key_pressed_long,
+          I._skip_if_key_not_pressed_long, I._store_register_range, I._select_planes,
+          I._load_audio_pattern, I._set_pitch}
+del I
+
+
+def disassemble(opcode, platform="chip8"):
+    """Assembly text for one opcode; undecodable words come out as DW."""
+    handler, _ = Instructions.decode(opcode, platform)
+    mnemonic = MNEMONICS.get(handler)
+    if mnemonic is None:
+        return f"DW {opcode:04X}"
+    return mnemonic.format(x=(opcode >> 8) & 0xF, y=(opcode >> 4) & 0xF, n=opcode & 0xF,
+                           nn=opcode & 0xFF, nnn=opcode & 0xFFF)
+
+
+class Block:
+    def __init__(self, start, end, successors, pure, indirect=False):
+        self.start = start
+        self.end = end  # Address after the last instruction
+        self.successors = successors
+        self.pure = pure  # Only register, index and control-flow effects
+        self.indirect = indirect  # Ends in BNNN, whose target depends on V0
+
+
+class RomAnalysis:
+    """Code, data and control flow of one ROM on one platform.
+
+    blocks maps start address to Block. loops are (header, latch) block
+    pairs for every backward edge, smallest first, with the addresses of the
+    blocks in each loop body in loop_bodies. writes lists (pc, start, end)
+    for every memory write with a statically known target, and
+    self_modifying the ones that land on code.
+    """
+
+    def __init__(self, rom_hash, size, code, blocks, data, loops, loop_bodies,
+                 writes, unknown_writes, index_targets, problems, platform="chip8", long_operands=None):
+        self.rom_hash = rom_hash
+        self.platform = platform
+        self.size = size
+        self.code = code  # address -> opcode of every reachable instruction; F000 NNNN is two entries
+        self.blocks = blocks
+        self.data = data  # (start, end) ranges of ROM bytes that are never executed
+        self.loops = loops
+        self.loop_bodies = loop_bodies
+        self.writes = writes
+        self.unknown_writes = unknown_writes  # PCs of writes through an unknown I
+        self.index_targets = index_targets  # ANNN operands inside the ROM, usually sprites
+        self.problems = problems  # (pc, message) for undecodable or runaway code
+        self.long_operands = long_operands or {}  # address -> NNNN of each XO-CHIP F000 NNNN
+
+    @property
+    def self_modifying(self):
+        return [write for write in self.writes if any(
+            address in self.code or address - 1 in self.code for address in range(write[1], write[2]))]
+
+    def block_starts(self):
+        return sorted(self.blocks)
+
+    def addresses(self, block):
+        """Address of each instruction in a block."""
+        address = block.start
+        while address < block.end:
+            yield address
+            address += _size(self.code[address], self.platform)
+
+    def listing(self):
+        """Disassembly with block labels and data ranges, one line per item."""
+        lines = []
+        items = [(start, "code") for start in self.blocks] + [(start, "data") for start, _ in self.data]
+        data_ends = dict(self.data)
+        for start, kind in sorted(items):
+            if kind == "data":
+                lines.append(f"{start:03X}: ; data, {data_ends[start] - start} bytes")
+                continue
+            block = self.blocks[start]
+            purity = ", pure" if block.pure else ""
+            lines.append(f"{start:03X}: ; block -> {' '.join(f'{s:03X}' for s in block.successors)}{purity}")
+            for address in self.addresses(block):
+                opcode = self.code[address]
+                text = disassemble(opcode, self.platform)
+                if _size(opcode, self.platform) == 4:
+                    text = f"LD I, {self.long_operands[address]:04X}"
+                lines.append(f"    {address:03X}  {opcode:04X}  {text}")
+        return lines
+
+    def to_dict(self):
+        return {
+            "version": VERSION,
+            "rom_hash": self.rom_hash,
+            "platform": self.platform,
+            "size": self.size,
+            "code": {str(address): opcode for address, opcode in self.code.items()},
+            "blocks": [[b.start, b.end, b.successors, b.pure, b.indirect] for b in self.blocks.values()],
+            "data": self.data,
+            "loops": self.loops,
+            "loop_bodies": self.loop_bodies,
+            "writes": self.writes,
+            "unknown_writes": self.unknown_writes,
+            "index_targets": self.index_targets,
+            "problems": self.problems,
+            "long_operands": {str(address): nnnn for address, nnnn in self.long_operands.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, fields):
+        return cls(
+            fields["rom_hash"], fields["size"],
+            {int(address): opcode for address, opcode in fields["code"].items()},
+            {start: Block(start, end, successors, pure, indirect)
+             for start, end, successors, pure, indirect in fields["blocks"]},
+            [tuple(entry) for entry in fields["data"]],
+            [tuple(entry) for entry in fields["loops"]],
+            fields["loop_bodies"],
+            [tuple(entry) for entry in fields["writes"]],
+            fields["unknown_writes"], fields["index_targets"],
+            [tuple(entry) for entry in fields["problems"]],
+            fields["platform"],
+            {int(address): nnnn for address, nnnn in fields["long_operands"].items()},
+        )
+
+
+def _size(opcode, platform):
+    """Bytes taken by an instruction: 4 for XO-CHIP's F000 NNNN, otherwise 2."""
+    return 4 if opcode == 0xF000 and platform == "xochip" else 2
+
+
+def _successors(address, opcode, handler, skip_size):
+    """(next addresses, ends block, indirect) for the instruction at address.
+
+    skip_size is the size of the following instruction, which skips jump over.
+    """
+    nnn = opcode & 0xFFF
+    if handler is Instructions.jump:
+        return [nnn], True, False
+    if handler is Instructions.call_subroutine:
+        return [nnn, address + 2], True, False
+    if handler in (Instructions.return_from_subroutine, Instructions._exit):
+        return [], True, False
+    if handler is Instructions.jump_with_offset:
+        return [nnn], True, True
+    if handler in SKIPS or handler in LONG_SKIPS:
+        return [address + 2, address + 2 + skip_size], True, False
+    if handler is Instructions._load_long_index:
+        return [address + 4], False, False
+    return [address + 2], False, False
+
+
+def analyze(rom, platform="chip8"):
+    """Analyze ROM bytes for a platform; see RomAnalysis."""
+    start_address = Memory.ROM_ADDRESS
+    end_address = start_address + len(rom)
+    decode = Instructions.decode
+
+    def opcode_at(address):
+        return (rom[address - start_address] << 8) | rom[address - start_address + 1]
+
+    def size_at(address):
+        if not start_address <= address < end_address - 1:
+            return 2
+        return _size(opcode_at(address), platform)
+
+    # Follow control flow from the entry point
+    code = {}
+    long_operands = {}
+    leaders = {start_address}
+    terminators = {}  # address -> (successors, indirect) for block-ending instructions
+    problems = []
+    work = [start_address]
+    while work:
+        address = work.pop()
+        if address in code:
+            continue
+        if not start_address <= address < end_address - 1:
+            problems.append((address, "control flow leaves the ROM"))
+            continue
+        opcode = opcode_at(address)
+        handler, _ = decode(opcode, platform)
+        if handler not in MNEMONICS or opcode == 0x0000:
+            problems.append((address, f"undecodable opcode {opcode:04X}"))
+            continue
+        if _size(opcode, platform) == 4:
+            if address + 3 >= end_address:
+                problems.append((address, "control flow leaves the ROM"))
+                continue
+            long_operands[address] = opcode_at(address + 2)
+        code[address] = opcode
+        successors, ends_block, indirect = _successors(address, opcode, handler, size_at(address + 2))
+        if ends_block:
+            terminators[address] = (successors, indirect)
+            leaders.update(successors)
+        work.extend(successors)
+
+    # Split the reachable instructions into basic blocks
+    blocks = {}
+    for leader in sorted(leaders):
+        if leader not in code:
+            continue
+        address = leader
+        pure = True
+        while True:
+            pure = pure and decode(code[address], platform)[0] not in IMPURE
+            if address in terminators:
+                successors, indirect = terminators[address]
+                break
+            following = address + _size(code[address], platform)
+            if following in leaders or following not in code:
+                successors, indirect = [following] if following in code else [], False
+                break
+            address = following
+        end = address + _size(code[address], platform)
+        blocks[leader] = Block(leader, end, [s for s in successors if s in code], pure, indirect)
+
+    # Bytes never executed are data
+    covered = bytearray(len(rom))
+    for address, opcode in code.items():
+        size = _size(opcode, platform)
+        covered[address - start_address:address - start_address + size] = b"\x01" * size
+    data = []
+    offset = 0
+    while offset < len(rom):
+        if covered[offset]:
+            offset += 1
+            continue
+        run_start = offset
+        while offset < len(rom) and not covered[offset]:
+            offset += 1
+        data.append((start_address + run_start, start_address + offset))
+
+    # Memory writes, tracking I through each block from ANNN and F000 NNNN
+    writes = []
+    unknown_writes = []
+    index_targets = set()
+    for block in blocks.values():
+        index = None
+        address = block.start
+        while address < block.end:
+            opcode = code[address]
+            handler, operands = decode(opcode, platform)
+            if handler in (Instructions.set_index_register, Instructions._load_long_index):
+                index = operands[0] if operands else long_operands[address]
+                if start_address <= index < end_address:
+                    index_targets.add(index)
+            elif handler in (Instructions._add_to_index, Instructions._set_index_to_sprite_location,
+                             Instructions._add_to_long_index, Instructions._set_index_to_big_sprite):
+                index = None
+            elif handler in (Instructions._store_bcd, Instructions._store_registers,
+                             Instructions._store_register_range):
+                if handler is Instructions._store_bcd:
+                    length = 3
+                elif handler is Instructions._store_registers:
+                    length = operands[0] + 1
+                else:
+                    length = abs(operands[0] - operands[1]) + 1
+                if index is None:
+                    unknown_writes.append(address)
+                else:
+                    writes.append((address, index, index + length))
+            address += _size(opcode, platform)
+
+    # Loops: every backward edge, with the blocks that can reach its latch
+    # without passing through the header
+    predecessors = {start: [] for start in blocks}
+    for block in blocks.values():
+        for successor in block.successors:
+            predecessors[successor].append(block.start)
+    loops = []
+    loop_bodies = []
+    for block in blocks.values():
+        for successor in block.successors:
+            if successor <= block.start:
+                body = {successor, block.start}
+                stack = [block.start]
+                while stack:
+                    for predecessor in predecessors[stack.pop()]:
+                        if predecessor not in body:
+                            body.add(predecessor)
+                            stack.append(predecessor)
+                loops.append((successor, block.start))
+                loop_bodies.append(sorted(body))
+    order = sorted(range(len(loops)), key=lambda k: (len(loop_bodies[k]), loops[k]))
+
+    return RomAnalysis(
+        hashlib.sha1(rom).hexdigest(), len(rom), code, blocks, data,
+        [loops[k] for k in order], [loop_bodies[k] for k in order],
+        writes, unknown_writes, sorted(index_targets), problems, platform, long_operands,
+    )
+
+
+_cache = {}  # (ROM hash, platform) -> RomAnalysis, for this process
+
+
+def analyze_rom(rom, cache_dir=None, platform="chip8"):
+    """Analyze a ROM given as bytes or a path, reusing cached results.
+
+    With cache_dir, results are also read from and written to
+    <cache_dir>/<sha1>.json, or <sha1>.<platform>.json for SCHIP and XO-CHIP.
+    """
+    if isinstance(rom, (str, os.PathLike)):
+        with open(rom, "rb") as rom_file:
+            rom = rom_file.read()
+    rom_hash = hashlib.sha1(rom).hexdigest()
+    analysis = _cache.get((rom_hash, platform))
+    if analysis is not None:
+        return analysis
+
+    name = f"{rom_hash}.json" if platform == "chip8" else f"{rom_hash}.{platform}.json"
+    path = os.path.join(cache_dir, name) if cache_dir else None
+    if path and os.path.exists(path):
+        with open(path) as cache_file:
+            fields = json.load(cache_file)
+        if fields.get("version") == VERSION:
+            analysis = RomAnalysis.from_dict(fields)
+    if analysis is None:
+        analysis = analyze(rom, platform)
+        if path:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(path, "w") as cache_file:
+                json.dump(analysis.to_dict(), cache_file)
+    _cache[rom_hash, platform] = analysis
+    return analysis
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Disassemble a CHIP-8 ROM and recover its control flow.")
+    parser.add_argument("rom", help="path to a .ch8 ROM")
+    parser.add_argument("--platform", choices=Instructions.PLATFORMS, default="chip8")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="where to cache results")
+    parser.add_argument("--no-cache", action="store_true", help="always analyze from scratch")
+    args = parser.parse_args()
+
+    analysis = analyze_rom(args.rom, None if args.no_cache else args.cache_dir, args.platform)
+    for line in analysis.listing():
+        print(line)
+    print()
+    print(f"{len(analysis.code)} instructions in {len(analysis.blocks)} blocks, "
+          f"{sum(end - start for start, end in analysis.data)} bytes of data")
+    for (header, latch), body in zip(analysis.loops, analysis.loop_bodies):
+        pure = all(analysis.blocks[start].pure for start in body)
+        print(f"loop {header:03X} <- {latch:03X}: {len(body)} blocks{', pure' if pure else ''}")
+    for pc, start, end in analysis.self_modifying:
+        print(f"self-modifying write at {pc:03X} to {start:03X}-{end - 1:03X}")
+    for pc in analysis.unknown_writes:
+        print(f"write through unknown I at {pc:03X}")
+    for pc, message in analysis.problems:
+        print(f"{pc:03X}: {message}")
+
+
+if __name__ == "__main__":
+    main()
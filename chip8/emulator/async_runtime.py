@@ -0,0 +1,117 @@
+"""Drive emulators from an asyncio event loop instead of a thread each.
+
+Each AsyncEmulator runs its machine as a task that executes one frame-sized
+batch and then yields to the loop, so one loop can run hundreds of sessions
+next to network I/O:
+
+    async with AsyncEmulator("roms/trip8.ch8") as emu:
+        await emu.press(0x5)
+        async for frame in emu.frames():
+            ...
+"""
+import asyncio
+
+from .chip8_emulator import Chip8Emulator
+from .input_source import LiveInput
+
+
+class AsyncEmulator:
+    def __init__(self, rom=None, paced=True, **options):
+        """rom is a path or bytes; options are passed on to Chip8Emulator.
+
+        Paced sessions run at 60 frames a second of loop time; unpaced ones
+        run as fast as the loop allows, yielding after every frame.
+        """
+        self.input = LiveInput()
+        self.emulator = Chip8Emulator(paced=False, input_source=self.input, **options)
+        if rom is not None:
+            self.emulator.load_rom(rom)
+        self.paced = paced
+        self.task = None
+        self.next_frame_future = None
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def start(self):
+        if self.task is None:
+            loop = asyncio.get_running_loop()
+            self.next_frame_future = loop.create_future()
+            self.task = loop.create_task(self.run())
+
+    async def close(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        scheduler = self.emulator.scheduler
+        frame_period = 1 / scheduler.FRAME_RATE
+        deadline = loop.time()
+        try:
+            while True:
+                self.emulator.run_frame()
+                future = self.next_frame_future
+                self.next_frame_future = loop.create_future()
+                future.set_result(self.emulator.frame_buffer.latest())
+
+                if not self.paced:
+                    await asyncio.sleep(0)
+                    continue
+                # Same fixed-period deadlines as FrameScheduler, slept on the loop
+                deadline += frame_period
+                delay = deadline - loop.time()
+                if delay < -scheduler.MAX_LAG_FRAMES * frame_period:
+                    deadline = loop.time()
+                await asyncio.sleep(max(delay, 0))
+        except Exception as error:
+            # Wake anyone waiting on a frame that will never come
+            self.next_frame_future.set_exception(error)
+            raise
+
+    async def next_frame(self):
+        """Wait for the next completed frame and return it."""
+        self.start()
+        return await self.next_frame_future
+
+    async def frames(self):
+        """Yield every completed frame; a slow consumer gets the latest one."""
+        while True:
+            yield await self.next_frame()
+
+    async def press(self, key, frames=2):
+        """Hold key for frames frames, then release it."""
+        self.input.push(key, True)
+        for _ in range(frames):
+            await self.next_frame()
+        self.input.push(key, False)
+        await self.next_frame()
+
+    def key_down(self, key):
+        self.input.push(key, True)
+
+    def key_up(self, key):
+        self.input.push(key, False)
+
+    async def run_until(self, condition, max_frames=None):
+        """Run until condition(emulator) holds after a frame; returns that frame.
+
+        Raises TimeoutError if max_frames frames pass first.
+        """
+        count = 0
+        while True:
+            frame = await self.next_frame()
+            if condition(self.emulator):
+                return frame
+            count += 1
+            if max_frames is not None and count >= max_frames:
+                raise TimeoutError(f"Condition not met within {max_frames} frames")
@@ -0,0 +1,242 @@
+"""Sound timer output.
+
+The beep is never synthesised while the emulator runs: every block it can
+need (tone at each phase, attack, release, silence) is precomputed with
+NumPy when an Audio is created. At each frame boundary Audio picks one
+frame-long block from the sound timer's state and copies it into a ring
+buffer that an output backend drains. The instruction loop does no audio
+work at all.
+
+Backends:
+    SoundDeviceBackend  the sound card, via the optional sounddevice package
+    WavSink             a WAV file, written as frames complete
+    NullSink            discards everything; for headless runs and tests
+
+From the repository root:
+
+    python -m chip8.emulator.audio roms/octopeg.ch8 --frames 600 --wav octopeg.wav
+"""
+import argparse
+import math
+import wave
+
+import numpy as np
+
+from .chip8_emulator import Chip8Emulator
+
+
+class RingBuffer:
+    """Single-producer, single-consumer sample queue without locks.
+
+    Only the producer moves write_index and only the consumer moves
+    read_index. Samples are copied in before write_index publishes them, and
+    each index update is one attribute assignment, which is atomic in
+    CPython, so the two sides never need to wait for each other.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.samples = np.zeros(capacity, dtype=np.float32)
+        self.write_index = 0
+        self.read_index = 0
+        self.dropped = 0  # Samples refused because the consumer fell behind
+        self.underruns = 0  # Reads that had to be padded with silence
+
+    def available(self):
+        return self.write_index - self.read_index
+
+    def write(self, block):
+        """Append block whole, or drop it if it does not fit; returns True if written."""
+        count = len(block)
+        if self.capacity - self.available() < count:
+            self.dropped += count
+            return False
+        start = self.write_index % self.capacity
+        first = min(count, self.capacity - start)
+        self.samples[start:start + first] = block[:first]
+        self.samples[:count - first] = block[first:]
+        self.write_index += count
+        return True
+
+    def read(self, out):
+        """Fill out with queued samples, padding with silence; returns how many were queued."""
+        count = min(len(out), self.available())
+        start = self.read_index % self.capacity
+        first = min(count, self.capacity - start)
+        out[:first] = self.samples[start:start + first]
+        out[first:count] = self.samples[:count - first]
+        if count < len(out):
+            out[count:] = 0
+            self.underruns += 1
+        self.read_index += count
+        return count
+
+
+class NullSink:
+    """Drains and discards audio as it is produced."""
+
+    blocksize = 0  # Drained as each frame is queued, so nothing waits in the ring
+
+    def start(self, audio):
+        self.ring = audio.ring
+        self.scratch = np.empty(audio.ring.capacity, dtype=np.float32)
+        self.samples = 0
+
+    def pump(self):
+        self.samples += self.ring.read(self.scratch[:self.ring.available()])
+
+    def stop(self):
+        pass
+
+
+class WavSink:
+    """Writes audio to a 16-bit mono WAV file as each frame completes."""
+
+    blocksize = 0
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    def start(self, audio):
+        self.ring = audio.ring
+        self.scratch = np.empty(audio.ring.capacity, dtype=np.float32)
+        self.file = wave.open(self.path, "wb")
+        self.file.setnchannels(1)
+        self.file.setsampwidth(2)
+        self.file.setframerate(audio.sample_rate)
+
+    def pump(self):
+        samples = self.scratch[:self.ring.read(self.scratch[:self.ring.available()])]
+        self.file.writeframes((samples * 32767).astype("<i2").tobytes())
+
+    def stop(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class SoundDeviceBackend:
+    """Plays through the sound card; the device's callback thread drains the ring."""
+
+    def __init__(self, blocksize=256):
+        self.blocksize = blocksize  # Samples per device callback
+        self.stream = None
+
+    def start(self, audio):
+        try:
+            import sounddevice
+        except ImportError:
+            raise ImportError("Sound output needs sounddevice: pip install sounddevice") from None
+        ring = audio.ring
+
+        def callback(outdata, frames, time_info, status):
+            ring.read(outdata[:, 0])
+
+        self.stream = sounddevice.OutputStream(samplerate=audio.sample_rate, channels=1, dtype="float32",
+                                               blocksize=self.blocksize, latency="low", callback=callback)
+        self.stream.start()
+
+    def pump(self):
+        pass
+
+    def stop(self):
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+
+
+class Audio:
+    """Turns the sound timer into a square-wave beep, one frame-long block at a time.
+
+    The ring holds one frame block plus one backend callback block and
+    DEVICE_MARGIN, and a block that does not fit is dropped. So a frame's
+    block is queued only behind at most a callback block and the margin, and
+    starts playing that long after the frame ends: 512 samples, 11.6 ms, with
+    SoundDeviceBackend's defaults at 44.1 kHz, under one frame. The device's
+    own output latency comes on top.
+    """
+
+    FRAME_RATE = 60
+    DEVICE_MARGIN = 256  # Samples of slack for frame pacing jitter, about 3 ms either way
+    FADE_SECONDS = 0.002  # Ramp at the start and end of a beep, against clicks
+
+    def __init__(self, emulator, backend=None, sample_rate=44100, frequency=440, volume=0.25):
+        if sample_rate % self.FRAME_RATE:
+            raise ValueError(f"Sample rate must be a multiple of {self.FRAME_RATE}")
+        self.emulator = emulator
+        self.backend = backend or NullSink()
+        self.sample_rate = sample_rate
+        self.block_size = sample_rate // self.FRAME_RATE
+        self.ring = RingBuffer(self.block_size + self.backend.blocksize + self.DEVICE_MARGIN)
+        self.build_blocks(frequency, volume)
+        self.playing = False
+        self.phase = 0  # Index of the next tone block
+        self.started = False
+
+    def build_blocks(self, frequency, volume):
+        # The tone repeats exactly every `cycle` frames; cut it into one block per frame
+        cycle = self.FRAME_RATE // math.gcd(frequency, self.FRAME_RATE)
+        t = np.arange(cycle * self.block_size)
+        samples = np.where(t * frequency * 2 // self.sample_rate % 2 == 0, volume, -volume).astype(np.float32)
+        self.tone = samples.reshape(cycle, self.block_size)
+
+        fade = int(self.sample_rate * self.FADE_SECONDS)
+        ramp = np.linspace(0, 1, fade, dtype=np.float32)
+        self.attack = self.tone[0].copy()
+        self.attack[:fade] *= ramp
+        # Releasing at phase p finishes the wave that block p would have played
+        self.release = np.zeros_like(self.tone)
+        self.release[:, :fade] = self.tone[:, :fade] * ramp[::-1]
+        self.silence = np.zeros(self.block_size, dtype=np.float32)
+
+    def start(self):
+        if not self.started:
+            self.backend.start(self)
+            self.started = True
+            self.emulator.audio = self
+
+    def stop(self):
+        if self.started:
+            self.started = False
+            self.emulator.audio = None
+            self.backend.stop()
+
+    def end_frame(self):
+        """Queue this frame's block; the scheduler calls this before the timers tick."""
+        active = self.emulator.timer.sound_timer > 0
+        if active:
+            block = self.tone[self.phase] if self.playing else self.attack
+            self.phase = (self.phase + 1) % len(self.tone)
+        elif self.playing:
+            block = self.release[self.phase]
+            self.phase = 0
+        else:
+            block = self.silence
+        self.playing = active
+        self.ring.write(block)
+        self.backend.pump()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a CHIP-8 ROM headless and write its sound to a WAV file.")
+    parser.add_argument("rom", help="path to a .ch8 ROM")
+    parser.add_argument("--frames", type=int, default=600, help="number of 60Hz frames to run")
+    parser.add_argument("--ips", type=int, default=2000, help="instructions per emulated second")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--wav", required=True, help="output WAV file")
+    args = parser.parse_args()
+
+    emulator = Chip8Emulator(args.ips, paced=False, seed=args.seed)
+    emulator.load_rom(args.rom)
+    audio = Audio(emulator, WavSink(args.wav))
+    audio.start()
+    try:
+        emulator.run_frames(args.frames)
+    finally:
+        audio.stop()
+    print(f"{emulator.frame_count / Audio.FRAME_RATE:.1f}s of audio written to {args.wav}")
+
+
+if __name__ == "__main__":
+    main()
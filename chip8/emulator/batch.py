@@ -0,0 +1,344 @@
+import os
+
+import numpy as np
+
+from .memory import Memory
+from .display import Display
+from .quirks import PROFILES
+
+
+class BatchEmulator:
+    """Runs many CHIP-8 machines in lockstep on NumPy arrays.
+
+    The state of every lane (registers, I, PC, stack, memory, framebuffer,
+    timers, keypad) lives in arrays with the lane as the first axis. Each step
+    fetches one opcode per lane, groups the lanes by opcode class and executes
+    every group with vectorised operations, following the same semantics as
+    Instructions on the CHIP-8 platform. quirks names the profile every lane
+    runs with, as for Chip8Emulator; it is fixed for the batch rather than
+    looked up per ROM, and is baked into the handlers when the batch is built.
+
+    Where the scalar core would raise (unknown opcodes, stack underflow,
+    out-of-range memory access) the lane is marked faulted and stops stepping.
+    CXNN draws from the batch's own seeded generator.
+    """
+
+    STACK_DEPTH = 64
+    FRAME_RATE = 60
+
+    def __init__(self, count, instructions_per_second=2000, seed=None, quirks="legacy"):
+        if quirks not in PROFILES:
+            raise ValueError(f"Unknown quirk profile: {quirks}")
+        self.quirks = PROFILES[quirks]
+        self.count = count
+        self.instructions_per_second = instructions_per_second
+        self.rng = np.random.default_rng(seed)
+        self.lanes = np.arange(count)
+
+        self.v = np.zeros((count, 16), dtype=np.uint8)
+        self.i = np.zeros(count, dtype=np.int32)
+        self.pc = np.zeros(count, dtype=np.int32)
+        self.stack = np.zeros((count, self.STACK_DEPTH), dtype=np.int32)
+        self.sp = np.zeros(count, dtype=np.int32)
+        self.memory = np.zeros((count, Memory.SIZE), dtype=np.uint8)
+        self.display = np.zeros((count, Display.HEIGHT, Display.WIDTH), dtype=np.uint8)
+        self.delay_timer = np.zeros(count, dtype=np.int32)
+        self.sound_timer = np.zeros(count, dtype=np.int32)
+        self.keys = np.zeros((count, 16), dtype=bool)
+        self.faulted = np.zeros(count, dtype=bool)
+        self.frame_wait = np.zeros(count, dtype=bool)  # Set by DXYN under the display wait quirk
+        self.instruction_count = 0
+        self.frame_count = 0
+        self.instruction_remainder = 0
+
+        self.handlers = (
+            self._execute_0, self._jump, self._call_subroutine, self._skip_if_equal,
+            self._skip_if_not_equal, self._skip_if_registers_equal, self._set_register,
+            self._add_to_register, self._register_operations, self._skip_if_registers_not_equal,
+            self._set_index_register,
+            self._jump_with_offset_vx if self.quirks.jump_vx else self._jump_with_offset, self._random, self._draw,
+            self._skip_if_key, self._execute_f_instructions,
+        )
+        self.reset()
+
+    def reset(self, lanes=None):
+        """Power-cycle the given lanes (all of them by default)."""
+        lanes = self.lanes if lanes is None else np.asarray(lanes)
+        self.v[lanes] = 0
+        self.i[lanes] = 0
+        self.pc[lanes] = Memory.ROM_ADDRESS
+        self.stack[lanes] = 0
+        self.sp[lanes] = 0
+        self.memory[lanes] = np.frombuffer(Memory.INITIAL, dtype=np.uint8)
+        self.display[lanes] = 0
+        self.delay_timer[lanes] = 0
+        self.sound_timer[lanes] = 0
+        self.keys[lanes] = False
+        self.faulted[lanes] = False
+        self.frame_wait[lanes] = False
+
+    def load_rom(self, rom, lanes=None):
+        """Load a ROM (a path or bytes) into the given lanes and point their PC at it."""
+        if isinstance(rom, (str, os.PathLike)):
+            with open(rom, 'rb') as rom_file:
+                rom = rom_file.read()
+        if len(rom) > Memory.SIZE - Memory.ROM_ADDRESS:
+            raise ValueError("ROM is too large to fit in memory")
+        lanes = self.lanes if lanes is None else np.asarray(lanes)
+        self.memory[lanes, Memory.ROM_ADDRESS:Memory.ROM_ADDRESS + len(rom)] = np.frombuffer(rom, dtype=np.uint8)
+        self.pc[lanes] = Memory.ROM_ADDRESS
+
+    def set_keys(self, keys):
+        """Replace the keypad state with an (N, 16) boolean array."""
+        self.keys[:] = keys
+
+    def observe(self):
+        """Read-only (N, 32, 64) view of every lane's framebuffer."""
+        view = self.display.view()
+        view.flags.writeable = False
+        return view
+
+    def step(self, count=1):
+        """Execute count instructions on every lane that has not faulted."""
+        for _ in range(count):
+            self._step()
+        self.instruction_count += count
+
+    def run_frames(self, count):
+        """Run count 60Hz frames: instructions_per_second / 60 steps and one timer tick each."""
+        for _ in range(count):
+            # Carry the remainder like FrameScheduler, so frames split exactly as in the scalar core
+            self.instruction_remainder += self.instructions_per_second
+            instructions, self.instruction_remainder = divmod(self.instruction_remainder, self.FRAME_RATE)
+            self.step(instructions)
+            self.frame_wait[:] = False  # A display wait lasts until the frame ends
+            self.tick()
+            self.frame_count += 1
+
+    def tick(self):
+        np.subtract(self.delay_timer, 1, out=self.delay_timer, where=self.delay_timer > 0)
+        np.subtract(self.sound_timer, 1, out=self.sound_timer, where=self.sound_timer > 0)
+
+    def _step(self):
+        active = np.flatnonzero(~(self.faulted | self.frame_wait))
+        pc = self.pc[active]
+        in_range = pc < Memory.SIZE - 1
+        if not in_range.all():
+            self.faulted[active[~in_range]] = True
+            active, pc = active[in_range], pc[in_range]
+        if active.size == 0:
+            return
+
+        opcode = (self.memory[active, pc].astype(np.int32) << 8) | self.memory[active, pc + 1]
+        self.pc[active] = pc + 2
+
+        # Group lanes by opcode class and run each group in one go
+        family = opcode >> 12
+        order = np.argsort(family, kind="stable")
+        bounds = np.searchsorted(family[order], np.arange(17))
+        for f in range(16):
+            start, end = bounds[f], bounds[f + 1]
+            if start != end:
+                group = order[start:end]
+                self.handlers[f](active[group], opcode[group])
+
+    def _fault(self, lanes, operands, bad):
+        """Fault the lanes flagged in bad; returns the remaining lanes and their operands."""
+        if bad.any():
+            self.faulted[lanes[bad]] = True
+            return lanes[~bad], operands[~bad]
+        return lanes, operands
+
+    def _execute_0(self, lanes, opcode):
+        clear = lanes[opcode == 0x00E0]
+        self.display[clear] = 0
+
+        returning = opcode == 0x00EE
+        lanes_returning, _ = self._fault(lanes[returning], opcode[returning], self.sp[lanes[returning]] == 0)
+        self.sp[lanes_returning] -= 1
+        self.pc[lanes_returning] = self.stack[lanes_returning, self.sp[lanes_returning]]
+
+        # Unknown 0NNN opcodes skip the next instruction, 0000 does nothing
+        unknown = (opcode != 0x00E0) & ~returning & (opcode != 0x0000)
+        self.pc[lanes[unknown]] += 2
+
+    def _jump(self, lanes, opcode):
+        self.pc[lanes] = opcode & 0x0FFF
+
+    def _call_subroutine(self, lanes, opcode):
+        lanes, opcode = self._fault(lanes, opcode, self.sp[lanes] >= self.STACK_DEPTH)
+        self.stack[lanes, self.sp[lanes]] = self.pc[lanes]
+        self.sp[lanes] += 1
+        self.pc[lanes] = opcode & 0x0FFF
+
+    def _skip(self, lanes, condition):
+        self.pc[lanes[condition]] += 2
+
+    def _skip_if_equal(self, lanes, opcode):
+        self._skip(lanes, self.v[lanes, (opcode >> 8) & 0xF] == (opcode & 0xFF))
+
+    def _skip_if_not_equal(self, lanes, opcode):
+        self._skip(lanes, self.v[lanes, (opcode >> 8) & 0xF] != (opcode & 0xFF))
+
+    def _skip_if_registers_equal(self, lanes, opcode):
+        self._skip(lanes, self.v[lanes, (opcode >> 8) & 0xF] == self.v[lanes, (opcode >> 4) & 0xF])
+
+    def _skip_if_registers_not_equal(self, lanes, opcode):
+        self._skip(lanes, self.v[lanes, (opcode >> 8) & 0xF] != self.v[lanes, (opcode >> 4) & 0xF])
+
+    def _set_register(self, lanes, opcode):
+        self.v[lanes, (opcode >> 8) & 0xF] = opcode & 0xFF
+
+    def _add_to_register(self, lanes, opcode):
+        x = (opcode >> 8) & 0xF
+        self.v[lanes, x] = (self.v[lanes, x] + (opcode & 0xFF)) & 0xFF
+
+    def _register_operations(self, lanes, opcode):
+        lanes, opcode = self._fault(lanes, opcode, ~np.isin(opcode & 0xF, (0x0, 0x1, 0x2, 0x3, 0x4, 0x5, 0x6, 0x7, 0xE)))
+        v = self.v
+        quirks = self.quirks
+        operation = opcode & 0xF
+        for n in np.unique(operation):
+            selected = operation == n
+            lane = lanes[selected]
+            x = (opcode[selected] >> 8) & 0xF
+            y = (opcode[selected] >> 4) & 0xF
+            # Each statement re-reads the registers like the scalar handlers,
+            # so X or Y being VF behaves the same
+            if n == 0x0:
+                v[lane, x] = v[lane, y]
+            elif n == 0x1:
+                v[lane, x] = v[lane, x] | v[lane, y]
+            elif n == 0x2:
+                v[lane, x] = v[lane, x] & v[lane, y]
+            elif n == 0x3:
+                v[lane, x] = v[lane, x] ^ v[lane, y]
+            elif n in (0x6, 0xE) and quirks.shift_vy:
+                value = v[lane, y]
+                v[lane, 0xF] = value & 0x1 if n == 0x6 else value >> 7
+                v[lane, x] = value >> 1 if n == 0x6 else (value.astype(np.int32) << 1) & 0xFF
+            elif n == 0x4:
+                result = v[lane, x].astype(np.int32) + v[lane, y]
+                v[lane, 0xF] = result > 255
+                v[lane, x] = result & 0xFF
+            elif n == 0x5:
+                v[lane, 0xF] = v[lane, x] >= v[lane, y]
+                v[lane, x] = (v[lane, x].astype(np.int32) - v[lane, y]) & 0xFF
+            elif n == 0x6:
+                v[lane, 0xF] = v[lane, x] & 0x1
+                v[lane, x] = v[lane, x] >> 1
+            elif n == 0x7:
+                v[lane, 0xF] = v[lane, y] >= v[lane, x]
+                v[lane, x] = (v[lane, y].astype(np.int32) - v[lane, x]) & 0xFF
+            else:
+                v[lane, 0xF] = v[lane, x] >> 7
+                v[lane, x] = (v[lane, x].astype(np.int32) << 1) & 0xFF
+            if n in (0x1, 0x2, 0x3) and quirks.logic_resets_vf:
+                v[lane, 0xF] = 0
+
+    def _set_index_register(self, lanes, opcode):
+        self.i[lanes] = opcode & 0x0FFF
+
+    def _jump_with_offset(self, lanes, opcode):
+        self.pc[lanes] = (opcode & 0x0FFF) + self.v[lanes, 0]
+
+    def _jump_with_offset_vx(self, lanes, opcode):
+        self.pc[lanes] = (opcode & 0x0FFF) + self.v[lanes, (opcode >> 8) & 0xF]
+
+    def _random(self, lanes, opcode):
+        values = self.rng.integers(0, 256, size=lanes.size)
+        self.v[lanes, (opcode >> 8) & 0xF] = values & opcode & 0xFF
+
+    def _draw(self, lanes, opcode):
+        x_coord = self.v[lanes, (opcode >> 8) & 0xF].astype(np.int32) % Display.WIDTH
+        y_coord = self.v[lanes, (opcode >> 4) & 0xF].astype(np.int32) % Display.HEIGHT
+        height = opcode & 0xF
+        self.v[lanes, 0xF] = 0  # Reset collision flag
+
+        # Sprite rows as a (lanes, rows) array; rows past the bottom edge or
+        # the end of memory are clipped like the scalar core clips them
+        rows = np.arange(height.max())
+        row_address = self.i[lanes, None] + rows
+        screen_y = y_coord[:, None] + rows
+        sprite = self.memory[lanes[:, None], np.minimum(row_address, Memory.SIZE - 1)]
+        sprite[(rows >= height[:, None]) | (screen_y >= Display.HEIGHT) | (row_address >= Memory.SIZE)] = 0
+
+        # Unpack to (lanes, rows, 8) pixels and drop columns past the right edge
+        screen_x = x_coord[:, None] + np.arange(8)
+        pixels = np.unpackbits(sprite[..., None], axis=2)
+        pixels &= (screen_x < Display.WIDTH)[:, None, :]
+
+        group, row, col = np.nonzero(pixels)
+        lane = lanes[group]
+        y = screen_y[group, row]
+        x = screen_x[group, col]
+        collided = self.display[lane, y, x] == 1
+        self.display[lane, y, x] ^= 1
+        self.v[np.unique(lane[collided]), 0xF] = 1  # Set collision flag
+        if self.quirks.display_wait:
+            self.frame_wait[lanes] = True
+
+    def _skip_if_key(self, lanes, opcode):
+        operation = opcode & 0xFF
+        key = self.v[lanes, (opcode >> 8) & 0xF]
+        lanes, opcode = self._fault(lanes, opcode, ((operation != 0x9E) & (operation != 0xA1)) | (key > 0xF))
+        operation = opcode & 0xFF
+        pressed = self.keys[lanes, self.v[lanes, (opcode >> 8) & 0xF]]
+        self._skip(lanes, np.where(operation == 0x9E, pressed, ~pressed))
+
+    def _execute_f_instructions(self, lanes, opcode):
+        operation = opcode & 0xFF
+        lanes, opcode = self._fault(lanes, opcode, ~np.isin(operation, (0x07, 0x0A, 0x15, 0x18, 0x1E, 0x29, 0x33, 0x55, 0x65)))
+        operation = opcode & 0xFF
+        for nn in np.unique(operation):
+            selected = operation == nn
+            lane = lanes[selected]
+            x = (opcode[selected] >> 8) & 0xF
+            if nn == 0x07:
+                self.v[lane, x] = self.delay_timer[lane]
+            elif nn == 0x0A:
+                self._wait_for_key_press(lane, x)
+            elif nn == 0x15:
+                self.delay_timer[lane] = self.v[lane, x]
+            elif nn == 0x18:
+                self.sound_timer[lane] = self.v[lane, x]
+            elif nn == 0x1E:
+                index = self.i[lane] + self.v[lane, x]
+                overflow = index > 0xFFF
+                self.v[lane[overflow], 0xF] = 1
+                self.i[lane] = index & 0xFFF
+            elif nn == 0x29:
+                self.i[lane] = Memory.FONT_ADDRESS + (self.v[lane, x].astype(np.int32) & 0xF) * 5
+            elif nn == 0x33:
+                lane, x = self._fault(lane, x, self.i[lane] + 2 >= Memory.SIZE)
+                value = self.v[lane, x]
+                index = self.i[lane]
+                self.memory[lane, index] = value // 100
+                self.memory[lane, index + 1] = (value % 100) // 10
+                self.memory[lane, index + 2] = value % 10
+            elif nn == 0x55:
+                lane, x = self._fault(lane, x, self.i[lane] + x >= Memory.SIZE)
+                for r in range(16):
+                    storing = r <= x
+                    self.memory[lane[storing], self.i[lane[storing]] + r] = self.v[lane[storing], r]
+                self._increment_index(lane, x)
+            else:
+                lane, x = self._fault(lane, x, self.i[lane] + x >= Memory.SIZE)
+                for r in range(16):
+                    loading = r <= x
+                    self.v[lane[loading], r] = self.memory[lane[loading], self.i[lane[loading]] + r]
+                self._increment_index(lane, x)
+
+    def _increment_index(self, lanes, x):
+        # FX55/FX65 leave I alone, or move it by X or X + 1, depending on the profile
+        if self.quirks.index_increment is not None:
+            self.i[lanes] += x + self.quirks.index_increment
+
+    def _wait_for_key_press(self, lanes, x):
+        # Lanes with no key down re-execute FX0A next step; the others take
+        # the lowest pressed key, as Instructions._wait_for_key_press does
+        # in the default "press" key wait mode
+        keys = self.keys[lanes]
+        pressed = keys.any(axis=1)
+        self.v[lanes[pressed], x[pressed]] = keys[pressed].argmax(axis=1)
+        self.pc[lanes[~pressed]] -= 2
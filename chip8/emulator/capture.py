@@ -0,0 +1,297 @@
+"""Export frames as PNG screenshots, GIF animations or raw video.
+
+Frames become images without any per-pixel Python. Packed rows are unpacked
+with np.unpackbits, XO-CHIP's second bit plane is ORed in as bit 1 of each
+colour index, and the result is upscaled by broadcasting each pixel over a
+scale x scale block. Writers keep the result as palette indices (PNG, GIF)
+or map it to RGB by indexing the palette before upscaling (raw video).
+
+A FrameCapture queues every published frame and encodes it on a background
+thread, so the emulator thread only appends an immutable Frame to a queue.
+From the repository root:
+
+    python -m chip8.emulator.capture roms/trip8.ch8 --frames 600 --gif trip8.gif
+    python -m chip8.emulator.capture roms/trip8.ch8 --frames 600 --raw - |
+        ffmpeg -f rawvideo -pix_fmt rgb24 -s 512x256 -r 60 -i - trip8.mp4
+
+GIF export needs Pillow; PNG and raw video need only NumPy.
+"""
+import argparse
+import os
+import queue
+import struct
+import sys
+import threading
+import zlib
+
+import numpy as np
+
+from .chip8_emulator import Chip8Emulator
+from .display import Display
+from .quirks import PROFILES
+
+# Background, plane 0, plane 1, both planes
+PALETTES = {
+    "mono": ((0, 0, 0), (255, 255, 255), (170, 170, 170), (85, 85, 85)),
+    "green": ((0, 24, 0), (51, 255, 102), (25, 140, 56), (153, 255, 178)),
+    "amber": ((32, 16, 0), (255, 176, 0), (140, 96, 0), (255, 216, 128)),
+    "lcd": ((15, 56, 15), (155, 188, 15), (48, 98, 48), (139, 172, 15)),
+}
+
+
+def palette_array(palette):
+    """(colours, 3) uint8 array from a PALETTES name or a sequence of RGB triples."""
+    return np.array(PALETTES[palette] if isinstance(palette, str) else palette, dtype=np.uint8)
+
+
+def unpack_rows(rows, width=Display.WIDTH):
+    """(height, width) array of 0/1 pixels from packed display rows."""
+    packed = b"".join(row.to_bytes(width // 8, "big") for row in rows)
+    return np.unpackbits(np.frombuffer(packed, dtype=np.uint8)).reshape(len(rows), width)
+
+
+def upscale(pixels, scale):
+    """Nearest-neighbour upscale of the first two axes by an integer factor."""
+    height, width = pixels.shape[:2]
+    # A strided view repeats each pixel; only the final reshape copies
+    blocks = np.broadcast_to(pixels[:, None, :, None], (height, scale, width, scale) + pixels.shape[2:])
+    return blocks.reshape((height * scale, width * scale) + pixels.shape[2:])
+
+
+def composite(planes, width=Display.WIDTH):
+    """(height, width) array of colour indices from packed bit planes."""
+    pixels = unpack_rows(planes[0], width)
+    for plane, rows in enumerate(planes[1:], 1):
+        pixels |= unpack_rows(rows, width) << plane
+    return pixels
+
+
+def render(planes, palette="mono", scale=8, width=Display.WIDTH):
+    """(height * scale, width * scale, 3) RGB image of packed bit planes."""
+    # Map colours before upscaling, so the palette lookup touches each pixel once
+    return upscale(palette_array(palette)[composite(planes, width)], scale)
+
+
+def _png_chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def encode_png(pixels, palette):
+    """PNG bytes for an image of palette indices."""
+    height, width = pixels.shape
+    # Every scanline starts with its filter type, 0 (none)
+    scanlines = np.zeros((height, width + 1), dtype=np.uint8)
+    scanlines[:, 1:] = pixels
+    header = struct.pack(">IIBBBBB", width, height, 8, 3, 0, 0, 0)
+    return b"".join((
+        b"\x89PNG\r\n\x1a\n",
+        _png_chunk(b"IHDR", header),
+        _png_chunk(b"PLTE", palette.tobytes()),
+        _png_chunk(b"IDAT", zlib.compress(scanlines.tobytes(), 6)),
+        _png_chunk(b"IEND", b""),
+    ))
+
+
+def screenshot(emulator, path, palette="mono", scale=8):
+    """Save the current display as a PNG."""
+    display = emulator.display
+    pixels = upscale(composite(display.planes, display.width), scale)
+    with open(path, "wb") as file:
+        file.write(encode_png(pixels, palette_array(palette)))
+
+
+class FrameWriter:
+    """Base class for capture outputs. write() runs on the capture thread.
+
+    With hires, 64x32 frames are upscaled twice as much as 128x64 ones, so a
+    ROM that switches resolution keeps the same image size throughout.
+    """
+
+    def __init__(self, palette="mono", scale=8, hires=False):
+        self.palette = palette_array(palette)
+        self.scale = scale
+        self.hires = hires
+
+    def frame_scale(self, frame):
+        return self.scale * Display.HIRES_WIDTH // frame.width if self.hires else self.scale
+
+    def pixels(self, frame):
+        return upscale(composite(frame.planes, frame.width), self.frame_scale(frame))
+
+    def write(self, frame):
+        raise NotImplementedError("Subclasses must implement write method")
+
+    def close(self):
+        pass
+
+
+class PngWriter(FrameWriter):
+    """One PNG per frame, named pattern.format(frame_count), e.g. "shots/{:05d}.png"."""
+
+    def __init__(self, pattern, palette="mono", scale=8, hires=False):
+        super().__init__(palette, scale, hires)
+        self.pattern = pattern
+
+    def write(self, frame):
+        with open(self.pattern.format(frame.frame_count), "wb") as file:
+            file.write(encode_png(self.pixels(frame), self.palette))
+
+
+class GifWriter(FrameWriter):
+    """Animated GIF of the captured frames, written on close.
+
+    GIF delays are whole hundredths of a second and viewers slow down
+    anything under 20 ms, so a new image is kept only when the screen changed
+    and at least MIN_DELAY has passed; the timeline stays exact.
+    """
+
+    MIN_DELAY = 20  # ms
+
+    def __init__(self, path, palette="mono", scale=8, hires=False, fps=60):
+        try:
+            from PIL import Image
+        except ImportError:
+            raise ImportError("GIF export needs Pillow: pip install Pillow") from None
+        super().__init__(palette, scale, hires)
+        self.image_class = Image
+        self.path = path
+        self.fps = fps
+        self.count = 0
+        self.images = []
+        self.starts = []  # Start time of each image in ms, on GIF's 10 ms grid
+        self.last_planes = None
+
+    def time(self, frame_index):
+        return round(frame_index * 100 / self.fps) * 10
+
+    def write(self, frame):
+        start = self.time(self.count)
+        self.count += 1
+        if self.images and (frame.planes == self.last_planes or start - self.starts[-1] < self.MIN_DELAY):
+            return
+        image = self.image_class.fromarray(self.pixels(frame), "P")
+        image.putpalette(self.palette.tobytes())
+        self.images.append(image)
+        self.starts.append(start)
+        self.last_planes = frame.planes
+
+    def close(self):
+        if not self.images:
+            return
+        ends = self.starts[1:] + [max(self.time(self.count), self.starts[-1] + self.MIN_DELAY)]
+        durations = [end - start for start, end in zip(self.starts, ends)]
+        self.images[0].save(self.path, save_all=True, append_images=self.images[1:],
+                            duration=durations, loop=0)
+
+
+class RawVideoWriter(FrameWriter):
+    """Headerless rgb24 frames for ffmpeg and friends; path "-" is stdout."""
+
+    def __init__(self, path, palette="mono", scale=8, hires=False):
+        super().__init__(palette, scale, hires)
+        self.file = sys.stdout.buffer if path == "-" else open(path, "wb")
+
+    def write(self, frame):
+        self.file.write(render(frame.planes, self.palette, self.frame_scale(frame), frame.width).tobytes())
+
+    def close(self):
+        if self.file is sys.stdout.buffer:
+            self.file.flush()
+        else:
+            self.file.close()
+
+
+class FrameCapture:
+    """Feeds every frame the emulator publishes to a writer on a background thread.
+
+    Frames queue up if the writer falls behind; none are dropped. stop()
+    waits for the queue to drain, closes the writer and re-raises anything
+    the writer raised.
+    """
+
+    def __init__(self, emulator, writer):
+        self.emulator = emulator
+        self.writer = writer
+        self.frames = queue.SimpleQueue()
+        self.thread = None
+        self.error = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        self.emulator.frame_buffer.listeners.append(self.frames.put)
+
+    def stop(self):
+        if self.thread is None:
+            return
+        self.emulator.frame_buffer.listeners.remove(self.frames.put)
+        self.frames.put(None)
+        self.thread.join()
+        self.thread = None
+        if self.error is not None:
+            raise self.error
+
+    def run(self):
+        try:
+            while (frame := self.frames.get()) is not None:
+                self.writer.write(frame)
+        except Exception as error:
+            self.error = error
+            # Keep draining so stop() does not wait on a dead writer
+            while self.frames.get() is not None:
+                pass
+        finally:
+            try:
+                self.writer.close()
+            except Exception as error:
+                self.error = self.error or error
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a CHIP-8 ROM headless and capture its frames.")
+    parser.add_argument("rom", help="path to a .ch8 ROM")
+    parser.add_argument("--frames", type=int, default=600, help="number of 60Hz frames to run")
+    parser.add_argument("--ips", type=int, default=2000, help="instructions per emulated second")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--platform", choices=Chip8Emulator.PLATFORMS, help="default: from the ROM database")
+    parser.add_argument("--quirks", choices=sorted(PROFILES), help="default: from the ROM database")
+    parser.add_argument("--palette", choices=sorted(PALETTES), default="mono")
+    parser.add_argument("--scale", type=int, default=8)
+    output = parser.add_mutually_exclusive_group(required=True)
+    output.add_argument("--png", metavar="PATTERN", help='one PNG per frame, e.g. "shots/{:05d}.png"')
+    output.add_argument("--gif", metavar="PATH", help="animated GIF (needs Pillow)")
+    output.add_argument("--raw", metavar="PATH", help='raw rgb24 video, "-" for stdout')
+    output.add_argument("--screenshot", metavar="PATH", help="PNG of the last frame only")
+    args = parser.parse_args()
+
+    emulator = Chip8Emulator(args.ips, paced=False, seed=args.seed, platform=args.platform, quirks=args.quirks)
+    emulator.load_rom(args.rom)
+    if args.screenshot:
+        emulator.run_frames(args.frames)
+        screenshot(emulator, args.screenshot, args.palette, args.scale)
+        return
+
+    # SCHIP and XO-CHIP ROMs can switch to 128x64 at any time
+    hires = emulator.platform != "chip8"
+    if args.png:
+        directory = os.path.dirname(args.png)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        writer = PngWriter(args.png, args.palette, args.scale, hires)
+    elif args.gif:
+        writer = GifWriter(args.gif, args.palette, args.scale, hires)
+    else:
+        writer = RawVideoWriter(args.raw, args.palette, args.scale, hires)
+    with FrameCapture(emulator, writer):
+        emulator.run_frames(args.frames)
+
+
+if __name__ == "__main__":
+    main()
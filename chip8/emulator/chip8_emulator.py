@@ -1,4 +1,6 @@
-import time
+import hashlib
+import os
+from collections import deque
 
 from .cpu import CPU
 from .memory import Memory
@@ -6,71 +8,204 @@ from .timer import Timer
 from .display import Display  # Import the Display class
 from .instructions import Instructions  # Import the Instructions class
 from .keyboard import Keyboard
+from .idle import IdleLoopSkipper
+from .scheduler import FrameScheduler
+from .frame_buffer import FrameBuffer
+from .rng import Rng
+from .quirks import PROFILES, PLATFORM_PROFILES, resolve
+
+# The JIT, save states and concurrent.futures are imported where they are
+# used: most runs need only some of them, and batch workers start a fresh
+# interpreter for every job.
 
 class Chip8Emulator:
-    def __init__(self, instructions_per_second=2000):
+    EXECUTION_MODES = ("interpreter", "jit")
+    PLATFORMS = Instructions.PLATFORMS
+
+    def __init__(self, instructions_per_second=2000, execution_mode="interpreter", paced=True, input_source=None,
+                 rewind_frames=0, seed=None, key_wait="press", skip_idle=True, platform=None, quirks=None):
+        if execution_mode not in self.EXECUTION_MODES:
+            raise ValueError(f"Unknown execution mode: {execution_mode}")
+        if platform is not None and platform not in self.PLATFORMS:
+            raise ValueError(f"Unknown platform: {platform}")
+        if quirks is not None and quirks not in PROFILES:
+            raise ValueError(f"Unknown quirk profile: {quirks}")
+        # None lets load_rom pick the platform and quirk profile from the ROM database
+        self.requested_platform = platform
+        self.requested_quirks = quirks
+        self.platform = platform or "chip8"  # "chip8", "schip" (128x64, scrolling) or "xochip" (also 64KB, two planes)
+        self.quirks = PROFILES[quirks or PLATFORM_PROFILES[self.platform]]
         self.instructions_per_second = instructions_per_second
+        self.execution_mode = execution_mode
+        self.paced = paced  # Sleep between frames to hold instructions_per_second
+        self.input_source = input_source
+        self.rewind_frames = rewind_frames  # Frames of rewind history to keep; 0 disables it
+        self.seed = Rng.random_seed() if seed is None else seed  # Every reset replays the same random numbers
+        self.key_wait = key_wait  # "press" or "release": what completes FX0A
+        self.skip_idle = skip_idle  # Fast-forward loops that repeat until the next frame
+        self.rom_hash = None
+        self.profiler = None  # Set while a Profiler is enabled
+        self.audio = None  # Set while an Audio output is started
+        self.flags = [0] * 16  # SCHIP FX75/FX85 storage, which survives resets
+        self.frame_buffer = FrameBuffer()  # Completed frames for other threads
+        self.commands = deque()  # (future, function, args) to run at the next frame boundary
         self.reset()
 
     def reset(self):
-        self.memory = Memory()
+        xo = self.platform == "xochip"
+        self.memory = Memory(Memory.XO_SIZE if xo else Memory.SIZE)
         self.timer = Timer()
-        self.display = Display()
+        self.display = Display(planes=2 if xo else 1)
         self.instructions = Instructions(self)
         self.cpu = CPU(self, self.instructions)
-        self.keyboard = Keyboard()
+        self.keyboard = Keyboard(self.key_wait)
+        self.rng = Rng(self.seed)
+        self.instructions.bind()
+        self.jit = None
+        if self.execution_mode == "jit":
+            from .jit import BlockTranslator
+            self.jit = BlockTranslator(self)
+        if self.profiler is not None:
+            self.profiler.install()
+        self.scheduler = FrameScheduler(self, paced=self.paced)
+        self.idle_skipper = IdleLoopSkipper(self) if self.skip_idle else None
+        self.rewind_buffer = None
+        if self.rewind_frames:
+            from .savestate import RewindBuffer
+            self.rewind_buffer = RewindBuffer(self, self.rewind_frames)
         self.instruction_count = 0
-        self.last_time = time.time()
-        self.nanoseconds_per_instruction = 1_000_000_000 // self.instructions_per_second
-        self.last_instruction_time = time.time_ns()
-
-    def load_rom(self, rom_path):
-        # Read the ROM file
-        with open(rom_path, 'rb') as rom_file:
-            rom_data = rom_file.read()
-        
-        # Check if the ROM fits in memory
-        if len(rom_data) > 4096 - 0x200:
-            raise ValueError("ROM is too large to fit in memory")
-        
-        # Load the ROM into memory
+        self.frame_count = 0
+
+    def load_rom(self, rom, platform=None, quirks=None):
+        """Load a ROM, given as a path or as bytes, and point the PC at it.
+
+        Loading from bytes, e.g. from a RomLibrary or RomCache, touches no
+        files. platform and quirks choose for this ROM in place of the ROM
+        database; those given to the constructor still take precedence.
+        """
+        if isinstance(rom, (str, os.PathLike)):
+            with open(rom, 'rb') as rom_file:
+                rom_data = rom_file.read()
+        else:
+            rom_data = bytes(rom)
+
+        self.rom_hash = hashlib.sha1(rom_data).hexdigest()
+        platform, quirks = resolve(self.rom_hash, self.requested_platform or platform,
+                                   self.requested_quirks or quirks)
+        if platform != self.platform:
+            # Memory size and display planes depend on the platform
+            self.platform = platform
+            self.quirks = PROFILES[quirks]
+            self.reset()
+        else:
+            self.set_quirks(quirks)
+
+        # Load the ROM into memory; raises ValueError if it does not fit
         self.memory.load_rom(rom_data)
+        if self.jit is not None:
+            self.jit.invalidate_all()
         
         # Set the program counter to the start of the ROM
         self.cpu.pc = 0x200
 
 
+    def set_quirks(self, name):
+        """Switch to a quirk profile by rebuilding the dispatch table around it."""
+        quirks = PROFILES[name]
+        if quirks is self.quirks:
+            return
+        self.quirks = quirks
+        self.cpu.dispatch = self.instructions.dispatch = Instructions.get_dispatch_table(self.platform, quirks)
+        if self.profiler is not None:
+            self.profiler.install()
+        if self.jit is not None:
+            self.jit.invalidate_all()  # Translated blocks inline the old behaviour
+
+    def defer(self, function, *args):
+        """Run function(*args) on the emulator thread at the next frame boundary.
+
+        Use this from other threads for anything that replaces machine state,
+        such as reset, load_rom or set_instructions_per_second. Returns a
+        Future for the result.
+        """
+        from concurrent.futures import Future
+        future = Future()
+        self.commands.append((future, function, args))
+        return future
+
+    def run_commands(self):
+        commands = self.commands
+        while commands:
+            future, function, args = commands.popleft()
+            try:
+                future.set_result(function(*args))
+            except Exception as error:
+                future.set_exception(error)
+
     def step(self):
-        # Execute one instruction
-        self.cpu.step()
+        # Execute one instruction, or one translated block in JIT mode
+        if self.jit is not None:
+            executed = self.jit.step()
+        else:
+            self.cpu.step()
+            executed = 1
+        self.instruction_count += executed
+
+    def run_instructions(self, count):
+        """Execute count instructions as fast as the host allows, without pacing."""
+        execute = self.jit.run if self.jit is not None else self.cpu.run
+        if self.idle_skipper is not None and self.profiler is None:
+            # The profiler wants to see every instruction
+            executed = self.idle_skipper.run(count, execute)
+        else:
+            executed = execute(count)
+        self.instruction_count += executed
+        return executed
+
+    def run_frame(self):
+        """Run one 60Hz frame through the scheduler, sleeping to its deadline when paced."""
+        self.scheduler.run_frame()
+
+    def run_frames(self, count):
+        """Run count 60Hz frames.
+
+        Each frame polls the input source, executes instructions_per_second / 60
+        instructions and ticks the timers once.
+        """
+        for _ in range(count):
+            self.scheduler.run_frame()
 
-        # Calculate the time to sleep
-        current_time = time.time_ns()
-        time_elapsed = current_time - self.last_instruction_time
-        time_to_sleep = self.nanoseconds_per_instruction - time_elapsed
+    def get_stats(self):
+        """Achieved instructions/sec and frame-time statistics."""
+        return self.scheduler.stats()
 
-        if time_to_sleep > 0:
-            # Sleep for the remaining time
-            time.sleep(time_to_sleep / 1_000_000_000)
+    def save_state(self):
+        """Serialize the full machine state to bytes."""
+        from .savestate import save_state
+        return save_state(self)
 
-        # Update the last instruction time
-        self.last_instruction_time = time.time_ns()
+    def load_state(self, state):
+        """Restore the machine from save_state() bytes."""
+        from .savestate import load_state
+        load_state(self, state)
 
-    def update_timers(self):
-        # Update delay and sound timers
-        self.timer.update()
+    def rewind(self, frames=1):
+        """Step back frames recorded frames; returns how many were rewound."""
+        if self.rewind_buffer is None:
+            raise ValueError("Rewind is disabled; pass rewind_frames to enable it")
+        return self.rewind_buffer.rewind(frames)
 
     def get_display(self):
         """Return the current state of the display."""
         return self.display.get_display()
 
     def set_key_pressed(self, key):
-        # Set a key as pressed
-        self.cpu.set_key_pressed(key)
+        # Set a keypad key (0x0-0xF) as pressed
+        self.keyboard.key_down(key)
 
     def set_key_released(self, key):
-        # Set a key as released
-        self.cpu.set_key_released(key)
+        # Set a keypad key (0x0-0xF) as released
+        self.keyboard.key_up(key)
 
     def is_sound_active(self):
         # Check if sound should be playing
@@ -1,10 +1,11 @@
-from .instructions import Instructions  # Add this import at the top of the file
+from .instructions import CPUHalted
 import threading
 
 class CPU:
     def __init__(self, emulator, instructions):
         self.emulator = emulator
         self.instructions = instructions
+        self.dispatch = instructions.dispatch
         self.reset()
 
     def reset(self):
@@ -16,6 +17,8 @@ class CPU:
         self.i = 0  # Index register
         self.stack = []
         self.sp = 0  # Stack pointer
+        self.key_wait_register = None  # Set while FX0A waits for a key
+        self.frame_wait = False  # Set by DXYN under the display wait quirk until the frame ends
 
     def fetch(self):
         # Fetch the instruction at the current PC
@@ -28,8 +31,43 @@ class CPU:
         self.instructions.execute(instruction)
 
     def step(self):
-        instruction = self.fetch()
-        self.execute(instruction)
+        if self.key_wait_register is not None or self.frame_wait:
+            return
+        # Fetch and dispatch inline: one table lookup and one handler call
+        memory = self.memory.memory
+        pc = self.pc
+        self.pc = pc + 2
+        handler, operands = self.dispatch[(memory[pc] << 8) | memory[pc + 1]]
+        try:
+            handler(self.instructions, *operands)
+        except CPUHalted:
+            pass
+
+    def run(self, count):
+        """Execute count instructions back to back and return how many ran.
+
+        While halted the CPU does nothing; the budget is spent idle, as the
+        original interpreter spent it looping on FX0A, so counts stay the same.
+        """
+        if self.key_wait_register is not None or self.frame_wait:
+            return count
+        memory = self.memory.memory
+        dispatch = self.dispatch
+        instructions = self.instructions
+        try:
+            for _ in range(count):
+                pc = self.pc
+                self.pc = pc + 2
+                handler, operands = dispatch[(memory[pc] << 8) | memory[pc + 1]]
+                handler(instructions, *operands)
+        except CPUHalted:
+            pass
+        return count
+
+    def wake(self, key):
+        """Complete a pending FX0A with key."""
+        self.v[self.key_wait_register] = key
+        self.key_wait_register = None
 
     def read_register(self, index):
         with self.lock:
@@ -1,21 +1,176 @@
+# Pixels of a byte, most significant bit first, for unpacking rows
+_BYTE_PIXELS = [tuple((byte >> (7 - bit)) & 1 for bit in range(8)) for byte in range(256)]
+
+
 class Display:
+    """Packed monochrome bit planes at 64x32, or SCHIP/XO-CHIP 128x64.
+
+    Each plane is one int per row, so a sprite row is one shift and one XOR
+    and scrolling moves whole rows, whatever the resolution. A pixel's colour
+    is its bit from plane 0 plus twice its bit from plane 1.
+    """
+
     WIDTH = 64
     HEIGHT = 32
+    HIRES_WIDTH = 128
+    HIRES_HEIGHT = 64
 
-    def __init__(self):
+    def __init__(self, planes=1):
+        self.width = self.WIDTH
+        self.height = self.HEIGHT
+        self.hires = False
+        # One int per row; bit width - 1 is the leftmost pixel. Lists are only
+        # ever updated in place, so rows stays an alias of the first plane
+        self.planes = [[0] * self.HEIGHT for _ in range(planes)]
+        self.rows = self.planes[0]
+        self.plane_mask = 1  # Planes that drawing, clearing and scrolling affect (XO-CHIP FN01)
+        self.selected = (0,)
+        # Bumped on every change; each row records the generation that last
+        # touched it so consumers can find what changed since they last looked
+        self.generation = 0
+        self.row_generations = [0] * self.HEIGHT
         self.reset()
 
     def reset(self):
-        self.clear()
+        self.select_planes(1)
+        self.set_resolution(False)
+
+    def set_resolution(self, hires):
+        """Switch between 64x32 and 128x64; the screen is cleared either way."""
+        self.hires = hires
+        self.width = self.HIRES_WIDTH if hires else self.WIDTH
+        self.height = self.HIRES_HEIGHT if hires else self.HEIGHT
+        for rows in self.planes:
+            rows[:] = [0] * self.height
+        self.touch_all()
+
+    def select_planes(self, mask):
+        self.plane_mask = mask
+        self.generation += 1  # Changes what the next draw does, though no pixel changed
+        self.selected = tuple(plane for plane in range(len(self.planes)) if mask >> plane & 1)
+
+    def touch_all(self):
+        self.generation += 1
+        self.row_generations[:] = [self.generation] * self.height
+        self.unpacked = None
 
     def clear(self):
-        """Clear the display, turning all pixels off."""
-        self.screen = [[0 for _ in range(self.WIDTH)] for _ in range(self.HEIGHT)]
+        """Clear the selected planes, turning their pixels off."""
+        for plane in self.selected:
+            self.planes[plane][:] = [0] * self.height
+        self.touch_all()
 
     def set_pixel(self, x, y):
-        self.screen[y][x] ^= 1
-        return self.screen[y][x] == 0
+        """XOR one pixel; returns True if it was turned off."""
+        bit = 1 << (self.width - 1 - x)
+        self.rows[y] ^= bit
+        self.generation += 1
+        self.row_generations[y] = self.generation
+        self.unpacked = None
+        return not self.rows[y] & bit
+
+    def draw_sprite(self, x, y, sprite, plane=0):
+        """XOR 8-pixel-wide sprite rows onto a plane at (x, y).
+
+        Each row is placed with one shift and XORed in one operation; pixels
+        past the right edge are shifted out, and callers clip the rows at the
+        bottom edge. Returns True if any lit pixel was turned off.
+        """
+        rows = self.planes[plane]
+        shift = self.width - 8 - x
+        collision = 0
+        for offset, sprite_byte in enumerate(sprite):
+            bits = sprite_byte << shift if shift >= 0 else sprite_byte >> -shift
+            row = rows[y + offset]
+            collision |= row & bits
+            rows[y + offset] = row ^ bits
+
+        self.generation += 1
+        self.row_generations[y:y + len(sprite)] = [self.generation] * len(sprite)
+        self.unpacked = None
+        return collision != 0
+
+    def draw_wide_sprite(self, x, y, sprite, plane=0):
+        """XOR a 16-pixel-wide sprite, two bytes per row, like draw_sprite."""
+        rows = self.planes[plane]
+        shift = self.width - 16 - x
+        collision = 0
+        height = len(sprite) // 2
+        for offset in range(height):
+            sprite_row = sprite[2 * offset] << 8 | sprite[2 * offset + 1]
+            bits = sprite_row << shift if shift >= 0 else sprite_row >> -shift
+            row = rows[y + offset]
+            collision |= row & bits
+            rows[y + offset] = row ^ bits
+
+        self.generation += 1
+        self.row_generations[y:y + height] = [self.generation] * height
+        self.unpacked = None
+        return collision != 0
+
+    def scroll_down(self, count):
+        for plane in self.selected:
+            rows = self.planes[plane]
+            rows[:] = [0] * count + rows[:self.height - count]
+        self.touch_all()
+
+    def scroll_up(self, count):
+        for plane in self.selected:
+            rows = self.planes[plane]
+            rows[:] = rows[count:] + [0] * count
+        self.touch_all()
+
+    def scroll_left(self, count):
+        mask = (1 << self.width) - 1
+        for plane in self.selected:
+            rows = self.planes[plane]
+            rows[:] = [row << count & mask for row in rows]
+        self.touch_all()
+
+    def scroll_right(self, count):
+        for plane in self.selected:
+            rows = self.planes[plane]
+            rows[:] = [row >> count for row in rows]
+        self.touch_all()
+
+    def dirty_rows(self, since):
+        """Half-open (top, bottom) range of rows changed after generation since.
+
+        Returns None when nothing changed.
+        """
+        changed = [y for y, generation in enumerate(self.row_generations) if generation > since]
+        if not changed:
+            return None
+        return changed[0], changed[-1] + 1
 
     def get_display(self):
-        """Return the current state of the display."""
-        return self.screen
+        """Return the current state of the display as height lists of width pixel colours."""
+        if self.unpacked is None:
+            byte_count = self.width // 8
+            self.unpacked = [
+                [pixel for byte in row.to_bytes(byte_count, "big") for pixel in _BYTE_PIXELS[byte]]
+                for row in self.rows
+            ]
+            if len(self.planes) > 1 and any(self.planes[1]):
+                for pixels, row in zip(self.unpacked, self.planes[1]):
+                    for x, byte in enumerate(row.to_bytes(byte_count, "big")):
+                        for bit, pixel in enumerate(_BYTE_PIXELS[byte]):
+                            pixels[8 * x + bit] |= pixel << 1
+        return self.unpacked
+
+    def snapshot(self):
+        """Resolution and a copy of the packed rows of every plane."""
+        return self.hires, tuple(tuple(rows) for rows in self.planes)
+
+    def restore(self, hires, planes):
+        """Overwrite the display from snapshot() values, marking every row changed."""
+        self.hires = hires
+        self.width = self.HIRES_WIDTH if hires else self.WIDTH
+        self.height = self.HIRES_HEIGHT if hires else self.HEIGHT
+        for rows, saved in zip(self.planes, planes):
+            rows[:] = saved
+        self.touch_all()
+
+    @property
+    def screen(self):
+        return self.get_display()
@@ -0,0 +1,186 @@
+"""Run many headless ROM sessions across all cores.
+
+Each worker process writes its session's framebuffer and register state
+straight into a shared-memory block, so the parent reads results without
+anything being pickled back. From the repository root:
+
+    python -m chip8.emulator.farm roms/*.ch8 --frames 600
+"""
+import argparse
+import glob
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .capture import composite, upscale
+from .chip8_emulator import Chip8Emulator
+from .display import Display
+from .input_source import ScriptedInput
+from .library import RomCache
+
+PENDING, DONE, FAILED = 0, 1, 2
+
+
+def result_dtype(height=Display.HEIGHT, width=Display.WIDTH):
+    """One record per session in the shared block; framebuffer pixels are colour indices."""
+    return np.dtype([
+        ("status", np.uint8),
+        ("framebuffer", np.uint8, (height, width)),
+        ("v", np.uint8, (16,)),
+        ("i", np.uint16),
+        ("pc", np.uint16),
+        ("delay_timer", np.uint8),
+        ("sound_timer", np.uint8),
+        ("instruction_count", np.uint64),
+        ("frame_count", np.uint32),
+        ("elapsed", np.float64),
+    ])
+
+
+RESULT_DTYPE = result_dtype()
+# Used when any session is SCHIP or XO-CHIP; 64x32 frames are scaled up 2x to fit
+HIRES_RESULT_DTYPE = result_dtype(Display.HIRES_HEIGHT, Display.HIRES_WIDTH)
+
+
+class Session:
+    """One ROM run: which ROM, for how long, with which seed and input script."""
+
+    def __init__(self, rom_path, frames, seed=None, input_script=None,
+                 instructions_per_second=2000, execution_mode="interpreter", platform="chip8"):
+        self.rom_path = rom_path
+        self.frames = frames
+        self.seed = seed
+        self.input_script = input_script
+        self.instructions_per_second = instructions_per_second
+        self.execution_mode = execution_mode
+        self.platform = platform
+
+
+class FarmRun:
+    """Results of RomFarm.run, backed by the shared-memory block.
+
+    records is a structured array with one RESULT_DTYPE row per session, in
+    session order, or HIRES_RESULT_DTYPE if any session is not plain CHIP-8. Close the run (or use it as a context manager) to release
+    the block; copy records first to keep them.
+    """
+
+    def __init__(self, block, count, dtype, errors, elapsed):
+        self.block = block
+        self.records = np.ndarray((count,), dtype=dtype, buffer=block.buf)
+        self.errors = errors  # session index -> error message
+        self.elapsed = elapsed
+
+    def instructions_per_second(self):
+        """Aggregate instructions/sec across every session."""
+        return float(self.records["instruction_count"].sum()) / self.elapsed if self.elapsed > 0 else 0.0
+
+    def close(self):
+        if self.block is not None:
+            del self.records
+            self.block.close()
+            self.block.unlink()
+            self.block = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class RomFarm:
+    """Spreads sessions over a pool of worker processes, one emulator at a time per worker."""
+
+    def __init__(self, processes=None):
+        self.processes = processes or multiprocessing.cpu_count()
+
+    def run(self, sessions):
+        sessions = list(sessions)
+        hires = any(session.platform != "chip8" for session in sessions)
+        dtype = HIRES_RESULT_DTYPE if hires else RESULT_DTYPE
+        block = shared_memory.SharedMemory(create=True, size=max(1, len(sessions)) * dtype.itemsize)
+        np.ndarray((len(sessions),), dtype=dtype, buffer=block.buf)[:] = np.zeros((), dtype=dtype)
+
+        errors = {}
+        start = time.perf_counter()
+        # Small chunks keep long and short ROMs balanced across workers
+        chunksize = max(1, len(sessions) // (self.processes * 8))
+        with multiprocessing.Pool(self.processes, initializer=_attach, initargs=(block.name, len(sessions), hires)) as pool:
+            for index, error in pool.imap_unordered(_run_session, enumerate(sessions), chunksize):
+                if error is not None:
+                    errors[index] = error
+        elapsed = time.perf_counter() - start
+        return FarmRun(block, len(sessions), dtype, errors, elapsed)
+
+
+# Per-worker view of the shared results, set up by _attach
+_block = None
+_records = None
+_roms = RomCache()  # Each worker reads a ROM from disk once, however many sessions use it
+
+
+def _attach(name, count, hires):
+    global _block, _records
+    _block = shared_memory.SharedMemory(name=name)
+    _records = np.ndarray((count,), dtype=HIRES_RESULT_DTYPE if hires else RESULT_DTYPE, buffer=_block.buf)
+
+
+def _run_session(task):
+    index, session = task
+    record = _records[index]
+    try:
+        input_source = ScriptedInput(session.input_script) if session.input_script else None
+        emulator = Chip8Emulator(session.instructions_per_second, execution_mode=session.execution_mode,
+                                 paced=False, input_source=input_source, seed=session.seed,
+                                 platform=session.platform)
+        emulator.load_rom(_roms.read(session.rom_path))
+
+        start = time.perf_counter()
+        emulator.run_frames(session.frames)
+        record["elapsed"] = time.perf_counter() - start
+
+        display = emulator.display
+        framebuffer = record["framebuffer"]
+        record["framebuffer"] = upscale(composite(display.planes, display.width), framebuffer.shape[1] // display.width)
+        record["v"] = emulator.cpu.v
+        record["i"] = emulator.cpu.i
+        record["pc"] = emulator.cpu.pc
+        record["delay_timer"] = emulator.timer.delay_timer
+        record["sound_timer"] = emulator.timer.sound_timer
+        record["instruction_count"] = emulator.instruction_count
+        record["frame_count"] = emulator.frame_count
+        record["status"] = DONE
+        return index, None
+    except Exception as error:
+        record["status"] = FAILED
+        return index, f"{type(error).__name__}: {error}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run CHIP-8 ROMs headless across all cores.")
+    parser.add_argument("roms", nargs="+", help="ROM paths or glob patterns")
+    parser.add_argument("--frames", type=int, default=600, help="60Hz frames per session")
+    parser.add_argument("--repeat", type=int, default=1, help="sessions per ROM, each with its own seed")
+    parser.add_argument("--processes", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--mode", choices=Chip8Emulator.EXECUTION_MODES, default="interpreter")
+    parser.add_argument("--platform", choices=Chip8Emulator.PLATFORMS, default="chip8")
+    args = parser.parse_args()
+
+    rom_paths = [path for pattern in args.roms for path in sorted(glob.glob(pattern)) or [pattern]]
+    sessions = [Session(path, args.frames, seed=seed, execution_mode=args.mode, platform=args.platform)
+                for path in rom_paths for seed in range(args.repeat)]
+
+    farm = RomFarm(args.processes)
+    with farm.run(sessions) as run:
+        for index, session in enumerate(sessions):
+            record = run.records[index]
+            status = "ok" if record["status"] == DONE else run.errors.get(index, "failed")
+            print(f"{session.rom_path} seed={session.seed}: {int(record['instruction_count'])} instructions, {status}")
+        print(f"{len(sessions)} sessions on {farm.processes} processes in {run.elapsed:.2f}s, "
+              f"{run.instructions_per_second():,.0f} instructions/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+from .display import Display
+
+
+class Frame:
+    """One completed display frame. Never modified once published."""
+
+    def __init__(self, sequence, frame_count, planes, row_sequences, width=Display.WIDTH):
+        self.sequence = sequence
+        self.frame_count = frame_count
+        self.planes = planes  # Packed rows of each bit plane, as in Display
+        self.rows = planes[0]
+        self.row_sequences = row_sequences  # Sequence of the frame that last changed each row
+        self.width = width
+        self.height = len(self.rows)
+
+    def dirty_rows(self, since):
+        """Half-open (top, bottom) range of rows changed after sequence since, or None."""
+        changed = [y for y, sequence in enumerate(self.row_sequences) if sequence > since]
+        if not changed:
+            return None
+        return changed[0], changed[-1] + 1
+
+
+class FrameBuffer:
+    """Hands completed frames from the emulator thread to readers on other threads.
+
+    The emulator publishes at the end of every frame and readers take
+    latest() whenever they like. Publishing builds a new immutable Frame and
+    swaps it in with one reference assignment, which is atomic, so neither
+    side takes a lock, the hot loop never waits for a reader, and a reader
+    holding a frame can never see it half-written. Sequence numbers keep
+    rising across resets, so readers can always tell which rows changed; a
+    change of resolution marks every row changed. Readers that need every
+    frame rather than the latest, such as a video capture, add a listener;
+    it is called with each frame as it is published.
+    """
+
+    def __init__(self):
+        self.listeners = []  # Called on the emulator thread; must not block
+        self.sequence = 0
+        self.row_sequences = [0] * Display.HEIGHT
+        self.latest_frame = Frame(0, 0, ((0,) * Display.HEIGHT,), tuple(self.row_sequences))
+
+    def publish(self, display, frame_count):
+        previous = self.latest_frame
+        self.sequence += 1
+        sequence = self.sequence
+        rows = tuple(display.rows)
+        planes = (rows,) if len(display.planes) == 1 else (rows,) + tuple(map(tuple, display.planes[1:]))
+        row_sequences = self.row_sequences
+        if display.width != previous.width or len(rows) != previous.height or len(planes) != len(previous.planes):
+            row_sequences[:] = [sequence] * len(rows)
+        else:
+            for plane, previous_rows in zip(planes, previous.planes):
+                for y, row in enumerate(plane):
+                    if row != previous_rows[y]:
+                        row_sequences[y] = sequence
+        self.latest_frame = frame = Frame(sequence, frame_count, planes, tuple(row_sequences), display.width)
+        for listener in self.listeners:
+            listener(frame)
+
+    def latest(self):
+        return self.latest_frame
@@ -0,0 +1,69 @@
+"""Run ROMs without a window, as fast as the host allows.
+
+Nothing here imports glfw, OpenGL or imgui, so it works on servers with no
+display. From the repository root:
+
+    python -m chip8.emulator.headless roms/trip8.ch8 --frames 600
+"""
+import argparse
+import hashlib
+import time
+
+from .chip8_emulator import Chip8Emulator
+from .quirks import PROFILES
+
+
+def run_headless(rom_path, frames=None, instructions=None, input_source=None,
+                 instructions_per_second=2000, execution_mode="interpreter", platform=None, quirks=None):
+    """Load a ROM into an unpaced emulator and run it for frames or instructions.
+
+    The platform and quirk profile come from the ROM database unless given.
+    Returns the emulator so callers can inspect its final state.
+    """
+    if (frames is None) == (instructions is None):
+        raise ValueError("Specify exactly one of frames or instructions")
+
+    emulator = Chip8Emulator(instructions_per_second, execution_mode=execution_mode,
+                             paced=False, input_source=input_source, platform=platform,
+                             quirks=quirks)
+    emulator.load_rom(rom_path)
+    if frames is not None:
+        emulator.run_frames(frames)
+    else:
+        emulator.run_instructions(instructions)
+    return emulator
+
+
+def display_hash(emulator):
+    """SHA-1 of the framebuffer, one byte per pixel."""
+    pixels = bytes(pixel for row in emulator.get_display() for pixel in row)
+    return hashlib.sha1(pixels).hexdigest()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a CHIP-8 ROM headless and unpaced.")
+    parser.add_argument("rom", help="path to a .ch8 ROM")
+    budget = parser.add_mutually_exclusive_group(required=True)
+    budget.add_argument("--frames", type=int, help="number of 60Hz frames to run")
+    budget.add_argument("--instructions", type=int, help="number of instructions to run")
+    parser.add_argument("--ips", type=int, default=2000, help="instructions per emulated second")
+    parser.add_argument("--mode", choices=Chip8Emulator.EXECUTION_MODES, default="interpreter")
+    parser.add_argument("--platform", choices=Chip8Emulator.PLATFORMS, help="default: from the ROM database")
+    parser.add_argument("--quirks", choices=sorted(PROFILES), help="default: from the ROM database")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    emulator = run_headless(args.rom, frames=args.frames, instructions=args.instructions,
+                            instructions_per_second=args.ips, execution_mode=args.mode, platform=args.platform,
+                            quirks=args.quirks)
+    elapsed = time.perf_counter() - start
+
+    print(f"instructions: {emulator.instruction_count}")
+    print(f"frames: {emulator.frame_count}")
+    print(f"platform: {emulator.platform}, quirks: {emulator.quirks.name}")
+    print(f"instructions/sec: {emulator.instruction_count / elapsed:,.0f}")
+    print(f"display sha1: {display_hash(emulator)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+class IdleLoopSkipper:
+    """Fast-forwards loops that provably repeat until the end of the frame.
+
+    Between frame boundaries nothing outside the machine changes: timers
+    tick and input is polled only when a frame starts. So if the machine is
+    in exactly the same state at two points of a frame, p instructions
+    apart, it will keep cycling with period p until the frame ends, and
+    whole periods can be skipped without changing anything observable. This
+    is what ROMs polling the delay timer in a FX07/3XNN/1NNN loop do.
+
+    States are compared at chunk boundaries. The signature holds the memory
+    write count and display generation rather than their contents, so a
+    loop that writes memory or draws is never treated as idle. Checking
+    costs time and splits translated blocks, so after a frame without a
+    repeat it backs off for a growing number of frames.
+    """
+
+    CHECKS_PER_FRAME = 32  # Signatures taken per frame, whatever the speed
+    MIN_CHUNK = 8
+    MAX_BACKOFF = 32  # Frames
+
+    def __init__(self, emulator):
+        self.emulator = emulator
+        self.skipped = 0  # Instructions fast-forwarded so far
+        self.backoff = 0
+        self.unchecked_frames = 0  # Frames left to run without checking
+
+    def signature(self):
+        emulator = self.emulator
+        cpu = emulator.cpu
+        timer = emulator.timer
+        return (cpu.pc, bytes(cpu.v), cpu.i, tuple(cpu.stack), cpu.key_wait_register,
+                emulator.memory.write_count, emulator.display.generation, emulator.rng.state,
+                timer.delay_timer, timer.sound_timer)
+
+    def run(self, count, execute):
+        """Run count instructions through execute(n), skipping repeated cycles."""
+        if self.unchecked_frames:
+            self.unchecked_frames -= 1
+            return execute(count)
+
+        chunk = max(self.MIN_CHUNK, count // self.CHECKS_PER_FRAME)
+        seen = {}
+        executed = 0
+        while executed < count:
+            signature = self.signature()
+            previous = seen.get(signature)
+            if previous is not None:
+                period = executed - previous
+                skip = (count - executed) // period * period
+                self.skipped += skip
+                executed += skip
+                # Less than one period is left; run it for real
+                execute(count - executed)
+                if skip * 2 >= count:
+                    self.backoff = 0
+                    return count
+                break
+            seen[signature] = executed
+            executed += execute(min(chunk, count - executed))
+
+        # Nothing worth skipping this frame
+        self.backoff = min(self.backoff * 2 or 1, self.MAX_BACKOFF)
+        self.unchecked_frames = self.backoff
+        return count
@@ -0,0 +1,54 @@
+from collections import deque
+
+
+class InputSource:
+    """Feeds keypad state into a running emulator.
+
+    The emulator calls poll() once at the start of every frame. Subclasses
+    update the keyboard from whatever drives them: a script, a socket, an
+    agent.
+    """
+
+    def poll(self, keyboard, frame):
+        pass
+
+
+class ScriptedInput(InputSource):
+    """Presses and releases keys at fixed frame numbers.
+
+    The script maps a frame number to a list of (key, pressed) pairs, e.g.
+    {0: [(0x5, True)], 10: [(0x5, False)]}.
+    """
+
+    def __init__(self, script):
+        self.script = script
+
+    def poll(self, keyboard, frame):
+        for key, pressed in self.script.get(frame, ()):
+            if pressed:
+                keyboard.key_down(key)
+            else:
+                keyboard.key_up(key)
+
+
+class LiveInput(InputSource):
+    """Queues key events from another thread, e.g. window callbacks.
+
+    Events take effect at the start of the next frame, so every change lands
+    on a frame boundary and a recording of them replays exactly.
+    """
+
+    def __init__(self):
+        self.events = deque()
+
+    def push(self, key, pressed):
+        self.events.append((key, pressed))
+
+    def poll(self, keyboard, frame):
+        events = self.events
+        while events:
+            key, pressed = events.popleft()
+            if pressed:
+                keyboard.key_down(key)
+            else:
+                keyboard.key_up(key)
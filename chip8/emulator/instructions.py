@@ -1,209 +1,576 @@
+class CPUHalted(Exception):
+    """Raised by a handler that puts the CPU into a wait state.
+
+    Execution loops catch it and spend the rest of their budget idle.
+    """
+
+
 class Instructions:
+    PLATFORMS = ("chip8", "schip", "xochip")
+
+    # Decode tables shared by every instance, one per platform and quirk
+    # profile: entry N holds the unbound handler for opcode N and its
+    # pre-extracted operands. Built lazily on first use.
+    _dispatch_tables = {}
+
     def __init__(self, emulator):
         self.emulator = emulator
-
-    def execute(self, opcode):
+        self.dispatch = self.get_dispatch_table(emulator.platform, emulator.quirks)
+        self.warned = set()  # Unknown opcodes already reported
+
+    def bind(self):
+        """Cache the emulator components the handlers operate on."""
+        self.cpu = self.emulator.cpu
+        self.memory = self.emulator.memory
+        self.display = self.emulator.display
+        self.timer = self.emulator.timer
+        self.keyboard = self.emulator.keyboard
+        self.rng = self.emulator.rng
+
+    @classmethod
+    def get_dispatch_table(cls, platform="chip8", quirks=None):
+        """The table for a platform, with the handlers a quirk profile changes swapped in."""
+        substitutions = cls.quirk_handlers(quirks) if quirks is not None else {}
+        key = (platform, quirks.name) if substitutions else platform
+        table = cls._dispatch_tables.get(key)
+        if table is None:
+            if substitutions:
+                table = tuple((substitutions.get(handler, handler), operands)
+                              for handler, operands in cls.get_dispatch_table(platform))
+            else:
+                if platform not in cls.PLATFORMS:
+                    raise ValueError(f"Unknown platform: {platform}")
+                table = tuple(cls.decode(opcode, platform) for opcode in range(0x10000))
+            cls._dispatch_tables[key] = table
+        return table
+
+    @classmethod
+    def quirk_handlers(cls, quirks):
+        """Map each handler a quirk profile changes to the variant that replaces it."""
+        substitutions = {}
+        if quirks.shift_vy:
+            substitutions[cls._shift_right] = cls._shift_right_vy
+            substitutions[cls._shift_left] = cls._shift_left_vy
+        if quirks.logic_resets_vf:
+            substitutions[cls._or_registers] = cls._or_registers_reset_vf
+            substitutions[cls._and_registers] = cls._and_registers_reset_vf
+            substitutions[cls._xor_registers] = cls._xor_registers_reset_vf
+        if quirks.index_increment == 0:
+            substitutions[cls._store_registers] = cls._store_registers_add_x
+            substitutions[cls._load_registers] = cls._load_registers_add_x
+        elif quirks.index_increment == 1:
+            substitutions[cls._store_registers] = cls._store_registers_advance
+            substitutions[cls._load_registers] = cls._load_registers_advance
+        if quirks.jump_vx:
+            substitutions[cls.jump_with_offset] = cls._jump_with_offset_vx
+        if quirks.display_wait:
+            substitutions[cls.draw] = cls._draw_and_wait
+            substitutions[cls._draw_extended] = cls._draw_extended_and_wait
+        return substitutions
+
+    @classmethod
+    def decode(cls, opcode, platform="chip8"):
+        """Return the (handler, operands) pair that implements an opcode on a platform."""
+        if platform != "chip8":
+            decoded = cls.decode_extended(opcode, platform == "xochip")
+            if decoded is not None:
+                return decoded
         x = (opcode & 0x0F00) >> 8
         y = (opcode & 0x00F0) >> 4
         n = opcode & 0x000F
         nn = opcode & 0x00FF
         nnn = opcode & 0x0FFF
 
-        instruction_map = {
-            0x0000: lambda: self._execute_0(opcode),  # Pass opcode to _execute_0
-            0x1000: lambda: self.jump(nnn),
-            0x2000: lambda: self.call_subroutine(nnn),
-            0x3000: lambda: self.skip_if_equal(x, nn),
-            0x4000: lambda: self.skip_if_not_equal(x, nn),
-            0x5000: lambda: self.skip_if_registers_equal(x, y),
-            0x6000: lambda: self.set_register(x, nn),
-            0x7000: lambda: self.add_to_register(x, nn),
-            0x8000: lambda: self.register_operations(x, y, n),
-            0x9000: lambda: self.skip_if_registers_not_equal(x, y),
-            0xA000: lambda: self.set_index_register(nnn),
-            0xB000: lambda: self.jump_with_offset(nnn),
-            0xC000: lambda: self.random(x, nn),
-            0xD000: lambda: self.draw(x, y, n),
-            0xE000: lambda: self.skip_if_key(x, nn),
-            0xF000: lambda: self.execute_f_instructions(x, nn),
+        family = opcode & 0xF000
+        if family == 0x0000:
+            if opcode == 0x00E0:
+                return cls.clear_screen, ()
+            if opcode == 0x00EE:
+                return cls.return_from_subroutine, ()
+            if opcode == 0x0000:
+                return cls._nop, ()
+            return cls._unknown_opcode, (opcode,)
+        if family == 0x1000:
+            return cls.jump, (nnn,)
+        if family == 0x2000:
+            return cls.call_subroutine, (nnn,)
+        if family == 0x3000:
+            return cls.skip_if_equal, (x, nn)
+        if family == 0x4000:
+            return cls.skip_if_not_equal, (x, nn)
+        if family == 0x5000:
+            return cls.skip_if_registers_equal, (x, y)
+        if family == 0x6000:
+            return cls.set_register, (x, nn)
+        if family == 0x7000:
+            return cls.add_to_register, (x, nn)
+        if family == 0x8000:
+            operations = {
+                0x0: cls._copy_register,
+                0x1: cls._or_registers,
+                0x2: cls._and_registers,
+                0x3: cls._xor_registers,
+                0x4: cls._add_with_carry,
+                0x5: cls._subtract_with_borrow,
+                0x6: cls._shift_right,
+                0x7: cls._subtract_from_with_borrow,
+                0xE: cls._shift_left,
+            }
+            if n in operations:
+                return operations[n], (x, y)
+            return cls._unknown_register_operation, (n,)
+        if family == 0x9000:
+            return cls.skip_if_registers_not_equal, (x, y)
+        if family == 0xA000:
+            return cls.set_index_register, (nnn,)
+        if family == 0xB000:
+            return cls.jump_with_offset, (nnn,)
+        if family == 0xC000:
+            return cls.random, (x, nn)
+        if family == 0xD000:
+            return cls.draw, (x, y, n)
+        if family == 0xE000:
+            if nn == 0x9E:
+                return cls.skip_if_key_pressed, (x,)
+            if nn == 0xA1:
+                return cls.skip_if_key_not_pressed, (x,)
+            return cls._unknown_key_operation, (nn,)
+
+        operations = {
+            0x07: cls._load_delay_timer,
+            0x0A: cls._wait_for_key_press,
+            0x15: cls._set_delay_timer,
+            0x18: cls._set_sound_timer,
+            0x1E: cls._add_to_index,
+            0x29: cls._set_index_to_sprite_location,
+            0x33: cls._store_bcd,
+            0x55: cls._store_registers,
+            0x65: cls._load_registers,
         }
+        if nn in operations:
+            return operations[nn], (x,)
+        return cls._unknown_f_operation, (nn,)
 
-        instruction = instruction_map.get(opcode & 0xF000)
-        if instruction:
-            instruction()
-        else:
-            print(f"Warning: Unknown opcode encountered: {opcode:04X}. Skipping.")
-            self.emulator.cpu.pc += 2  # Move to the next instruction
-
-    def _execute_0(self, opcode):
-        if opcode == 0x00E0:
-            self.clear_screen()
-        elif opcode == 0x00EE:
-            self.return_from_subroutine()
-        elif opcode == 0x0000:
-            # No operation (NOP)
-            print(f"Warning: NOP instruction (0x0000) encountered at PC: {self.emulator.cpu.pc:04X}")
-            pass
-        else:
-            print(f"Warning: Unknown 0x0000 opcode: {opcode:04X}. Skipping.")
-            self.emulator.cpu.pc += 2  # Move to the next instruction
+    @classmethod
+    def decode_extended(cls, opcode, xo):
+        """(handler, operands) for SCHIP opcodes, and XO-CHIP ones if xo; None for the rest."""
+        x = (opcode & 0x0F00) >> 8
+        y = (opcode & 0x00F0) >> 4
+        n = opcode & 0x000F
+        nn = opcode & 0x00FF
+
+        family = opcode & 0xF000
+        if family == 0x0000:
+            operations = {0x00FB: cls._scroll_right, 0x00FC: cls._scroll_left, 0x00FD: cls._exit,
+                          0x00FE: cls._low_resolution, 0x00FF: cls._high_resolution}
+            if opcode in operations:
+                return operations[opcode], ()
+            if opcode & 0xFFF0 == 0x00C0:
+                return cls._scroll_down, (n,)
+            if xo and opcode & 0xFFF0 == 0x00D0:
+                return cls._scroll_up, (n,)
+            return None
+        if family == 0xD000:
+            return cls._draw_extended, (x, y, n)
+        if not xo:
+            if family == 0xF000 and nn in (0x30, 0x75, 0x85):
+                return {0x30: cls._set_index_to_big_sprite, 0x75: cls._store_flags,
+                        0x85: cls._load_flags}[nn], (x,)
+            return None
+
+        # XO-CHIP: skips step over all four bytes of F000 NNNN
+        if family == 0x3000:
+            return cls._skip_if_equal_long, (x, nn)
+        if family == 0x4000:
+            return cls._skip_if_not_equal_long, (x, nn)
+        if family == 0x5000:
+            operations = {0x2: cls._store_register_range, 0x3: cls._load_register_range}
+            return operations.get(n, cls._skip_if_registers_equal_long), (x, y)
+        if family == 0x9000:
+            return cls._skip_if_registers_not_equal_long, (x, y)
+        if family == 0xE000 and nn in (0x9E, 0xA1):
+            return cls._skip_if_key_pressed_long if nn == 0x9E else cls._skip_if_key_not_pressed_long, (x,)
+        if family == 0xF000:
+            if opcode == 0xF000:
+                return cls._load_long_index, ()
+            if opcode == 0xF002:
+                return cls._load_audio_pattern, ()
+            operations = {
+                0x01: cls._select_planes,
+                0x1E: cls._add_to_long_index,
+                0x30: cls._set_index_to_big_sprite,
+                0x3A: cls._set_pitch,
+                0x75: cls._store_flags,
+                0x85: cls._load_flags,
+            }
+            if nn in operations:
+                return operations[nn], (x,)
+        return None
+
+    def execute(self, opcode):
+        handler, operands = self.dispatch[opcode]
+        handler(self, *operands)
+
+    def warn_once(self, opcode, message):
+        # A ROM spinning through a bad opcode would otherwise print every time
+        if opcode not in self.warned:
+            self.warned.add(opcode)
+            print(message)
+
+    def _nop(self):
+        self.warn_once(0x0000, f"Warning: NOP instruction (0x0000) encountered at PC: {self.cpu.pc:04X}")
+
+    def _unknown_opcode(self, opcode):
+        self.warn_once(opcode, f"Warning: Unknown 0x0000 opcode: {opcode:04X}. Skipping.")
+        self.cpu.pc += 2  # Move to the next instruction
+
+    def _unknown_register_operation(self, operation):
+        raise ValueError(f"Unknown register operation: {operation:X}")
+
+    def _unknown_key_operation(self, operation):
+        raise ValueError(f"Unknown key operation: {operation:X}")
+
+    def _unknown_f_operation(self, operation):
+        raise ValueError(f"Unknown F operation: {operation:X}")
 
     def clear_screen(self):
-        self.emulator.display.clear()
+        self.display.clear()
 
     def return_from_subroutine(self):
-        self.emulator.cpu.pc = self.emulator.cpu.stack.pop()
+        self.cpu.pc = self.cpu.stack.pop()
 
     def jump(self, address):
-        self.emulator.cpu.pc = address
+        self.cpu.pc = address
 
     def call_subroutine(self, address):
-        self.emulator.cpu.stack.append(self.emulator.cpu.pc)
-        self.emulator.cpu.pc = address
+        cpu = self.cpu
+        cpu.stack.append(cpu.pc)
+        cpu.pc = address
 
     def skip_if_equal(self, x, value):
-        if self.emulator.cpu.v[x] == value:
-            self.emulator.cpu.pc += 2
+        cpu = self.cpu
+        if cpu.v[x] == value:
+            cpu.pc += 2
 
     def skip_if_not_equal(self, x, value):
-        if self.emulator.cpu.v[x] != value:
-            self.emulator.cpu.pc += 2
+        cpu = self.cpu
+        if cpu.v[x] != value:
+            cpu.pc += 2
 
     def skip_if_registers_equal(self, x, y):
-        if self.emulator.cpu.v[x] == self.emulator.cpu.v[y]:
-            self.emulator.cpu.pc += 2
+        cpu = self.cpu
+        v = cpu.v
+        if v[x] == v[y]:
+            cpu.pc += 2
 
     def set_register(self, x, value):
-        self.emulator.cpu.v[x] = value
+        self.cpu.v[x] = value
 
     def add_to_register(self, x, value):
-        self.emulator.cpu.v[x] = (self.emulator.cpu.v[x] + value) & 0xFF
+        v = self.cpu.v
+        v[x] = (v[x] + value) & 0xFF
 
-    def register_operations(self, x, y, operation):
-        operations = {
-            0x0: lambda: self.set_register(x, self.emulator.cpu.v[y]),
-            0x1: lambda: self.set_register(x, self.emulator.cpu.v[x] | self.emulator.cpu.v[y]),
-            0x2: lambda: self.set_register(x, self.emulator.cpu.v[x] & self.emulator.cpu.v[y]),
-            0x3: lambda: self.set_register(x, self.emulator.cpu.v[x] ^ self.emulator.cpu.v[y]),
-            0x4: lambda: self._add_with_carry(x, y),
-            0x5: lambda: self._subtract_with_borrow(x, y),
-            0x6: lambda: self._shift_right(x),
-            0x7: lambda: self._subtract_from_with_borrow(x, y),
-            0xE: lambda: self._shift_left(x),
-        }
-        op = operations.get(operation)
-        if op:
-            op()
-        else:
-            raise ValueError(f"Unknown register operation: {operation:X}")
+    def _copy_register(self, x, y):
+        v = self.cpu.v
+        v[x] = v[y]
+
+    def _or_registers(self, x, y):
+        v = self.cpu.v
+        v[x] |= v[y]
+
+    def _and_registers(self, x, y):
+        v = self.cpu.v
+        v[x] &= v[y]
+
+    def _xor_registers(self, x, y):
+        v = self.cpu.v
+        v[x] ^= v[y]
 
     def _add_with_carry(self, x, y):
-        result = self.emulator.cpu.v[x] + self.emulator.cpu.v[y]
-        self.emulator.cpu.v[0xF] = 1 if result > 255 else 0
-        self.emulator.cpu.v[x] = result & 0xFF
+        v = self.cpu.v
+        result = v[x] + v[y]
+        v[0xF] = 1 if result > 255 else 0
+        v[x] = result & 0xFF
 
     def _subtract_with_borrow(self, x, y):
-        self.emulator.cpu.v[0xF] = 1 if self.emulator.cpu.v[x] >= self.emulator.cpu.v[y] else 0
-        self.emulator.cpu.v[x] = (self.emulator.cpu.v[x] - self.emulator.cpu.v[y]) & 0xFF
+        v = self.cpu.v
+        v[0xF] = 1 if v[x] >= v[y] else 0
+        v[x] = (v[x] - v[y]) & 0xFF
 
-    def _shift_right(self, x):
-        self.emulator.cpu.v[0xF] = self.emulator.cpu.v[x] & 0x1
-        self.emulator.cpu.v[x] >>= 1
+    def _shift_right(self, x, y):
+        v = self.cpu.v
+        v[0xF] = v[x] & 0x1
+        v[x] >>= 1
 
     def _subtract_from_with_borrow(self, x, y):
-        self.emulator.cpu.v[0xF] = 1 if self.emulator.cpu.v[y] >= self.emulator.cpu.v[x] else 0
-        self.emulator.cpu.v[x] = (self.emulator.cpu.v[y] - self.emulator.cpu.v[x]) & 0xFF
+        v = self.cpu.v
+        v[0xF] = 1 if v[y] >= v[x] else 0
+        v[x] = (v[y] - v[x]) & 0xFF
 
-    def _shift_left(self, x):
-        self.emulator.cpu.v[0xF] = (self.emulator.cpu.v[x] & 0x80) >> 7
-        self.emulator.cpu.v[x] = (self.emulator.cpu.v[x] << 1) & 0xFF
+    def _shift_left(self, x, y):
+        v = self.cpu.v
+        v[0xF] = (v[x] & 0x80) >> 7
+        v[x] = (v[x] << 1) & 0xFF
 
     def skip_if_registers_not_equal(self, x, y):
-        if self.emulator.cpu.v[x] != self.emulator.cpu.v[y]:
-            self.emulator.cpu.pc += 2
+        cpu = self.cpu
+        v = cpu.v
+        if v[x] != v[y]:
+            cpu.pc += 2
 
     def set_index_register(self, value):
-        self.emulator.cpu.i = value
+        self.cpu.i = value
 
     def jump_with_offset(self, address):
-        self.emulator.cpu.pc = address + self.emulator.cpu.v[0]
+        cpu = self.cpu
+        cpu.pc = address + cpu.v[0]
 
     def random(self, x, mask):
-        import random
-        self.emulator.cpu.v[x] = random.randint(0, 255) & mask
+        self.cpu.v[x] = self.rng.next_byte() & mask
 
     def draw(self, x, y, height):
-        x_coord = self.emulator.cpu.v[x] % self.emulator.display.WIDTH
-        y_coord = self.emulator.cpu.v[y] % self.emulator.display.HEIGHT
-        
-        self.emulator.cpu.v[0xF] = 0  # Reset collision flag
-        
-        for row in range(height):
-            if y_coord + row >= self.emulator.display.HEIGHT:
-                break
-            
-            sprite_byte = self.emulator.memory.read_byte(self.emulator.cpu.i + row)
-            
-            for col in range(8):
-                if x_coord + col >= self.emulator.display.WIDTH:
-                    break
-                
-                if sprite_byte & (0x80 >> col):
-                    if self.emulator.display.set_pixel(x_coord + col, y_coord + row):
-                        self.emulator.cpu.v[0xF] = 1  # Set collision flag
-
-    def skip_if_key(self, x, operation):
-        key = self.emulator.cpu.v[x]
-        if operation == 0x9E:
-            if self.emulator.keyboard.is_key_pressed(key):
-                self.emulator.cpu.pc += 2
-        elif operation == 0xA1:
-            if not self.emulator.keyboard.is_key_pressed(key):
-                self.emulator.cpu.pc += 2
-        else:
-            raise ValueError(f"Unknown key operation: {operation:X}")
+        cpu = self.cpu
+        display = self.display
+        v = cpu.v
+        x_coord = v[x] % display.WIDTH
+        y_coord = v[y] % display.HEIGHT
 
-    def execute_f_instructions(self, x, operation):
-        operations = {
-            0x07: lambda: self.set_register(x, self.emulator.timer.delay_timer),
-            0x0A: lambda: self._wait_for_key_press(x),
-            0x15: lambda: setattr(self.emulator.timer, 'delay_timer', self.emulator.cpu.v[x]),
-            0x18: lambda: setattr(self.emulator.timer, 'sound_timer', self.emulator.cpu.v[x]),
-            0x1E: lambda: self._add_to_index(x),
-            0x29: lambda: self._set_index_to_sprite_location(x),
-            0x33: lambda: self._store_bcd(x),
-            0x55: lambda: self._store_registers(x),
-            0x65: lambda: self._load_registers(x),
-        }
-        op = operations.get(operation)
-        if op:
-            op()
-        else:
-            raise ValueError(f"Unknown F operation: {operation:X}")
+        # Rows past the bottom edge are clipped; the display clips the right edge
+        sprite = self.memory.read_block(cpu.i, min(height, display.HEIGHT - y_coord))
+        v[0xF] = 1 if display.draw_sprite(x_coord, y_coord, sprite) else 0  # Collision flag
+
+    def skip_if_key_pressed(self, x):
+        cpu = self.cpu
+        if self.keyboard.is_key_pressed(cpu.v[x]):
+            cpu.pc += 2
+
+    def skip_if_key_not_pressed(self, x):
+        cpu = self.cpu
+        if not self.keyboard.is_key_pressed(cpu.v[x]):
+            cpu.pc += 2
+
+    def _load_delay_timer(self, x):
+        self.cpu.v[x] = self.timer.delay_timer
 
     def _wait_for_key_press(self, x):
-        key = self.emulator.keyboard.wait_for_key_press()
-        self.emulator.cpu.v[x] = key
+        cpu = self.cpu
+        cpu.key_wait_register = x
+        if not self.keyboard.wait_for_key(cpu.wake):
+            raise CPUHalted
+
+    def _set_delay_timer(self, x):
+        self.timer.delay_timer = self.cpu.v[x]
+
+    def _set_sound_timer(self, x):
+        self.timer.sound_timer = self.cpu.v[x]
 
     def _add_to_index(self, x):
-        self.emulator.cpu.i += self.emulator.cpu.v[x]
-        if self.emulator.cpu.i > 0xFFF:
-            self.emulator.cpu.v[0xF] = 1
-            self.emulator.cpu.i &= 0xFFF
+        cpu = self.cpu
+        cpu.i += cpu.v[x]
+        if cpu.i > 0xFFF:
+            cpu.v[0xF] = 1
+            cpu.i &= 0xFFF
 
     def _set_index_to_sprite_location(self, x):
-        self.emulator.cpu.i = self.emulator.cpu.v[x] * 5
+        self.cpu.i = self.memory.FONT_ADDRESS + (self.cpu.v[x] & 0xF) * 5
 
     def _store_bcd(self, x):
-        value = self.emulator.cpu.v[x]
-        self.emulator.memory.write_byte(self.emulator.cpu.i, value // 100)
-        self.emulator.memory.write_byte(self.emulator.cpu.i + 1, (value % 100) // 10)
-        self.emulator.memory.write_byte(self.emulator.cpu.i + 2, value % 10)
+        cpu = self.cpu
+        write_byte = self.memory.write_byte
+        value = cpu.v[x]
+        write_byte(cpu.i, value // 100)
+        write_byte(cpu.i + 1, (value % 100) // 10)
+        write_byte(cpu.i + 2, value % 10)
 
     def _store_registers(self, x):
-        for i in range(x + 1):
-            self.emulator.memory.write_byte(self.emulator.cpu.i + i, self.emulator.cpu.v[i])
+        cpu = self.cpu
+        self.memory.write_block(cpu.i, bytes(cpu.v[:x + 1]))
 
     def _load_registers(self, x):
-        for i in range(x + 1):
-            self.emulator.cpu.v[i] = self.emulator.memory.read_byte(self.emulator.cpu.i + i)
\ No newline at end of file
+        cpu = self.cpu
+        cpu.v[:x + 1] = self.memory.read_block(cpu.i, x + 1)
+
+    # Quirk variants, swapped in by quirk_handlers
+
+    def _shift_right_vy(self, x, y):
+        v = self.cpu.v
+        value = v[y]
+        v[0xF] = value & 0x1
+        v[x] = value >> 1
+
+    def _shift_left_vy(self, x, y):
+        v = self.cpu.v
+        value = v[y]
+        v[0xF] = (value & 0x80) >> 7
+        v[x] = (value << 1) & 0xFF
+
+    def _or_registers_reset_vf(self, x, y):
+        v = self.cpu.v
+        v[x] |= v[y]
+        v[0xF] = 0
+
+    def _and_registers_reset_vf(self, x, y):
+        v = self.cpu.v
+        v[x] &= v[y]
+        v[0xF] = 0
+
+    def _xor_registers_reset_vf(self, x, y):
+        v = self.cpu.v
+        v[x] ^= v[y]
+        v[0xF] = 0
+
+    def _store_registers_add_x(self, x):
+        self._store_registers(x)
+        self.cpu.i += x
+
+    def _load_registers_add_x(self, x):
+        self._load_registers(x)
+        self.cpu.i += x
+
+    def _store_registers_advance(self, x):
+        self._store_registers(x)
+        self.cpu.i += x + 1
+
+    def _load_registers_advance(self, x):
+        self._load_registers(x)
+        self.cpu.i += x + 1
+
+    def _jump_with_offset_vx(self, address):
+        cpu = self.cpu
+        cpu.pc = address + cpu.v[address >> 8]
+
+    def _draw_and_wait(self, x, y, height):
+        self.draw(x, y, height)
+        self._wait_for_frame()
+
+    def _draw_extended_and_wait(self, x, y, height):
+        self._draw_extended(x, y, height)
+        self._wait_for_frame()
+
+    def _wait_for_frame(self):
+        # The VIP drew during the vertical blank; halt until the frame ends
+        self.cpu.frame_wait = True
+        raise CPUHalted
+
+    # SCHIP
+
+    def _scroll_down(self, count):
+        self.display.scroll_down(count)
+
+    def _scroll_up(self, count):
+        self.display.scroll_up(count)
+
+    def _scroll_right(self):
+        self.display.scroll_right(4)
+
+    def _scroll_left(self):
+        self.display.scroll_left(4)
+
+    def _exit(self):
+        # Stay on this instruction; the idle skipper fast-forwards the loop
+        self.cpu.pc -= 2
+
+    def _low_resolution(self):
+        self.display.set_resolution(False)
+
+    def _high_resolution(self):
+        self.display.set_resolution(True)
+
+    def _draw_extended(self, x, y, height):
+        """DXYN on SCHIP and XO-CHIP: N = 0 draws a 16x16 sprite, and each
+        selected plane takes the next sprite's worth of bytes from I."""
+        cpu = self.cpu
+        display = self.display
+        v = cpu.v
+        x_coord = v[x] % display.width
+        y_coord = v[y] % display.height
+
+        if height == 0:
+            draw_sprite = display.draw_wide_sprite
+            size = 32
+            visible = 2 * min(16, display.height - y_coord)
+        else:
+            draw_sprite = display.draw_sprite
+            size = height
+            visible = min(height, display.height - y_coord)
+        address = cpu.i
+        collision = False
+        for plane in display.selected:
+            collision |= draw_sprite(x_coord, y_coord, self.memory.read_block(address, visible), plane)
+            address += size
+        v[0xF] = 1 if collision else 0
+
+    def _set_index_to_big_sprite(self, x):
+        self.cpu.i = self.memory.BIG_FONT_ADDRESS + (self.cpu.v[x] & 0xF) * 10
+
+    def _store_flags(self, x):
+        self.emulator.flags[:x + 1] = self.cpu.v[:x + 1]
+        self.memory.write_count += 1  # Persistent storage; the idle skipper must see it change
+
+    def _load_flags(self, x):
+        self.cpu.v[:x + 1] = self.emulator.flags[:x + 1]
+
+    # XO-CHIP
+
+    def _skip_next(self):
+        cpu = self.cpu
+        memory = self.memory.memory
+        pc = cpu.pc
+        cpu.pc = pc + (4 if memory[pc] == 0xF0 and memory[pc + 1] == 0x00 else 2)
+
+    def _skip_if_equal_long(self, x, value):
+        if self.cpu.v[x] == value:
+            self._skip_next()
+
+    def _skip_if_not_equal_long(self, x, value):
+        if self.cpu.v[x] != value:
+            self._skip_next()
+
+    def _skip_if_registers_equal_long(self, x, y):
+        v = self.cpu.v
+        if v[x] == v[y]:
+            self._skip_next()
+
+    def _skip_if_registers_not_equal_long(self, x, y):
+        v = self.cpu.v
+        if v[x] != v[y]:
+            self._skip_next()
+
+    def _skip_if_key_pressed_long(self, x):
+        if self.keyboard.is_key_pressed(self.cpu.v[x]):
+            self._skip_next()
+
+    def _skip_if_key_not_pressed_long(self, x):
+        if not self.keyboard.is_key_pressed(self.cpu.v[x]):
+            self._skip_next()
+
+    def _store_register_range(self, x, y):
+        cpu = self.cpu
+        registers = cpu.v[x:y + 1] if x <= y else cpu.v[y:x + 1][::-1]
+        self.memory.write_block(cpu.i, bytes(registers))
+
+    def _load_register_range(self, x, y):
+        cpu = self.cpu
+        if x <= y:
+            cpu.v[x:y + 1] = self.memory.read_block(cpu.i, y - x + 1)
+        else:
+            cpu.v[y:x + 1] = self.memory.read_block(cpu.i, x - y + 1)[::-1]
+
+    def _load_long_index(self):
+        cpu = self.cpu
+        memory = self.memory.memory
+        cpu.i = (memory[cpu.pc] << 8) | memory[cpu.pc + 1]
+        cpu.pc += 2
+
+    def _add_to_long_index(self, x):
+        cpu = self.cpu
+        cpu.i = (cpu.i + cpu.v[x]) & 0xFFFF
+
+    def _select_planes(self, mask):
+        self.display.select_planes(mask)
+
+    def _load_audio_pattern(self):
+        self.timer.pattern = bytes(self.memory.read_block(self.cpu.i, 16))
+
+    def _set_pitch(self, x):
+        self.timer.pitch = self.cpu.v[x]
@@ -0,0 +1,489 @@
+from array import array
+
+from .instructions import CPUHalted, Instructions
+from .memory import Memory
+
+
+class BlockTranslator:
+    """Translates runs of CHIP-8 code into cached Python functions.
+
+    A block starts at a PC and extends until an instruction that writes
+    memory or changes control flow in a way only known at run time. Static
+    jumps and calls are followed into their targets, and a return from a call
+    made inside the block continues after the call, so a block can be a trace
+    through several subroutines. Registers live in locals for the length of
+    the block and are written back when it exits or calls out to a handler.
+    A skip followed by a jump or a simple instruction stays inside the block as
+    an ``if``, so a block can exit early; each block function returns the
+    number of instructions it executed. On XO-CHIP a skip over the 4-byte
+    F000 NNNN is resolved when the block is translated.
+
+    Translation is lazy. Compiling a block costs about as much as a hundred
+    or so runs of it save, and at a few thousand instructions a second most
+    code never runs that often, so an address is interpreted until it has
+    been reached HOT_THRESHOLD times and only then translated.
+    """
+
+    MAX_BLOCK_LENGTH = 64
+    HOT_THRESHOLD = 512
+
+    def __init__(self, emulator):
+        self.emulator = emulator
+        self.cpu = emulator.cpu
+        self.memory = emulator.memory
+        self.instructions = emulator.instructions
+        self.blocks = {}  # start address -> (function, maximum instruction count, addresses read)
+        self.block_index = [None] * len(self.memory.memory)  # address -> start addresses covering it
+        self.heat = self.new_heat()  # address -> times reached without a block
+        self.memory.write_listener = self.code_written
+
+    def step(self):
+        """Run the block at the current PC and return how many instructions it executed."""
+        if self.cpu.key_wait_register is not None or self.cpu.frame_wait:
+            return 1
+        block = self.blocks.get(self.cpu.pc) or self.warm(self.cpu.pc)
+        if block is None:
+            self.cpu.step()
+            return 1
+        try:
+            return block[0]()
+        except CPUHalted:
+            return block[1]
+
+    def run(self, count):
+        """Execute exactly count instructions.
+
+        Cold code is stepped through the interpreter, and once the next block
+        might run past the budget the interpreter finishes it, so the machine
+        stops on the same instruction it would without translation. The tail
+        adds no heat; otherwise every address after a hot block start ends up
+        with a block of its own.
+        """
+        blocks = self.blocks
+        heat = self.heat
+        threshold = self.HOT_THRESHOLD
+        cpu = self.cpu
+        if cpu.key_wait_register is not None or cpu.frame_wait:
+            return count
+        memory = self.memory.memory
+        dispatch = cpu.dispatch
+        instructions = self.instructions
+        executed = 0
+        try:
+            while executed < count:
+                pc = cpu.pc
+                block = blocks.get(pc)
+                if block is None:
+                    heat[pc] += 1
+                    if heat[pc] >= threshold:
+                        block = self.translate(pc)
+                if block is not None:
+                    if block[1] > count - executed:
+                        cpu.run(count - executed)
+                        break
+                    executed += block[0]()
+                else:
+                    # One instruction, fetched and dispatched inline as in CPU.run
+                    cpu.pc = pc + 2
+                    handler, operands = dispatch[(memory[pc] << 8) | memory[pc + 1]]
+                    handler(instructions, *operands)
+                    executed += 1
+        except CPUHalted:
+            pass
+        # A halt spends the rest of the budget idle, as in the interpreter
+        return count
+
+    def warm(self, pc):
+        """Count a visit to an address without a block; translate it once it is hot."""
+        self.heat[pc] += 1
+        if self.heat[pc] < self.HOT_THRESHOLD:
+            return None
+        return self.translate(pc)
+
+    def new_heat(self):
+        # Counts stop at HOT_THRESHOLD, so 16 bits are enough and the array is quick to build
+        return array("H", bytes(2 * len(self.memory.memory)))
+
+    def code_written(self, address):
+        starts = self.block_index[address]
+        if starts:
+            for start in tuple(starts):
+                self.invalidate(start)
+
+    def invalidate(self, start):
+        block = self.blocks.pop(start, None)
+        if block is None:
+            return
+        self.heat[start] = 0  # Code that keeps being rewritten stays interpreted
+        for address in block[2]:
+            self.block_index[address].remove(start)
+
+    def invalidate_all(self):
+        self.blocks.clear()
+        self.block_index = [None] * len(self.memory.memory)
+        self.heat = self.new_heat()
+
+    def translate(self, start):
+        source, length, namespace, covered = _BlockBuilder(self, start).build()
+        code = compile(source, f"<chip8 block {start:03X}>", "exec")
+        exec(code, namespace)
+        block = (namespace["block"], length, tuple(covered))
+        self.blocks[start] = block
+
+        for address in block[2]:
+            if self.block_index[address] is None:
+                self.block_index[address] = []
+            self.block_index[address].append(start)
+        return block
+
+
+class _BlockBuilder:
+    SKIP_FAMILIES = (0x3000, 0x4000, 0x5000, 0x9000, 0xE000)
+    INLINE_REGISTER_OPERATIONS = (0x0, 0x1, 0x2, 0x3, 0x4, 0x5, 0x6, 0x7, 0xE)
+    INLINE_F_OPERATIONS = (0x07, 0x15, 0x18, 0x1E, 0x29, 0x65)
+
+    def __init__(self, translator, start):
+        self.start = start
+        self.memory = translator.memory.memory
+        self.instructions = translator.instructions
+        self.xo = translator.emulator.platform == "xochip"
+        self.quirks = translator.emulator.quirks
+        self.lines = []
+        self.indent = ""
+        self.loaded = set()
+        self.dirty = set()
+        self.index_loaded = False
+        self.index_dirty = False
+        self.executed = 0  # Instructions executed so far when no skip is taken
+        self.longest = 0  # Most instructions any exit of the block executes
+        self.covered = set()  # Addresses whose bytes the block was translated from
+        self.returns = []  # Return addresses of calls followed inside the block
+        self.skips = False
+        self.handlers = {}
+        self.namespace = {
+            "cpu": translator.cpu,
+            "instructions": self.instructions,
+            "memory": self.memory,
+            "timer": translator.emulator.timer,
+            "keyboard": translator.emulator.keyboard,
+            "display": translator.emulator.display,
+        }
+
+    def build(self):
+        address = self.start
+        while address is not None:
+            if self.executed >= BlockTranslator.MAX_BLOCK_LENGTH or address + 1 >= len(self.memory):
+                self.exit(address)
+                break
+            address = self.translate(self.opcode(address), address)
+
+        prologue = ["v = cpu.v"]
+        if self.skips:
+            prologue.append("skipped = 0")
+
+        # Bind everything the block touches as defaults so lookups are locals
+        params = ", ".join(f"{name}={name}" for name in self.namespace)
+        body = "\n".join("    " + line for line in prologue + self.lines)
+        return f"def block({params}):\n{body}\n", self.longest, self.namespace, self.covered
+
+    def opcode(self, address):
+        self.covered.update((address, address + 1))
+        return (self.memory[address] << 8) | self.memory[address + 1]
+
+    def can_follow(self, address):
+        """True if the block can carry on at a static target instead of exiting."""
+        return address not in self.covered and address + 1 < len(self.memory)
+
+    def emit(self, line):
+        self.lines.append(self.indent + line)
+
+    def reg(self, r):
+        """Name of the local holding Vr, loading it on first use."""
+        if r not in self.loaded:
+            self.emit(f"v{r:X} = v[{r}]")
+            self.loaded.add(r)
+        return f"v{r:X}"
+
+    def assign(self, r, expression):
+        self.emit(f"v{r:X} = {expression}")
+        self.loaded.add(r)
+        self.dirty.add(r)
+
+    def index(self):
+        if not self.index_loaded:
+            self.emit("i = cpu.i")
+            self.index_loaded = True
+        return "i"
+
+    def assign_index(self, expression):
+        self.emit(f"i = {expression}")
+        self.index_loaded = True
+        self.index_dirty = True
+
+    def write_back(self):
+        for r in sorted(self.dirty):
+            self.emit(f"v[{r}] = v{r:X}")
+        if self.index_dirty:
+            self.emit("cpu.i = i")
+
+    def flush(self):
+        self.write_back()
+        self.dirty.clear()
+        self.index_dirty = False
+
+    def executed_count(self, extra=0):
+        self.longest = max(self.longest, self.executed + extra)
+        count = str(self.executed + extra)
+        return f"{count} - skipped" if self.skips else count
+
+    def exit(self, pc, extra=0):
+        """Write back registers, set the PC and return from the block."""
+        self.write_back()
+        self.emit(f"cpu.pc = {pc}")
+        self.emit(f"return {self.executed_count(extra)}")
+
+    def handler(self, opcode):
+        handler, operands = self.instructions.dispatch[opcode]
+        name = self.handlers.get(handler)
+        if name is None:
+            name = f"h{len(self.handlers)}"
+            self.handlers[handler] = name
+            self.namespace[name] = handler
+        arguments = "".join(f", {operand}" for operand in operands)
+        return f"{name}(instructions{arguments})"
+
+    def call_out(self, opcode, clobbers):
+        """Run an opcode through its interpreter handler in the middle of a block."""
+        self.flush()
+        self.emit(self.handler(opcode))
+        self.loaded.difference_update(clobbers)
+
+    def terminate(self, opcode, address):
+        """End the block with an opcode run through its interpreter handler."""
+        self.flush()
+        self.executed += 1
+        self.emit(f"cpu.pc = {address + 2}")
+        self.emit(self.handler(opcode))
+        self.emit(f"return {self.executed_count()}")
+
+    def is_simple(self, opcode):
+        """True for opcodes translated inline without touching the PC or calling out."""
+        family = opcode & 0xF000
+        if family in (0x6000, 0x7000, 0xA000):
+            return True
+        if family == 0x8000:
+            return opcode & 0x000F in self.INLINE_REGISTER_OPERATIONS
+        if family == 0xF000:
+            return opcode & 0x00FF in self.INLINE_F_OPERATIONS
+        return False
+
+    def preload(self, opcode):
+        """Load everything a simple opcode touches so it can run inside a branch."""
+        x = (opcode & 0x0F00) >> 8
+        family = opcode & 0xF000
+        self.reg(x)
+        if family == 0x8000:
+            self.reg((opcode & 0x00F0) >> 4)
+            self.reg(0xF)
+        elif family == 0xA000:
+            self.index()
+        elif family == 0xF000:
+            self.reg(0xF)
+            self.index()
+            if opcode & 0x00FF == 0x65:
+                for r in range(x + 1):
+                    self.reg(r)
+
+    def skip_condition(self, opcode):
+        x = (opcode & 0x0F00) >> 8
+        y = (opcode & 0x00F0) >> 4
+        nn = opcode & 0x00FF
+        family = opcode & 0xF000
+        if family == 0x3000:
+            return f"{self.reg(x)} == {nn}"
+        if family == 0x4000:
+            return f"{self.reg(x)} != {nn}"
+        if family == 0x5000:
+            return f"{self.reg(x)} == {self.reg(y)}"
+        if family == 0x9000:
+            return f"{self.reg(x)} != {self.reg(y)}"
+        if nn == 0x9E:
+            return f"keyboard.is_key_pressed({self.reg(x)})"
+        if nn == 0xA1:
+            return f"not keyboard.is_key_pressed({self.reg(x)})"
+        return None
+
+    def translate_skip(self, opcode, address):
+        condition = None
+        if address + 3 < len(self.memory):
+            condition = self.skip_condition(opcode)
+        if condition is None:
+            self.terminate(opcode, address)
+            return None
+
+        self.executed += 1
+        following = self.opcode(address + 2)
+        if following & 0xF000 == 0x1000:
+            # Skip over a jump: leave the block unless the skip is taken
+            self.emit(f"if not ({condition}):")
+            self.indent = "    "
+            self.exit(following & 0x0FFF, extra=1)
+            self.indent = ""
+            return address + 4
+
+        if following & 0xF000 == 0x2000:
+            # Skip over a call: leave the block for the subroutine unless the skip is taken
+            self.emit(f"if not ({condition}):")
+            self.indent = "    "
+            self.emit(f"cpu.stack.append({address + 4})")
+            self.exit(following & 0x0FFF, extra=1)
+            self.indent = ""
+            return address + 4
+
+        if self.is_simple(following):
+            self.preload(following)
+            self.skips = True
+            self.emit(f"if {condition}:")
+            self.emit("    skipped += 1")
+            self.emit("else:")
+            self.indent = "    "
+            self.translate(following, address + 2)
+            self.indent = ""
+            return address + 4
+
+        skip_to = address + 6 if self.xo and following == 0xF000 else address + 4
+        self.flush()
+        self.emit(f"cpu.pc = {skip_to} if {condition} else {address + 2}")
+        self.emit(f"return {self.executed_count()}")
+        return None
+
+    def translate(self, opcode, address):
+        """Emit code for one opcode. Returns the next address, or None when it ends the block."""
+        x = (opcode & 0x0F00) >> 8
+        y = (opcode & 0x00F0) >> 4
+        n = opcode & 0x000F
+        nn = opcode & 0x00FF
+        nnn = opcode & 0x0FFF
+        family = opcode & 0xF000
+
+        if family in self.SKIP_FAMILIES and not (self.xo and opcode & 0xF00E == 0x5002):
+            return self.translate_skip(opcode, address)
+        if family == 0x1000:
+            self.executed += 1
+            if self.can_follow(nnn):
+                return nnn
+            self.exit(nnn)
+            return None
+        if family == 0x2000:
+            self.executed += 1
+            self.emit(f"cpu.stack.append({address + 2})")
+            if self.can_follow(nnn):
+                self.returns.append(address + 2)
+                return nnn
+            self.exit(nnn)
+            return None
+        if opcode == 0x00EE:
+            self.executed += 1
+            if self.returns and self.can_follow(self.returns[-1]):
+                self.emit("cpu.stack.pop()")
+                return self.returns.pop()
+            self.write_back()
+            self.emit("cpu.pc = cpu.stack.pop()")
+            self.emit(f"return {self.executed_count()}")
+            return None
+        if (family == 0x0000 and opcode != 0x00E0 or family == 0xB000
+                or family == 0x8000 and n not in self.INLINE_REGISTER_OPERATIONS
+                or family == 0xF000 and nn not in self.INLINE_F_OPERATIONS
+                or family == 0x5000
+                or family == 0xD000 and self.quirks.display_wait):
+            self.terminate(opcode, address)
+            return None
+
+        self.executed += 1
+        if family == 0x0000:
+            self.call_out(opcode, ())
+        elif family == 0x6000:
+            self.assign(x, nn)
+        elif family == 0x7000:
+            self.assign(x, f"({self.reg(x)} + {nn}) & 0xFF")
+        elif family == 0x8000:
+            self.translate_register_operation(x, y, n)
+        elif family == 0xA000:
+            self.assign_index(nnn)
+        elif family == 0xC000:
+            self.call_out(opcode, (x,))
+        elif family == 0xD000 and self.instructions.dispatch[opcode][0] is Instructions.draw:
+            self.translate_draw(x, y, n)
+        elif family == 0xD000:
+            self.call_out(opcode, (0xF,))
+        else:
+            self.translate_f_operation(x, nn)
+        return address + 2
+
+    def translate_draw(self, x, y, height):
+        """DXYN as Instructions.draw does it, without the call out."""
+        display = self.namespace["display"]
+        self.emit(f"t = {self.reg(y)} % {display.HEIGHT}")
+        self.emit(f"sprite = memory[{self.index()}:{self.index()} + min({height}, {display.HEIGHT} - t)]")
+        self.assign(0xF, f"1 if display.draw_sprite({self.reg(x)} % {display.WIDTH}, t, sprite) else 0")
+
+    def translate_register_operation(self, x, y, n):
+        vx, vy = self.reg(x), self.reg(y)
+        if n == 0x0:
+            self.assign(x, vy)
+        elif n in (0x1, 0x2, 0x3):
+            operator = {0x1: "|", 0x2: "&", 0x3: "^"}[n]
+            self.assign(x, f"{vx} {operator} {vy}")
+            if self.quirks.logic_resets_vf:
+                self.assign(0xF, "0")
+        elif n in (0x6, 0xE) and self.quirks.shift_vy:
+            self.emit(f"t = {vy}")
+            if n == 0x6:
+                self.assign(0xF, "t & 0x1")
+                self.assign(x, "t >> 1")
+            else:
+                self.assign(0xF, "(t & 0x80) >> 7")
+                self.assign(x, "(t << 1) & 0xFF")
+        elif n == 0x4:
+            self.emit(f"t = {vx} + {vy}")
+            self.assign(0xF, "1 if t > 255 else 0")
+            self.assign(x, "t & 0xFF")
+        elif n == 0x5:
+            self.assign(0xF, f"1 if {vx} >= {vy} else 0")
+            self.assign(x, f"({vx} - {vy}) & 0xFF")
+        elif n == 0x6:
+            self.assign(0xF, f"{vx} & 0x1")
+            self.assign(x, f"{vx} >> 1")
+        elif n == 0x7:
+            self.assign(0xF, f"1 if {vy} >= {vx} else 0")
+            self.assign(x, f"({vy} - {vx}) & 0xFF")
+        else:
+            self.assign(0xF, f"({vx} & 0x80) >> 7")
+            self.assign(x, f"({vx} << 1) & 0xFF")
+
+    def translate_f_operation(self, x, operation):
+        if operation == 0x07:
+            self.assign(x, "timer.delay_timer")
+        elif operation == 0x15:
+            self.emit(f"timer.delay_timer = {self.reg(x)}")
+        elif operation == 0x18:
+            self.emit(f"timer.sound_timer = {self.reg(x)}")
+        elif operation == 0x1E and self.xo:
+            self.assign_index(f"({self.index()} + {self.reg(x)}) & 0xFFFF")
+        elif operation == 0x1E:
+            vx = self.reg(x)
+            self.reg(0xF)
+            index = self.index()
+            self.assign_index(f"{index} + {vx}")
+            self.emit("if i > 0xFFF:")
+            self.emit("    vF = 1")
+            self.emit("    i &= 0xFFF")
+            self.dirty.add(0xF)
+        elif operation == 0x29:
+            self.assign_index(f"{Memory.FONT_ADDRESS} + ({self.reg(x)} & 0xF) * 5")
+        else:
+            index = self.index()
+            for r in range(x + 1):
+                self.assign(r, f"memory[{index} + {r}]")
+            if self.quirks.index_increment is not None:
+                self.assign_index(f"{index} + {x + self.quirks.index_increment}")
@@ -1,31 +1,59 @@
-import glfw
-
 class Keyboard:
-    def __init__(self):
+    """State of the 16-key CHIP-8 keypad.
+
+    Keys are addressed by their keypad value (0x0-0xF); mapping host keys onto
+    the keypad is left to the front end feeding this class.
+    """
+
+    WAIT_MODES = ("press", "release")
+
+    def __init__(self, wait_mode="press"):
+        if wait_mode not in self.WAIT_MODES:
+            raise ValueError(f"Unknown key wait mode: {wait_mode}")
+        # FX0A completes on a key press, or only once the key is released again
+        self.wait_mode = wait_mode
         self.reset()
 
     def reset(self):
-        self.key_map = {
-            glfw.KEY_1: 0x1, glfw.KEY_2: 0x2, glfw.KEY_3: 0x3, glfw.KEY_4: 0xC,
-            glfw.KEY_Q: 0x4, glfw.KEY_W: 0x5, glfw.KEY_E: 0x6, glfw.KEY_R: 0xD,
-            glfw.KEY_A: 0x7, glfw.KEY_S: 0x8, glfw.KEY_D: 0x9, glfw.KEY_F: 0xE,
-            glfw.KEY_Z: 0xA, glfw.KEY_X: 0x0, glfw.KEY_C: 0xB, glfw.KEY_V: 0xF
-        }
         self.keys = [False] * 16
+        self.wait_callback = None
 
     def key_down(self, key):
-        if key in self.key_map:
-            self.keys[self.key_map[key]] = True
+        self.keys[key] = True
+        if self.wait_callback is not None and self.wait_mode == "press":
+            self.end_wait(key)
 
     def key_up(self, key):
-        if key in self.key_map:
-            self.keys[self.key_map[key]] = False
+        was_pressed = self.keys[key]
+        self.keys[key] = False
+        if self.wait_callback is not None and self.wait_mode == "release" and was_pressed:
+            self.end_wait(key)
 
     def is_key_pressed(self, key):
         return self.keys[key]
 
-    def wait_for_key_press(self):
-        while True:
-            for i in range(16):
-                if self.keys[i]:
-                    return i
+    def wait_for_key(self, callback):
+        """Arrange for callback(key) to run on the next key event.
+
+        In press mode a key already held completes the wait at once; returns
+        True if callback has already run.
+        """
+        if self.wait_mode == "press":
+            key = self.pressed_key()
+            if key is not None:
+                callback(key)
+                return True
+        self.wait_callback = callback
+        return False
+
+    def end_wait(self, key):
+        callback = self.wait_callback
+        self.wait_callback = None
+        callback(key)
+
+    def pressed_key(self):
+        """Lowest keypad value currently held down, or None."""
+        for i in range(16):
+            if self.keys[i]:
+                return i
+        return None
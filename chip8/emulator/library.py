@@ -0,0 +1,255 @@
+"""An indexed ROM collection served from memory.
+
+RomLibrary walks a directory tree once and keeps a persistent index of the
+ROMs in it: SHA-1, size, title, and the platform and quirk profile they run
+with. The ROMs themselves are packed into one file next to the index, one
+copy per hash, and memory-mapped, so reading a ROM is a slice of the map
+rather than an open and a read. A rescan hashes only files whose size or
+modification time changed, and rewrites the pack only when the set of ROMs
+did. Call warm() once and later reads never reach the filesystem;
+load(emulator, key) loads a ROM with the platform and profile indexed for it.
+
+RomCache is the lighter option for ROMs outside a library: an LRU of file
+contents keyed by path.
+
+    python -m chip8.emulator.library roms
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+from collections import OrderedDict
+
+from .quirks import lookup, resolve
+
+VERSION = 1  # Bump when the index format changes so stale indexes are rebuilt
+DEFAULT_INDEX_DIR = os.path.join(os.path.expanduser("~"), ".cache", "chip8", "library")
+# File extensions scanned, and the platform each implies for ROMs the quirk database does not know
+ROM_EXTENSIONS = {".ch8": "chip8", ".c8": "chip8", ".sc8": "schip", ".xo8": "xochip"}
+
+
+class LibraryEntry:
+    """One ROM file in a library; path is relative to the library root, with / separators."""
+
+    def __init__(self, path, sha1, size, mtime, title, platform, quirks):
+        self.path = path
+        self.sha1 = sha1
+        self.size = size
+        self.mtime = mtime  # Nanoseconds; with size, decides whether a rescan hashes the file again
+        self.title = title
+        self.platform = platform
+        self.quirks = quirks
+
+    def to_dict(self):
+        return vars(self).copy()
+
+    @classmethod
+    def from_dict(cls, fields):
+        return cls(**fields)
+
+
+def describe(path, rom_hash):
+    """(title, platform, quirk profile) for a ROM, from the quirk database or its file name."""
+    entry = lookup(rom_hash)
+    if entry is not None:
+        return entry.title, entry.platform, entry.quirks
+    name, extension = os.path.splitext(os.path.basename(path))
+    platform, quirks = resolve(rom_hash, ROM_EXTENSIONS.get(extension.lower(), "chip8"))
+    return name.replace("_", " "), platform, quirks
+
+
+class RomCache:
+    """Least recently used ROM file contents, by path.
+
+    A path is read from disk once and then served from memory until it is
+    evicted, so later changes to the file are not seen.
+    """
+
+    def __init__(self, capacity=64):
+        self.capacity = capacity
+        self.roms = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def read(self, path):
+        rom = self.roms.get(path)
+        if rom is not None:
+            self.hits += 1
+            self.roms.move_to_end(path)
+            return rom
+        self.misses += 1
+        with open(path, "rb") as rom_file:
+            rom = rom_file.read()
+        self.roms[path] = rom
+        if len(self.roms) > self.capacity:
+            self.roms.popitem(last=False)
+        return rom
+
+
+class RomLibrary:
+    def __init__(self, root, index_dir=None):
+        """The index and pack live in index_dir, by default a per-root directory
+        under ~/.cache/chip8/library. Call scan() to pick up changes on disk."""
+        self.root = os.path.abspath(root)
+        if index_dir is None:
+            index_dir = os.path.join(DEFAULT_INDEX_DIR, hashlib.sha1(self.root.encode()).hexdigest()[:16])
+        self.index_dir = index_dir
+        self.index_path = os.path.join(index_dir, "index.json")
+        self.pack_path = os.path.join(index_dir, "pack.bin")
+        self.entries = {}  # path -> LibraryEntry
+        self.by_hash = {}  # SHA-1 -> LibraryEntry of the first path with that content
+        self.offsets = {}  # SHA-1 -> offset of the ROM in the pack
+        self.pack = None
+        self.load_index()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(sorted(self.entries.values(), key=lambda entry: entry.title.lower()))
+
+    def load_index(self):
+        """Read the saved index and map its pack; a missing or stale index leaves the library empty."""
+        try:
+            with open(self.index_path) as index_file:
+                fields = json.load(index_file)
+        except (OSError, ValueError):
+            return
+        if fields.get("version") != VERSION or fields.get("root") != self.root:
+            return
+        entries = {path: LibraryEntry.from_dict(entry) for path, entry in fields["entries"].items()}
+        offsets = fields["offsets"]
+        pack_size = sum(entry.size for entry in _unique(entries.values()))
+        if pack_size and (not os.path.exists(self.pack_path) or os.path.getsize(self.pack_path) != pack_size):
+            return
+        self.set_contents(entries, offsets)
+
+    def scan(self):
+        """Index the ROMs under root, hashing only new and changed files.
+
+        Saves the index, and rewrites the pack if the set of ROMs changed.
+        Returns the number of files hashed.
+        """
+        entries = {}
+        contents = {}  # SHA-1 -> bytes of ROMs that are not in the pack yet
+        hashed = 0
+        for directory, subdirectories, names in os.walk(self.root):
+            subdirectories.sort()
+            for name in sorted(names):
+                if os.path.splitext(name)[1].lower() not in ROM_EXTENSIONS:
+                    continue
+                full_path = os.path.join(directory, name)
+                path = os.path.relpath(full_path, self.root).replace(os.sep, "/")
+                stat = os.stat(full_path)
+                entry = self.entries.get(path)
+                if entry is None or entry.size != stat.st_size or entry.mtime != stat.st_mtime_ns:
+                    with open(full_path, "rb") as rom_file:
+                        rom = rom_file.read()
+                    rom_hash = hashlib.sha1(rom).hexdigest()
+                    hashed += 1
+                    if rom_hash not in self.offsets:
+                        contents[rom_hash] = rom
+                    entry = LibraryEntry(path, rom_hash, len(rom), stat.st_mtime_ns, *describe(path, rom_hash))
+                entries[path] = entry
+
+        offsets = self.offsets
+        if contents or {entry.sha1 for entry in entries.values()} != set(offsets):
+            offsets = self.write_pack(entries, contents)
+        self.set_contents(entries, offsets)
+        self.save_index()
+        return hashed
+
+    def write_pack(self, entries, contents):
+        """Write every unique ROM into a new pack; returns their offsets."""
+        os.makedirs(self.index_dir, exist_ok=True)
+        offsets = {}
+        temporary_path = self.pack_path + ".tmp"
+        with open(temporary_path, "wb") as pack_file:
+            for entry in _unique(entries.values()):
+                offsets[entry.sha1] = pack_file.tell()
+                rom = contents.get(entry.sha1)
+                pack_file.write(rom if rom is not None else self.read_hash(entry.sha1))
+        self.close()
+        os.replace(temporary_path, self.pack_path)
+        return offsets
+
+    def save_index(self):
+        os.makedirs(self.index_dir, exist_ok=True)
+        fields = {
+            "version": VERSION,
+            "root": self.root,
+            "entries": {path: entry.to_dict() for path, entry in self.entries.items()},
+            "offsets": self.offsets,
+        }
+        temporary_path = self.index_path + ".tmp"
+        with open(temporary_path, "w") as index_file:
+            json.dump(fields, index_file)
+        os.replace(temporary_path, self.index_path)
+
+    def set_contents(self, entries, offsets):
+        self.close()
+        self.entries = entries
+        self.by_hash = {entry.sha1: entry for entry in _unique(entries.values())}
+        self.offsets = offsets
+        if offsets:
+            with open(self.pack_path, "rb") as pack_file:
+                self.pack = mmap.mmap(pack_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self):
+        if self.pack is not None:
+            self.pack.close()
+            self.pack = None
+
+    def entry(self, key):
+        """The entry for a path relative to root or a SHA-1 hex digest, or None."""
+        return self.entries.get(key) or self.by_hash.get(key)
+
+    def read(self, key):
+        """Bytes of the ROM at a path relative to root, or with a SHA-1 hex digest."""
+        entry = self.entry(key)
+        if entry is None:
+            raise KeyError(f"No ROM {key} in {self.root}")
+        return self.read_hash(entry.sha1)
+
+    def load(self, emulator, key):
+        """Load a ROM into an emulator with the platform and quirk profile indexed for it."""
+        entry = self.entry(key)
+        if entry is None:
+            raise KeyError(f"No ROM {key} in {self.root}")
+        emulator.load_rom(self.read_hash(entry.sha1), entry.platform, entry.quirks)
+
+    def read_hash(self, rom_hash):
+        offset = self.offsets[rom_hash]
+        return self.pack[offset:offset + self.by_hash[rom_hash].size]
+
+    def warm(self):
+        """Touch every ROM once so later reads are served from memory."""
+        for rom_hash in self.offsets:
+            self.read_hash(rom_hash)
+
+
+def _unique(entries):
+    """The first entry, in path order, of each distinct ROM."""
+    seen = set()
+    for entry in sorted(entries, key=lambda entry: entry.path):
+        if entry.sha1 not in seen:
+            seen.add(entry.sha1)
+            yield entry
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index a directory of CHIP-8 ROMs.")
+    parser.add_argument("root", help="directory to scan, including subdirectories")
+    parser.add_argument("--index-dir", help="where to keep the index and pack")
+    args = parser.parse_args()
+
+    library = RomLibrary(args.root, args.index_dir)
+    hashed = library.scan()
+    for entry in library:
+        print(f"{entry.sha1[:12]}  {entry.size:6}  {entry.platform:7} {entry.quirks:7} {entry.title}  ({entry.path})")
+    print(f"{len(library)} ROMs, {hashed} hashed, index in {library.index_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,44 +1,108 @@
 class Memory:
-    def __init__(self):
+    SIZE = 4096
+    XO_SIZE = 0x10000  # XO-CHIP address space
+    FONT_ADDRESS = 0x50
+    BIG_FONT_ADDRESS = 0xA0
+    ROM_ADDRESS = 0x200
+
+    FONT_SET = bytes([
+        0xF0, 0x90, 0x90, 0x90, 0xF0,  # 0
+        0x20, 0x60, 0x20, 0x20, 0x70,  # 1
+        0xF0, 0x10, 0xF0, 0x80, 0xF0,  # 2
+        0xF0, 0x10, 0xF0, 0x10, 0xF0,  # 3
+        0x90, 0x90, 0xF0, 0x10, 0x10,  # 4
+        0xF0, 0x80, 0xF0, 0x10, 0xF0,  # 5
+        0xF0, 0x80, 0xF0, 0x90, 0xF0,  # 6
+        0xF0, 0x10, 0x20, 0x40, 0x40,  # 7
+        0xF0, 0x90, 0xF0, 0x90, 0xF0,  # 8
+        0xF0, 0x90, 0xF0, 0x10, 0xF0,  # 9
+        0xF0, 0x90, 0xF0, 0x90, 0x90,  # A
+        0xE0, 0x90, 0xE0, 0x90, 0xE0,  # B
+        0xF0, 0x80, 0x80, 0x80, 0xF0,  # C
+        0xE0, 0x90, 0x90, 0x90, 0xE0,  # D
+        0xF0, 0x80, 0xF0, 0x80, 0xF0,  # E
+        0xF0, 0x80, 0xF0, 0x80, 0x80   # F
+    ])
+
+    # SCHIP 8x10 digits for FX30; XO-CHIP adds A-F
+    BIG_FONT_SET = bytes([
+        0x3C, 0x7E, 0xE7, 0xC3, 0xC3, 0xC3, 0xC3, 0xE7, 0x7E, 0x3C,  # 0
+        0x18, 0x38, 0x58, 0x18, 0x18, 0x18, 0x18, 0x18, 0x18, 0x3C,  # 1
+        0x3E, 0x7F, 0xC3, 0x06, 0x0C, 0x18, 0x30, 0x60, 0xFF, 0xFF,  # 2
+        0x3C, 0x7E, 0xC3, 0x03, 0x0E, 0x0E, 0x03, 0xC3, 0x7E, 0x3C,  # 3
+        0x06, 0x0E, 0x1E, 0x36, 0x66, 0xC6, 0xFF, 0xFF, 0x06, 0x06,  # 4
+        0xFF, 0xFF, 0xC0, 0xC0, 0xFC, 0xFE, 0x03, 0xC3, 0x7E, 0x3C,  # 5
+        0x3E, 0x7C, 0xE0, 0xC0, 0xFC, 0xFE, 0xC3, 0xC3, 0x7E, 0x3C,  # 6
+        0xFF, 0xFF, 0x03, 0x06, 0x0C, 0x18, 0x30, 0x60, 0x60, 0x60,  # 7
+        0x3C, 0x7E, 0xC3, 0xC3, 0x7E, 0x7E, 0xC3, 0xC3, 0x7E, 0x3C,  # 8
+        0x3C, 0x7E, 0xC3, 0xC3, 0x7F, 0x3F, 0x03, 0x03, 0x3E, 0x7C,  # 9
+        0x7E, 0xFF, 0xC3, 0xC3, 0xC3, 0xFF, 0xFF, 0xC3, 0xC3, 0xC3,  # A
+        0xFC, 0xFC, 0xC3, 0xC3, 0xFC, 0xFC, 0xC3, 0xC3, 0xFC, 0xFC,  # B
+        0x3C, 0xFF, 0xC3, 0xC0, 0xC0, 0xC0, 0xC0, 0xC3, 0xFF, 0x3C,  # C
+        0xFC, 0xFE, 0xC3, 0xC3, 0xC3, 0xC3, 0xC3, 0xC3, 0xFE, 0xFC,  # D
+        0xFF, 0xFF, 0xC0, 0xC0, 0xFF, 0xFF, 0xC0, 0xC0, 0xFF, 0xFF,  # E
+        0xFF, 0xFF, 0xC0, 0xC0, 0xFF, 0xFF, 0xC0, 0xC0, 0xC0, 0xC0   # F
+    ])
+
+    # Power-on contents: zeroes with the font sets in place
+    FONTS = bytes(FONT_ADDRESS) + FONT_SET + BIG_FONT_SET
+    INITIAL = FONTS + bytes(SIZE - len(FONTS))
+    _initial = {SIZE: INITIAL}  # By address space size
+
+    def __init__(self, size=SIZE):
+        self.size = size
+        # The buffer is allocated once; reset and loads overwrite it in place so
+        # views handed out (and code that cached them) stay valid
+        self.memory = bytearray(size)
+        self.view = memoryview(self.memory)
+        self.write_listener = None  # Called with the address of every write, e.g. to invalidate translated code
+        self.write_count = 0  # Bumped by every program write, so callers can tell memory changed
         self.reset()
 
     def reset(self):
-        self.memory = [0] * 4096
-        self.load_font_set()
+        initial = self._initial.get(self.size)
+        if initial is None:
+            initial = self._initial[self.size] = self.FONTS + bytes(self.size - len(self.FONTS))
+        self.view[:] = initial
 
     def load_font_set(self):
-        # Define the complete font set
-        font_set = [
-            0xF0, 0x90, 0x90, 0x90, 0xF0,  # 0
-            0x20, 0x60, 0x20, 0x20, 0x70,  # 1
-            0xF0, 0x10, 0xF0, 0x80, 0xF0,  # 2
-            0xF0, 0x10, 0xF0, 0x10, 0xF0,  # 3
-            0x90, 0x90, 0xF0, 0x10, 0x10,  # 4
-            0xF0, 0x80, 0xF0, 0x10, 0xF0,  # 5
-            0xF0, 0x80, 0xF0, 0x90, 0xF0,  # 6
-            0xF0, 0x10, 0x20, 0x40, 0x40,  # 7
-            0xF0, 0x90, 0xF0, 0x90, 0xF0,  # 8
-            0xF0, 0x90, 0xF0, 0x10, 0xF0,  # 9
-            0xF0, 0x90, 0xF0, 0x90, 0x90,  # A
-            0xE0, 0x90, 0xE0, 0x90, 0xE0,  # B
-            0xF0, 0x80, 0x80, 0x80, 0xF0,  # C
-            0xE0, 0x90, 0x90, 0x90, 0xE0,  # D
-            0xF0, 0x80, 0xF0, 0x80, 0xF0,  # E
-            0xF0, 0x80, 0xF0, 0x80, 0x80   # F
-        ]
-        
-        # Load the font set into memory starting at address 0x50
-        for i, byte in enumerate(font_set):
-            self.memory[0x50 + i] = byte
+        self.view[self.FONT_ADDRESS:len(self.FONTS)] = self.FONT_SET + self.BIG_FONT_SET
 
     def load_rom(self, rom_data):
         # Load the ROM into memory starting at address 0x200
-        for i, byte in enumerate(rom_data):
-            self.memory[0x200 + i] = byte
+        if len(rom_data) > self.size - self.ROM_ADDRESS:
+            raise ValueError("ROM is too large to fit in memory")
+        self.view[self.ROM_ADDRESS:self.ROM_ADDRESS + len(rom_data)] = rom_data
 
     def read_byte(self, address):
         return self.memory[address]
 
     def write_byte(self, address, value):
         self.memory[address] = value & 0xFF  # Ensure value is a byte
+        self.write_count += 1
+        if self.write_listener is not None:
+            self.write_listener(address)
+
+    def read_block(self, address, length):
+        """Zero-copy view of length bytes starting at address."""
+        return self.view[address:address + length]
+
+    def write_block(self, address, data):
+        """Copy a bytes-like block into memory starting at address."""
+        self.view[address:address + len(data)] = data
+        self.write_count += 1
+        if self.write_listener is not None:
+            for offset in range(len(data)):
+                self.write_listener(address + offset)
+
+    def get_view(self):
+        """Read-only, zero-copy view of the whole address space."""
+        return self.view.toreadonly()
+
+    def snapshot(self):
+        """Copy of the whole address space as immutable bytes."""
+        return bytes(self.memory)
 
+    def restore(self, snapshot):
+        """Overwrite the whole address space from a snapshot()."""
+        self.view[:] = snapshot
@@ -0,0 +1,163 @@
+import heapq
+import json
+import time
+from collections import deque
+
+from .instructions import Instructions
+
+
+class Profiler:
+    """Counts and times every instruction while enabled.
+
+    Enabling swaps the CPU's dispatch table for one whose entries wrap each
+    handler, and runs JIT emulators through the interpreter; disabling puts
+    the plain table back. A disabled profiler therefore costs nothing per
+    instruction: the CPU loop itself never checks for it.
+    """
+
+    FRAME_HISTORY = 600
+
+    def __init__(self, emulator):
+        self.emulator = emulator
+        self.enabled = False
+        self.jit = None
+        self.clear()
+
+    def clear(self):
+        self.handler_counts = {}  # handler name -> executions
+        self.handler_seconds = {}  # handler name -> time spent in the handler
+        self.pc_counts = [0] * self.emulator.memory.size
+        self.frames = deque(maxlen=self.FRAME_HISTORY)
+        self.frame_draws = 0
+        self.frame_collisions = 0
+        if self.enabled:
+            self.install()  # The wrappers hold the old counters
+
+    def enable(self):
+        if not self.enabled:
+            self.enabled = True
+            self.emulator.profiler = self
+            self.install()
+
+    def disable(self):
+        if self.enabled:
+            self.enabled = False
+            emulator = self.emulator
+            emulator.profiler = None
+            emulator.cpu.dispatch = emulator.instructions.dispatch = Instructions.get_dispatch_table(
+                emulator.platform, emulator.quirks)
+            if self.jit is not None:
+                # A ROM load, quirk switch or state load while profiling
+                # skipped the stashed translator, so its blocks may be stale
+                self.jit.invalidate_all()
+            emulator.jit = self.jit
+            self.jit = None
+
+    def install(self):
+        """Swap the instrumented table in; the emulator calls this again after a reset."""
+        emulator = self.emulator
+        # Translated blocks bypass the table, so the JIT sits out until disable()
+        if emulator.jit is not None:
+            self.jit = emulator.jit
+            emulator.jit = None
+        if len(self.pc_counts) != emulator.memory.size:
+            # A reset can switch platform, and XO-CHIP addresses 64 KB
+            self.pc_counts = [0] * emulator.memory.size
+        wrappers = {}
+        table = []
+        for handler, operands in Instructions.get_dispatch_table(emulator.platform, emulator.quirks):
+            wrapper = wrappers.get(handler)
+            if wrapper is None:
+                wrapper = wrappers[handler] = self.wrap(handler)
+            table.append((wrapper, operands))
+        emulator.cpu.dispatch = emulator.instructions.dispatch = tuple(table)
+
+    def wrap(self, handler):
+        name = handler.__name__.lstrip("_")
+        self.handler_counts.setdefault(name, 0)
+        self.handler_seconds.setdefault(name, 0.0)
+        counts = self.handler_counts
+        seconds = self.handler_seconds
+        pc_counts = self.pc_counts
+        address_mask = len(pc_counts) - 1
+        perf_counter = time.perf_counter
+
+        if handler in (Instructions.draw, Instructions._draw_extended,
+                       Instructions._draw_and_wait, Instructions._draw_extended_and_wait):
+            def profiled(instructions, *operands):
+                cpu = instructions.cpu
+                pc_counts[(cpu.pc - 2) & address_mask] += 1
+                counts[name] += 1
+                start = perf_counter()
+                try:
+                    handler(instructions, *operands)
+                finally:
+                    # The display wait variants always leave by raising CPUHalted
+                    seconds[name] += perf_counter() - start
+                    self.frame_draws += 1
+                    self.frame_collisions += cpu.v[0xF]
+            return profiled
+
+        def profiled(instructions, *operands):
+            # The CPU has already moved the PC past this instruction
+            pc_counts[(instructions.cpu.pc - 2) & address_mask] += 1
+            counts[name] += 1
+            start = perf_counter()
+            try:
+                handler(instructions, *operands)
+            finally:
+                seconds[name] += perf_counter() - start  # FX0A leaves by raising CPUHalted
+        return profiled
+
+    def end_frame(self, instructions, busy_seconds):
+        """Called by the scheduler after each frame."""
+        self.frames.append({
+            "frame": self.emulator.frame_count,
+            "instructions": instructions,
+            "busy_ms": busy_seconds * 1000,
+            "draws": self.frame_draws,
+            "collisions": self.frame_collisions,
+        })
+        self.frame_draws = 0
+        self.frame_collisions = 0
+
+    def hot_pcs(self, count=20):
+        """The count most executed addresses as (pc, executions) pairs."""
+        executed = ((pc, n) for pc, n in enumerate(self.pc_counts) if n)
+        return heapq.nlargest(count, executed, key=lambda entry: entry[1])
+
+    def heatmap(self, width=64):
+        """Executions per address, as rows of width addresses covering memory."""
+        return [self.pc_counts[row:row + width] for row in range(0, len(self.pc_counts), width)]
+
+    def report(self, top=20):
+        stats = self.emulator.get_stats()
+        handlers = [
+            {
+                "handler": name,
+                "count": count,
+                "total_ms": self.handler_seconds[name] * 1000,
+                "mean_ns": self.handler_seconds[name] / count * 1e9,
+            }
+            for name, count in list(self.handler_counts.items()) if count
+        ]
+        handlers.sort(key=lambda entry: entry["total_ms"], reverse=True)
+        frames = list(self.frames)
+        return {
+            "enabled": self.enabled,
+            "instructions": sum(self.handler_counts.values()),
+            "requested_ips": stats["requested_ips"],
+            "achieved_ips": stats["achieved_ips"],
+            "handlers": handlers,
+            "hot_pcs": [{"pc": f"0x{pc:03X}", "count": count} for pc, count in self.hot_pcs(top)],
+            "draws_per_frame": sum(frame["draws"] for frame in frames) / len(frames) if frames else 0.0,
+            "collisions_per_frame": sum(frame["collisions"] for frame in frames) / len(frames) if frames else 0.0,
+            "frames": frames,
+        }
+
+    def dump(self, path):
+        """Write the report, plus every executed address, as JSON."""
+        report = self.report()
+        report["pc_counts"] = {f"0x{pc:03X}": n for pc, n in enumerate(self.pc_counts) if n}
+        with open(path, "w") as profile_file:
+            json.dump(report, profile_file, indent=2)
@@ -0,0 +1,110 @@
+"""Quirk profiles, and the ROM database that picks one for each ROM.
+
+Interpreters disagree about a handful of opcodes, and a ROM only runs right
+under the behaviour it was written for:
+
+    shift_vy         8XY6/8XYE shift VY into VX, rather than VX in place
+    index_increment  FX55/FX65 leave I at I + X + index_increment; None leaves I alone
+    jump_vx          BXNN jumps to XNN + VX, rather than NNN + V0
+    logic_resets_vf  8XY1/8XY2/8XY3 clear VF
+    display_wait     DXYN waits for the end of the frame, so a frame draws at most one sprite
+
+A profile is applied once, when the dispatch table is built, by swapping in
+quirk variants of the affected handlers (Instructions.quirk_handlers). No
+instruction checks a quirk while it runs.
+
+The database maps a ROM's SHA-1 to its title, platform and profile. It ships
+with entries for the bundled ROMs; load_database adds more from a JSON file
+of {"<sha1>": {"title": ..., "platform": ..., "quirks": ...}}.
+"""
+from .instructions import Instructions
+
+
+class Quirks:
+    def __init__(self, name, title, shift_vy=False, index_increment=None, jump_vx=False,
+                 logic_resets_vf=False, display_wait=False):
+        self.name = name
+        self.title = title
+        self.shift_vy = shift_vy
+        self.index_increment = index_increment
+        self.jump_vx = jump_vx
+        self.logic_resets_vf = logic_resets_vf
+        self.display_wait = display_wait
+
+    def __repr__(self):
+        return f"Quirks({self.name!r})"
+
+
+PROFILES = {quirks.name: quirks for quirks in (
+    # What this emulator always did; unknown CHIP-8 ROMs keep running as before
+    Quirks("legacy", "SCHIP-style shifts and loads, VIP-style jumps"),
+    Quirks("vip", "COSMAC VIP", shift_vy=True, index_increment=1, logic_resets_vf=True, display_wait=True),
+    Quirks("chip48", "CHIP-48", index_increment=0, jump_vx=True),
+    Quirks("schip", "SUPER-CHIP 1.1", jump_vx=True),
+    Quirks("xochip", "XO-CHIP", shift_vy=True, index_increment=1),
+)}
+
+# Profile for ROMs the database does not know
+PLATFORM_PROFILES = {"chip8": "legacy", "schip": "schip", "xochip": "xochip"}
+
+
+class RomEntry:
+    def __init__(self, title, platform="chip8", quirks=None):
+        if platform not in Instructions.PLATFORMS:
+            raise ValueError(f"Unknown platform: {platform}")
+        if quirks is not None and quirks not in PROFILES:
+            raise ValueError(f"Unknown quirk profile: {quirks}")
+        self.title = title
+        self.platform = platform
+        self.quirks = quirks or PLATFORM_PROFILES[platform]
+
+    def to_dict(self):
+        return {"title": self.title, "platform": self.platform, "quirks": self.quirks}
+
+
+ROM_DATABASE = {
+    "1ba58656810b67fd131eb9af3e3987863bf26c90": RomEntry("IBM Logo"),
+    "a0073e944d5ae9ca14324543fdf818907de80449": RomEntry("Sierpinski", quirks="schip"),
+    "d92c71b955b7634370571bd707715cf8bb0e2fb4": RomEntry("CHIP-8 Logo"),
+    "a82ca5c53e1dcedfab4f65efef02229145771b7d": RomEntry("CHIP-8 Picture"),
+    "016345d75eef34448840845a9590d41e6bfdf46a": RomEntry("Clock"),
+    "8b70080adbac44513ec60005734a816372b845ec": RomEntry("Maze"),
+    "7a4a89870f2ab23c28024dd1c3dd52cf1af1ad00": RomEntry("Octopeg", platform="schip", quirks="legacy"),
+    "507e7dc6783565071dfe4b72154af431d4466958": RomEntry("Particles"),
+    "0085dd8fce4f7ac2e39ba73cf67cc043f9ba4812": RomEntry("Stars", quirks="schip"),
+    "032408f1f1d8e6058ecf0f23f421783c87701b39": RomEntry("Trip8 Demo"),
+}
+
+
+def lookup(rom_hash):
+    """The database entry for a ROM's SHA-1 hex digest, or None."""
+    return ROM_DATABASE.get(rom_hash)
+
+
+def resolve(rom_hash, platform=None, quirks=None):
+    """(platform, profile name) to run a ROM with.
+
+    Explicit choices win, then the database entry, then the platform's
+    default profile.
+    """
+    entry = lookup(rom_hash)
+    if platform is None:
+        platform = entry.platform if entry is not None else "chip8"
+    if quirks is None:
+        if entry is not None and entry.platform == platform:
+            quirks = entry.quirks
+        else:
+            quirks = PLATFORM_PROFILES[platform]
+    return platform, quirks
+
+
+def load_database(path):
+    """Add the entries of a JSON database file; returns how many were read."""
+    import json  # Only databases need it, and it is a third of the core's import time
+
+    with open(path) as file:
+        entries = json.load(file)
+    for rom_hash, fields in entries.items():
+        ROM_DATABASE[rom_hash.lower()] = RomEntry(fields.get("title", rom_hash), fields.get("platform", "chip8"),
+                                                  fields.get("quirks"))
+    return len(entries)
@@ -0,0 +1,152 @@
+"""Record keypad input and replay it bit for bit.
+
+Runs depend only on the ROM, the seed, the instructions per second and the
+keypad events, so a recording of those, with any speed changes made along
+the way, replays headless and unpaced to the same framebuffer. Recordings store the final framebuffer hash, which makes
+them golden outputs for regression runs. From the repository root:
+
+    python -m chip8.emulator.recording roms/trip8.ch8 trip8.replay.json
+"""
+import argparse
+import json
+import sys
+import time
+
+from .chip8_emulator import Chip8Emulator
+from .headless import display_hash
+from .input_source import InputSource
+
+
+class Recording:
+    """Everything needed to reproduce a session.
+
+    events are (instruction count, key, pressed) triples, in order.
+    instructions_per_second is the speed at the start; speed_changes are
+    (instruction count, instructions per second) pairs, in order.
+    """
+
+    def __init__(self, rom_hash, seed, instructions_per_second, events,
+                 instruction_count, frame_count, display_hash, platform="chip8", quirks=None,
+                 speed_changes=None):
+        self.rom_hash = rom_hash
+        self.seed = seed
+        self.instructions_per_second = instructions_per_second
+        self.events = events
+        self.instruction_count = instruction_count
+        self.frame_count = frame_count
+        self.display_hash = display_hash
+        self.platform = platform
+        self.quirks = quirks  # Profile name; None for recordings that predate quirk profiles
+        self.speed_changes = speed_changes or []
+
+    def save(self, path):
+        with open(path, "w") as recording_file:
+            json.dump(vars(self), recording_file)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as recording_file:
+            fields = json.load(recording_file)
+        fields["events"] = [tuple(event) for event in fields["events"]]
+        fields["speed_changes"] = [tuple(change) for change in fields.get("speed_changes", [])]
+        return cls(**fields)
+
+
+class InputRecorder(InputSource):
+    """Wraps an input source and logs every keypad change it makes.
+
+    Changes are stamped with the emulator's instruction count, which is exact
+    because input sources only run at frame boundaries. Speed changes are
+    logged the same way: they are applied between frames too, so the next
+    poll sees them before the frame's budget is worked out. Start recording
+    right after loading a ROM so the session can be replayed from reset.
+    """
+
+    def __init__(self, emulator, source):
+        self.emulator = emulator
+        self.source = source
+        self.events = []
+        self.instructions_per_second = emulator.instructions_per_second  # At the start
+        self.speed = self.instructions_per_second
+        self.speed_changes = []
+
+    def poll(self, keyboard, frame):
+        if self.emulator.instructions_per_second != self.speed:
+            self.speed = self.emulator.instructions_per_second
+            self.speed_changes.append((self.emulator.instruction_count, self.speed))
+        before = list(keyboard.keys)
+        self.source.poll(keyboard, frame)
+        for key, (was_pressed, pressed) in enumerate(zip(before, keyboard.keys)):
+            if pressed != was_pressed:
+                self.events.append((self.emulator.instruction_count, key, pressed))
+
+    def recording(self):
+        emulator = self.emulator
+        return Recording(emulator.rom_hash, emulator.seed, self.instructions_per_second,
+                         list(self.events), emulator.instruction_count, emulator.frame_count,
+                         display_hash(emulator), emulator.platform, emulator.quirks.name,
+                         list(self.speed_changes))
+
+
+class ReplayInput(InputSource):
+    """Applies recorded events and speed changes once the emulator reaches their instruction count."""
+
+    def __init__(self, emulator, events, speed_changes=()):
+        self.emulator = emulator
+        self.events = events
+        self.position = 0
+        self.speed_changes = speed_changes
+        self.speed_position = 0
+
+    def poll(self, keyboard, frame):
+        events = self.events
+        count = self.emulator.instruction_count
+        while self.speed_position < len(self.speed_changes) and self.speed_changes[self.speed_position][0] <= count:
+            self.emulator.set_instructions_per_second(self.speed_changes[self.speed_position][1])
+            self.speed_position += 1
+        while self.position < len(events) and events[self.position][0] <= count:
+            _, key, pressed = events[self.position]
+            if pressed:
+                keyboard.key_down(key)
+            else:
+                keyboard.key_up(key)
+            self.position += 1
+
+
+def replay(recording, rom_path, execution_mode="interpreter"):
+    """Replay a recording headless and unpaced; returns the emulator."""
+    emulator = Chip8Emulator(recording.instructions_per_second, execution_mode=execution_mode,
+                             paced=False, seed=recording.seed, platform=recording.platform,
+                             quirks=recording.quirks)
+    emulator.load_rom(rom_path)
+    if emulator.rom_hash != recording.rom_hash:
+        raise ValueError(f"{rom_path} is not the ROM this session was recorded with")
+    emulator.input_source = ReplayInput(emulator, recording.events, recording.speed_changes)
+    emulator.run_frames(recording.frame_count)
+    return emulator
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recordings and check their framebuffer hashes.")
+    parser.add_argument("rom", help="path to the .ch8 ROM the recordings were made with")
+    parser.add_argument("recordings", nargs="+", help="recording files")
+    parser.add_argument("--mode", choices=Chip8Emulator.EXECUTION_MODES, default="interpreter")
+    args = parser.parse_args()
+
+    failures = 0
+    for path in args.recordings:
+        recording = Recording.load(path)
+        start = time.perf_counter()
+        emulator = replay(recording, args.rom, args.mode)
+        elapsed = time.perf_counter() - start
+
+        matches = (display_hash(emulator) == recording.display_hash
+                   and emulator.instruction_count == recording.instruction_count)
+        failures += not matches
+        print(f"{path}: {'ok' if matches else 'MISMATCH'} "
+              f"({recording.frame_count} frames in {elapsed:.2f}s)")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
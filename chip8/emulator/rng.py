@@ -0,0 +1,28 @@
+import os
+
+
+class Rng:
+    """Seeded xorshift32 generator behind CXNN.
+
+    Each emulator owns one, so runs are reproducible from their seed, and the
+    whole state is one 32-bit int that save states can carry.
+    """
+
+    def __init__(self, seed):
+        self.seed(seed)
+
+    def seed(self, seed):
+        # Xorshift never leaves the all-zero state, so map a zero seed elsewhere
+        self.state = seed & 0xFFFFFFFF or 0x9E3779B9
+
+    def next_byte(self):
+        x = self.state
+        x ^= (x << 13) & 0xFFFFFFFF
+        x ^= x >> 17
+        x ^= (x << 5) & 0xFFFFFFFF
+        self.state = x
+        return x >> 24
+
+    @staticmethod
+    def random_seed():
+        return int.from_bytes(os.urandom(4), "little")
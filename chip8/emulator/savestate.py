@@ -0,0 +1,190 @@
+"""Binary save states and per-frame rewind.
+
+A save state is a fixed-size header (registers, stack, timers, keypad, key
+wait, random state, counters, display mode and SCHIP/XO-CHIP extras), then
+the packed display planes and the whole address space. Each part is one
+struct call or one copy, a few microseconds per state. The layout depends
+only on the platform, so every state of an emulator has the same size.
+"""
+import struct
+import zlib
+from collections import deque
+
+from .display import Display
+
+MAGIC = b"C8SS"
+VERSION = 4
+STACK_DEPTH = 64
+WORD_MASK = (1 << 64) - 1
+
+# magic, version, platform, pc, i, delay timer, sound timer, instruction
+# count, frame count, instruction remainder, keypad bits, random state, FX0A
+# register (0xFF when not waiting), stack depth, V0-VF, stack slots, hires,
+# plane mask, pitch, flags, audio pattern
+HEADER = struct.Struct(f"<4sB8sHHBBQQHHIBB16s{STACK_DEPTH}HBBB16s16s")
+_display_structs = {}  # platform -> struct of the display planes
+
+
+def _display_layout(platform):
+    """(64-bit words per row, rows per plane, planes) stored for a platform."""
+    if platform == "chip8":
+        return 1, Display.HEIGHT, 1
+    # Always room for 128x64, so a resolution change keeps the size
+    return 2, Display.HIRES_HEIGHT, 2 if platform == "xochip" else 1
+
+
+def _display_struct(platform):
+    layout = _display_structs.get(platform)
+    if layout is None:
+        words, height, planes = _display_layout(platform)
+        layout = _display_structs[platform] = struct.Struct(f"<{words * height * planes}Q")
+    return layout
+
+
+def save_state(emulator):
+    """Serialize the full machine state to bytes."""
+    cpu = emulator.cpu
+    stack = cpu.stack
+    if len(stack) > STACK_DEPTH:
+        raise ValueError(f"Stack deeper than {STACK_DEPTH} entries cannot be saved")
+    keys = 0
+    for key, pressed in enumerate(emulator.keyboard.keys):
+        if pressed:
+            keys |= 1 << key
+    display = emulator.display
+    timer = emulator.timer
+    header = HEADER.pack(
+        MAGIC, VERSION, emulator.platform.encode(), cpu.pc, cpu.i,
+        timer.delay_timer, timer.sound_timer,
+        emulator.instruction_count, emulator.frame_count,
+        emulator.scheduler.instruction_remainder, keys, emulator.rng.state,
+        0xFF if cpu.key_wait_register is None else cpu.key_wait_register, len(stack),
+        bytes(cpu.v), *stack, *[0] * (STACK_DEPTH - len(stack)),
+        display.hires, display.plane_mask, timer.pitch, bytes(emulator.flags), timer.pattern,
+    )
+    words, height, _ = _display_layout(emulator.platform)
+    if words == 1:
+        rows = display.rows
+    else:
+        rows = []
+        for plane in display.planes:
+            for row in plane:
+                rows += (row >> 64, row & WORD_MASK)
+            rows += [0] * (2 * (height - len(plane)))
+    return b"".join((header, _display_struct(emulator.platform).pack(*rows), emulator.memory.memory))
+
+
+def load_state(emulator, state):
+    """Restore the machine from save_state() bytes."""
+    if len(state) < HEADER.size or state[:4] != MAGIC:
+        raise ValueError("Not a CHIP-8 save state")
+    fields = HEADER.unpack_from(state)
+    if fields[1] != VERSION:
+        raise ValueError(f"Unsupported save state version: {fields[1]}")
+    platform = fields[2].rstrip(b"\0").decode()
+    if platform != emulator.platform:
+        raise ValueError(f"Save state is for {platform}, not {emulator.platform}")
+    display_struct = _display_struct(platform)
+    memory_start = HEADER.size + display_struct.size
+    if len(state) != memory_start + len(emulator.memory.memory):
+        raise ValueError("Not a CHIP-8 save state")
+
+    (_, _, _, pc, i, delay_timer, sound_timer, instruction_count, frame_count,
+     instruction_remainder, keys, rng_state, key_wait_register, depth, v) = fields[:15]
+    stack = fields[15:15 + STACK_DEPTH]
+    hires, plane_mask, pitch, flags, pattern = fields[15 + STACK_DEPTH:]
+
+    words, height, plane_count = _display_layout(platform)
+    values = display_struct.unpack_from(state, HEADER.size)
+    visible = Display.HIRES_HEIGHT if hires else Display.HEIGHT
+    planes = []
+    for plane in range(plane_count):
+        start = plane * words * height
+        if words == 1:
+            planes.append(values[start:start + visible])
+        else:
+            planes.append([values[start + 2 * y] << 64 | values[start + 2 * y + 1] for y in range(visible)])
+
+    # Restore in place: the JIT and the UI hold references to these objects
+    cpu = emulator.cpu
+    cpu.pc = pc
+    cpu.i = i
+    cpu.v[:] = v
+    cpu.stack[:] = stack[:depth]
+    emulator.memory.restore(memoryview(state)[memory_start:])
+    emulator.display.restore(bool(hires), planes)
+    emulator.display.select_planes(plane_mask)
+    emulator.flags[:] = flags
+    timer = emulator.timer
+    timer.delay_timer = delay_timer
+    timer.sound_timer = sound_timer
+    timer.pitch = pitch
+    timer.pattern = pattern
+    emulator.keyboard.keys[:] = [bool(keys >> key & 1) for key in range(16)]
+    if key_wait_register == 0xFF:
+        cpu.key_wait_register = None
+        emulator.keyboard.wait_callback = None
+    else:
+        cpu.key_wait_register = key_wait_register
+        emulator.keyboard.wait_callback = cpu.wake
+    emulator.scheduler.instruction_remainder = instruction_remainder
+    emulator.rng.state = rng_state
+    emulator.instruction_count = instruction_count
+    emulator.frame_count = frame_count
+    if emulator.jit is not None:
+        emulator.jit.invalidate_all()
+
+
+def _xor(a, b):
+    return (int.from_bytes(a, "little") ^ int.from_bytes(b, "little")).to_bytes(len(a), "little")
+
+
+class RewindBuffer:
+    """Ring buffer of per-frame save states for rewinding.
+
+    Only the newest state is kept whole. Each older frame is stored as the
+    compressed XOR of itself against the frame after it, which is mostly
+    zeroes and shrinks to a few dozen bytes; stepping back applies those
+    deltas newest first. When the buffer is full the oldest delta drops off.
+    """
+
+    def __init__(self, emulator, capacity=600):
+        self.emulator = emulator
+        self.capacity = capacity
+        self.deltas = deque(maxlen=capacity)
+        self.latest = None
+
+    def __len__(self):
+        """Number of frames that can be rewound."""
+        return len(self.deltas)
+
+    def record(self):
+        """Snapshot the current frame."""
+        state = save_state(self.emulator)
+        if self.latest is not None:
+            self.deltas.append(zlib.compress(_xor(state, self.latest), 1))
+        self.latest = state
+
+    def rewind(self, frames=1):
+        """Step back up to frames recorded frames and restore that state.
+
+        rewind(0) returns to the newest recorded frame. Returns the number of
+        frames actually rewound.
+        """
+        if self.latest is None:
+            return 0
+        frames = min(frames, len(self.deltas))
+        state = self.latest
+        for _ in range(frames):
+            state = _xor(state, zlib.decompress(self.deltas.pop()))
+        self.latest = state
+        load_state(self.emulator, state)
+        return frames
+
+    def clear(self):
+        self.deltas.clear()
+        self.latest = None
+
+    def memory_usage(self):
+        """Bytes held by the buffered states."""
+        return sum(len(delta) for delta in self.deltas) + (len(self.latest) if self.latest else 0)
@@ -0,0 +1,110 @@
+import time
+from collections import deque
+
+
+class FrameScheduler:
+    """Runs the emulator in 60Hz frames.
+
+    Each frame executes instructions_per_second / 60 instructions in one batch,
+    ticks the timers once and, when paced, sleeps once until the next frame
+    deadline. Deadlines advance by a fixed period from the previous deadline
+    rather than from when the sleep returned, so oversleeping in one frame is
+    made up in the next instead of accumulating as drift.
+    """
+
+    FRAME_RATE = 60
+    MAX_LAG_FRAMES = 5  # Beyond this the schedule is reset instead of caught up
+    STATS_WINDOW = 120
+
+    def __init__(self, emulator, paced=True):
+        self.emulator = emulator
+        self.paced = paced
+        self.frame_period = 1 / self.FRAME_RATE
+        self.instruction_remainder = 0
+        self.next_deadline = None
+        self.late_frames = 0
+        # (frame start time, busy seconds, instructions) for recent frames
+        self.history = deque(maxlen=self.STATS_WINDOW)
+
+    def instructions_for_frame(self):
+        # Carry the remainder so rates not divisible by 60 average out exactly
+        self.instruction_remainder += self.emulator.instructions_per_second
+        count, self.instruction_remainder = divmod(self.instruction_remainder, self.FRAME_RATE)
+        return count
+
+    def run_frame(self):
+        emulator = self.emulator
+        start = time.perf_counter()
+
+        emulator.run_commands()
+        if emulator.input_source is not None:
+            emulator.input_source.poll(emulator.keyboard, emulator.frame_count)
+        executed = emulator.run_instructions(self.instructions_for_frame())
+        emulator.cpu.frame_wait = False  # A display wait lasts until the frame ends
+        if emulator.audio is not None:
+            # Before the tick, so a sound timer of 1 still beeps for this frame
+            emulator.audio.end_frame()
+        emulator.timer.tick()
+        emulator.frame_count += 1
+        emulator.frame_buffer.publish(emulator.display, emulator.frame_count)
+        if emulator.rewind_buffer is not None:
+            emulator.rewind_buffer.record()
+
+        end = time.perf_counter()
+        self.history.append((start, end - start, executed))
+        if emulator.profiler is not None:
+            emulator.profiler.end_frame(executed, end - start)
+        if self.paced:
+            self.wait_for_next_frame(end)
+
+    def run(self, should_stop):
+        """Run frames until should_stop() returns True."""
+        while not should_stop():
+            self.run_frame()
+
+    def wait_for_next_frame(self, now):
+        if self.next_deadline is None:
+            self.next_deadline = now
+        self.next_deadline += self.frame_period
+
+        delay = self.next_deadline - now
+        if delay > 0:
+            time.sleep(delay)
+        elif delay < -self.MAX_LAG_FRAMES * self.frame_period:
+            # Too far behind to catch up without a burst of frames; start over
+            self.late_frames += 1
+            self.next_deadline = now
+
+    def stats(self):
+        """Achieved rate and frame-time figures over the recent frame window."""
+        requested = self.emulator.instructions_per_second
+        stats = {
+            "frames": self.emulator.frame_count,
+            "requested_ips": requested,
+            "achieved_ips": 0.0,
+            "frame_rate": 0.0,
+            "busy_ms_mean": 0.0,
+            "busy_ms_max": 0.0,
+            "interval_ms_mean": 0.0,
+            "interval_ms_max": 0.0,
+            "late_frames": self.late_frames,
+        }
+        # The emulator thread appends while other threads call this; work from one copy
+        history = list(self.history)
+        if len(history) < 2:
+            return stats
+
+        starts = [start for start, _, _ in history]
+        busy = [seconds for _, seconds, _ in history]
+        intervals = [later - earlier for earlier, later in zip(starts, starts[1:])]
+        elapsed = starts[-1] - starts[0]
+        # Instructions of the last frame ran after the final start time
+        instructions = sum(count for _, _, count in history[:-1])
+
+        stats["achieved_ips"] = instructions / elapsed if elapsed > 0 else 0.0
+        stats["frame_rate"] = len(intervals) / elapsed if elapsed > 0 else 0.0
+        stats["busy_ms_mean"] = sum(busy) / len(busy) * 1000
+        stats["busy_ms_max"] = max(busy) * 1000
+        stats["interval_ms_mean"] = sum(intervals) / len(intervals) * 1000
+        stats["interval_ms_max"] = max(intervals) * 1000
+        return stats
@@ -0,0 +1,249 @@
+"""Serve headless emulator sessions to remote viewers over TCP.
+
+Every message is a 1-byte type and a 2-byte big-endian payload length
+followed by the payload.
+
+Client to server:
+    OPEN   ROM file name, UTF-8; starts this connection's session
+    KEY    key (0x0-0xF), pressed (0 or 1)
+    STATS  empty; the server answers with STATS
+
+Server to client:
+    FRAME  sequence (u32), frame count (u32), width (u8), height (u8),
+           bit planes (u8), changed-row mask (u64), flags (u8, bit 0 =
+           sound on), then for each changed row, top to bottom, the row of
+           each plane with its pixels packed one bit each: 8 bytes per
+           plane at 64x32, 16 at SCHIP/XO-CHIP 128x64
+    STATS  JSON server figures
+    ERROR  UTF-8 message; the server closes the connection after it
+
+Only rows that differ from the last frame sent to that client go out (all
+of them after a change of resolution), and unchanged frames are not sent at all, so a static screen costs nothing. A
+client that falls behind skips straight to the latest frame. From the
+repository root:
+
+    python -m chip8.emulator.stream_server roms --port 8765
+"""
+import argparse
+import asyncio
+import json
+import os
+import struct
+import time
+
+from .async_runtime import AsyncEmulator
+from .chip8_emulator import Chip8Emulator
+from .display import Display
+from .frame_buffer import Frame
+from .library import RomLibrary
+
+OPEN, KEY, STATS = 0x01, 0x02, 0x03
+FRAME, ERROR = 0x81, 0xFF
+
+HEADER = struct.Struct(">BH")
+FRAME_HEADER = struct.Struct(">IIBBBQB")
+BLANK_FRAME = Frame(0, 0, ((0,) * Display.HEIGHT,), (0,) * Display.HEIGHT)
+
+
+def encode_message(message_type, payload=b""):
+    return HEADER.pack(message_type, len(payload)) + payload
+
+
+async def read_message(reader):
+    """Read one message; returns (type, payload)."""
+    message_type, length = HEADER.unpack(await reader.readexactly(HEADER.size))
+    return message_type, await reader.readexactly(length)
+
+
+def encode_frame(frame, previous, sound_active):
+    """FRAME payload with the rows of frame that differ from the previous frame sent."""
+    row_bytes = frame.width // 8
+    resized = (frame.width, frame.height, len(frame.planes)) != (previous.width, previous.height, len(previous.planes))
+    mask = 0
+    changed = []
+    for y in range(frame.height):
+        rows = [rows[y] for rows in frame.planes]
+        if resized or rows != [rows[y] for rows in previous.planes]:
+            mask |= 1 << y
+            changed.extend(row.to_bytes(row_bytes, "big") for row in rows)
+    header = FRAME_HEADER.pack(frame.sequence, frame.frame_count, frame.width, frame.height, len(frame.planes),
+                               mask, 1 if sound_active else 0)
+    return header + b"".join(changed)
+
+
+class FrameDecoder:
+    """Client-side display state rebuilt from FRAME payloads."""
+
+    def __init__(self):
+        self.width = Display.WIDTH
+        self.height = Display.HEIGHT
+        self.planes = [[0] * Display.HEIGHT]
+        self.rows = self.planes[0]
+        self.sequence = 0
+        self.frame_count = 0
+        self.sound_active = False
+
+    def apply(self, payload):
+        self.sequence, self.frame_count, width, height, plane_count, mask, flags = FRAME_HEADER.unpack_from(payload)
+        self.sound_active = bool(flags & 1)
+        if (width, height, plane_count) != (self.width, self.height, len(self.planes)):
+            self.width, self.height = width, height
+            self.planes = [[0] * height for _ in range(plane_count)]
+            self.rows = self.planes[0]
+        row_bytes = width // 8
+        offset = FRAME_HEADER.size
+        for y in range(height):
+            if mask >> y & 1:
+                for rows in self.planes:
+                    rows[y] = int.from_bytes(payload[offset:offset + row_bytes], "big")
+                    offset += row_bytes
+
+
+class StreamServer:
+    def __init__(self, rom_directory, paced=True, **options):
+        """options are passed on to every session's Chip8Emulator."""
+        self.rom_directory = rom_directory
+        # Sessions load ROMs from the library's pack, not from the directory
+        self.library = RomLibrary(rom_directory)
+        self.library.scan()
+        self.paced = paced
+        self.options = options
+        self.sessions = 0
+        self.frames_emulated = 0
+        self.frames_sent = 0
+        self.bytes_sent = 0
+        self.server = None
+
+    async def start(self, host="127.0.0.1", port=8765):
+        self.server = await asyncio.start_server(self.handle_client, host, port)
+        return self.server
+
+    async def serve_forever(self, host="127.0.0.1", port=8765):
+        server = await self.start(host, port)
+        async with server:
+            await server.serve_forever()
+
+    def stats(self):
+        return {
+            "sessions": self.sessions,
+            "frames_emulated": self.frames_emulated,
+            "frames_sent": self.frames_sent,
+            "bytes_sent": self.bytes_sent,
+            "cpu_seconds": time.process_time(),
+        }
+
+    def rom(self, name):
+        # Only plain file names inside the ROM directory
+        if not name or os.path.basename(name) != name:
+            raise ValueError(f"Unknown ROM: {name}")
+        if self.library.entry(name) is None:
+            self.library.scan()  # Added since the last scan?
+            if self.library.entry(name) is None:
+                raise ValueError(f"Unknown ROM: {name}")
+        return self.library.read(name)
+
+    async def handle_client(self, reader, writer):
+        session = None
+        sender = None
+        try:
+            while True:
+                message_type, payload = await read_message(reader)
+                if message_type == OPEN and session is None:
+                    session = AsyncEmulator(self.rom(payload.decode()), paced=self.paced, **self.options)
+                    session.start()
+                    self.sessions += 1
+                    sender = asyncio.create_task(self.send_frames(session, writer))
+                elif message_type == KEY and session is not None:
+                    key, pressed = payload
+                    if pressed:
+                        session.key_down(key & 0xF)
+                    else:
+                        session.key_up(key & 0xF)
+                elif message_type == STATS:
+                    writer.write(encode_message(STATS, json.dumps(self.stats()).encode()))
+                else:
+                    raise ValueError(f"Unexpected message type: {message_type:#x}")
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except ValueError as error:
+            writer.write(encode_message(ERROR, str(error).encode()))
+        finally:
+            if sender is not None:
+                sender.cancel()
+            if session is not None:
+                await session.close()
+                self.sessions -= 1
+            writer.close()
+
+    async def send_frames(self, session, writer):
+        previous = BLANK_FRAME
+        sound_active = False
+        emulator = session.emulator
+        async for frame in session.frames():
+            self.frames_emulated += 1
+            sound = emulator.is_sound_active()
+            if frame.planes == previous.planes and frame.width == previous.width and sound == sound_active:
+                continue
+            message = encode_message(FRAME, encode_frame(frame, previous, sound))
+            previous, sound_active = frame, sound
+            writer.write(message)
+            self.frames_sent += 1
+            self.bytes_sent += len(message)
+            # Wait for a slow client here; the session keeps running meanwhile
+            await writer.drain()
+
+
+class StreamClient:
+    """Minimal client: opens a session, sends keys and decodes frames."""
+
+    def __init__(self):
+        self.decoder = FrameDecoder()
+        self.reader = None
+        self.writer = None
+        self.bytes_received = 0
+
+    async def connect(self, rom_name, host="127.0.0.1", port=8765):
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+        self.writer.write(encode_message(OPEN, rom_name.encode()))
+
+    async def frames(self):
+        """Yield the decoder after every frame received."""
+        while True:
+            message_type, payload = await read_message(self.reader)
+            self.bytes_received += HEADER.size + len(payload)
+            if message_type == FRAME:
+                self.decoder.apply(payload)
+                yield self.decoder
+            elif message_type == ERROR:
+                raise ValueError(payload.decode())
+
+    def press(self, key, pressed=True):
+        self.writer.write(encode_message(KEY, bytes([key, 1 if pressed else 0])))
+
+    async def stats(self):
+        """Server figures; call on a connection that has not opened a session."""
+        self.writer.write(encode_message(STATS))
+        message_type, payload = await read_message(self.reader)
+        return json.loads(payload)
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream CHIP-8 sessions to remote viewers.")
+    parser.add_argument("rom_directory", help="directory of .ch8 ROMs clients may open")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--ips", type=int, default=2000, help="instructions per emulated second")
+    parser.add_argument("--platform", choices=Chip8Emulator.PLATFORMS, default="chip8")
+    args = parser.parse_args()
+
+    server = StreamServer(args.rom_directory, instructions_per_second=args.ips, platform=args.platform)
+    print(f"Serving {args.rom_directory} on {args.host}:{args.port}")
+    asyncio.run(server.serve_forever(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,3 @@
-import time
-
 class Timer:
     def __init__(self):
         self.reset()
@@ -7,19 +5,16 @@ class Timer:
     def reset(self):
         self.delay_timer = 0
         self.sound_timer = 0
-        self.last_update = time.time()
-
-    def update(self):
-        current_time = time.time()
-        elapsed_time = current_time - self.last_update
-
-        # CHIP-8 timers decrement at 60Hz
-        decrement = int(elapsed_time * 60)
-
-        if decrement > 0:
-            self.delay_timer = max(0, self.delay_timer - decrement)
-            self.sound_timer = max(0, self.sound_timer - decrement)
-            self.last_update = current_time
+        # XO-CHIP F002 and FX3A set these; the beep does not play them yet
+        self.pattern = bytes(16)
+        self.pitch = 64
+
+    def tick(self):
+        """Count both timers down by one; called once per 60Hz frame."""
+        if self.delay_timer > 0:
+            self.delay_timer -= 1
+        if self.sound_timer > 0:
+            self.sound_timer -= 1
 
     def set_delay_timer(self, value):
         self.delay_timer = value
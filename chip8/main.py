@@ -1,6 +1,6 @@
-from ui.app import App
-
 def main():
+    # glfw, OpenGL and imgui load here, when the window is about to open
+    from ui.app import App
     app = App()
     app.run()
 
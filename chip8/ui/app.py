@@ -4,14 +4,23 @@ from imgui.integrations.glfw import GlfwRenderer
 import imgui
 from .windows.render_window import RenderWindow
 from .windows.debug_window import DebugWindow
+from .windows.profiler_window import ProfilerWindow
 from chip8.emulator.chip8_emulator import Chip8Emulator
+from chip8.emulator.input_source import LiveInput
+from chip8.emulator.recording import InputRecorder
+from chip8.emulator.audio import Audio, SoundDeviceBackend
+from chip8.emulator.library import RomCache, RomLibrary
 import threading
 import sys
-from pyobjus import autoclass
+import os
 
-if sys.platform == 'darwin':
-    from pyobjus import autoclass
-    from pyobjus.dylib_manager import load_framework
+# Host keys mapped onto the CHIP-8 keypad
+KEY_MAP = {
+    glfw.KEY_1: 0x1, glfw.KEY_2: 0x2, glfw.KEY_3: 0x3, glfw.KEY_4: 0xC,
+    glfw.KEY_Q: 0x4, glfw.KEY_W: 0x5, glfw.KEY_E: 0x6, glfw.KEY_R: 0xD,
+    glfw.KEY_A: 0x7, glfw.KEY_S: 0x8, glfw.KEY_D: 0x9, glfw.KEY_F: 0xE,
+    glfw.KEY_Z: 0xA, glfw.KEY_X: 0x0, glfw.KEY_C: 0xB, glfw.KEY_V: 0xF
+}
 
 class App:
     def __init__(self):
@@ -19,10 +28,19 @@ class App:
         self.impl = None
         self.render_window = None
         self.debug_window = None
+        self.profiler_window = None
         self.emulator = None
         self.should_stop = False
         self.emulator_thread = None
         self.rom_path = None
+        self.rom = None  # Bytes of the current ROM, which restarts and recordings reload
+        self.rom_platform = None  # Platform and quirk profile to load it with; None lets the ROM database pick
+        self.rom_quirks = None
+        self.roms = RomCache()
+        self.library = None
+        self.live_input = LiveInput()
+        self.recorder = None
+        self.audio = None
 
     def run(self):
         self.init()
@@ -45,9 +63,18 @@ class App:
 
         imgui.create_context()
         self.impl = GlfwRenderer(self.window)
-        self.emulator = Chip8Emulator()
+        self.emulator = Chip8Emulator(input_source=self.live_input)
         self.render_window = RenderWindow(self.emulator)
         self.debug_window = DebugWindow(self.emulator)
+        self.profiler_window = ProfilerWindow(self.emulator)
+        self.audio = Audio(self.emulator, SoundDeviceBackend())
+        try:
+            self.audio.start()
+        except (ImportError, OSError) as error:
+            # No audio device or library; run silently
+            print(f"Sound disabled: {error}")
+        self.library = RomLibrary("./roms")
+        self.library.scan()
         self.load_rom("./roms/octopeg.ch8")  # Load default ROM
         glfw.set_key_callback(self.window, self.key_callback)
 
@@ -75,9 +102,22 @@ class App:
         
         if imgui.button("Load ROM"):
             self.open_file_dialog()
-        
+
+        imgui.same_line()
+        imgui.push_item_width(200)
+        if imgui.begin_combo("##library", "Library"):
+            for entry in self.library:
+                label = f"{entry.title} ({entry.platform})"
+                if imgui.selectable(label)[0]:
+                    self.load_library_rom(entry)
+            imgui.end_combo()
+        imgui.pop_item_width()
+
         imgui.same_line()
         imgui.text(f"Current ROM: {self.rom_path or 'None'}")
+        if self.recorder is not None:
+            imgui.same_line()
+            imgui.text("Recording (Ctrl+R to stop)")
         
         imgui.separator()
         
@@ -93,13 +133,21 @@ class App:
         self.render_window.render()
         imgui.end()
 
-        # Debug window (20% width)
+        # Debug window (20% width, top half)
+        debug_height = content_height // 2
         imgui.set_next_window_position(render_width, 60)
-        imgui.set_next_window_size(debug_width, content_height)
+        imgui.set_next_window_size(debug_width, debug_height)
         imgui.begin("Debug", flags=imgui.WINDOW_NO_MOVE | imgui.WINDOW_NO_RESIZE | imgui.WINDOW_NO_TITLE_BAR)
         self.debug_window.render()
         imgui.end()
 
+        # Profiler window (20% width, bottom half)
+        imgui.set_next_window_position(render_width, 60 + debug_height)
+        imgui.set_next_window_size(debug_width, content_height - debug_height)
+        imgui.begin("Profiler", flags=imgui.WINDOW_NO_MOVE | imgui.WINDOW_NO_RESIZE | imgui.WINDOW_NO_TITLE_BAR)
+        self.profiler_window.render()
+        imgui.end()
+
         imgui.end()
 
     def render(self):
@@ -111,6 +159,10 @@ class App:
         glfw.swap_buffers(self.window)
 
     def shutdown(self):
+        self.should_stop = True
+        if self.emulator_thread is not None:
+            self.emulator_thread.join()
+        self.audio.stop()
         self.impl.shutdown()
         glfw.terminate()
 
@@ -139,18 +191,45 @@ class App:
     def key_callback(self, window, key, scancode, action, mods):
         if key == glfw.KEY_O and action == glfw.PRESS and mods & glfw.MOD_CONTROL:
             self.open_file_dialog()
-        elif action == glfw.PRESS:
-            self.emulator.keyboard.key_down(key)
-        elif action == glfw.RELEASE:
-            self.emulator.keyboard.key_up(key)
+        elif key == glfw.KEY_R and action == glfw.PRESS and mods & glfw.MOD_CONTROL:
+            self.toggle_recording()
+        elif key == glfw.KEY_UP and action == glfw.PRESS:
+            self.change_speed(2)
+        elif key == glfw.KEY_DOWN and action == glfw.PRESS:
+            self.change_speed(0.5)
+        elif key in KEY_MAP and action == glfw.PRESS:
+            self.live_input.push(KEY_MAP[key], True)
+        elif key in KEY_MAP and action == glfw.RELEASE:
+            self.live_input.push(KEY_MAP[key], False)
+
+    def toggle_recording(self):
+        if self.recorder is None:
+            # Recordings replay from reset, so restart the ROM first
+            self.restart(record=True)
+        else:
+            self.emulator.defer(self.save_recording)
+
+    def save_recording(self):
+        # Runs on the emulator thread, between frames
+        path = os.path.splitext(os.path.basename(self.rom_path))[0] + ".replay.json"
+        self.recorder.recording().save(path)
+        print(f"Saved recording to {path}")
+        self.recorder = None
+        self.emulator.input_source = self.live_input
+
+    def change_speed(self, factor):
+        ips = max(60, int(self.emulator.instructions_per_second * factor))
+        self.emulator.defer(self.emulator.set_instructions_per_second, ips)
 
     def emulator_loop(self):
         while not self.should_stop:
-            self.emulator.step()
-            self.emulator.update_timers()
+            self.emulator.run_frame()
 
     def open_file_dialog(self):
+        # Dialog toolkits load on first use; most sessions never open one
         if sys.platform == 'darwin':
+            from pyobjus import autoclass
+            from pyobjus.dylib_manager import load_framework
             load_framework('/System/Library/Frameworks/AppKit.framework')
             NSOpenPanel = autoclass('NSOpenPanel')
             NSURL = autoclass('NSURL')
@@ -195,8 +274,30 @@ class App:
 
     def load_rom(self, rom_path):
         self.rom_path = rom_path
-        self.emulator.reset()
-        self.emulator.load_rom(rom_path)
+        self.rom = self.roms.read(rom_path)
+        self.rom_platform = self.rom_quirks = None
+        self.restart()
+
+    def load_library_rom(self, entry):
+        # The pack serves the bytes, and the index the platform and quirks, which for
+        # .sc8 and .xo8 ROMs the database does not know come from the file extension
+        self.rom_path = os.path.join(self.library.root, entry.path)
+        self.rom = self.library.read(entry.path)
+        self.rom_platform = entry.platform
+        self.rom_quirks = entry.quirks
+        self.restart()
+
+    def restart(self, record=False):
+        rom, platform, quirks = self.rom, self.rom_platform, self.rom_quirks
+
+        def restart():
+            # Runs on the emulator thread, between frames
+            self.emulator.reset()
+            self.emulator.load_rom(rom, platform, quirks)
+            self.recorder = InputRecorder(self.emulator, self.live_input) if record else None
+            self.emulator.input_source = self.recorder or self.live_input
+
+        self.emulator.defer(restart)
 
     def drop_callback(self, window, paths):
         if paths:
@@ -0,0 +1,2 @@
+
+from .profiler_window import ProfilerWindow
\ No newline at end of file
@@ -11,8 +11,11 @@ class DebugWindow:
             imgui.table_headers_row()
 
             cpu = self.emulator.cpu
+            stats = self.emulator.get_stats()
 
             debug_data = [
+                ("IPS", f"{stats['achieved_ips']:.0f} / {stats['requested_ips']}"),
+                ("Frame", f"{stats['busy_ms_mean']:.2f} ms (max {stats['busy_ms_max']:.2f})"),
                 ("PC", f"0x{cpu.pc:04X}"),
                 ("I", f"0x{cpu.i:04X}"),
             ]
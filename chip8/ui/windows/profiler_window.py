@@ -0,0 +1,86 @@
+import math
+
+import imgui
+
+from chip8.emulator.profiler import Profiler
+
+class ProfilerWindow:
+    HEATMAP_WIDTH = 64  # Addresses per heatmap row
+
+    def __init__(self, emulator):
+        self.emulator = emulator
+        self.profiler = Profiler(emulator)
+        # Report and heatmap cells, rebuilt at most once per emulated frame
+        self.report = None
+        self.report_frame = None
+        self.heatmap_cells = []
+        self.heatmap_rows = 0
+
+    def render(self):
+        profiler = self.profiler
+        emulator = self.emulator
+        # The profiler swaps the dispatch table; do that between frames on the emulator thread
+        if imgui.button("Stop profiling" if profiler.enabled else "Start profiling"):
+            emulator.defer(profiler.disable if profiler.enabled else profiler.enable)
+        imgui.same_line()
+        if imgui.button("Clear"):
+            emulator.defer(profiler.clear).add_done_callback(lambda _: self.invalidate())
+        imgui.same_line()
+        if imgui.button("Save JSON"):
+            emulator.defer(profiler.dump, "profile.json")
+
+        # A disabled profiler's data does not change, so keep what was last built
+        if self.report is None or profiler.enabled and emulator.frame_count != self.report_frame:
+            self.update()
+        report = self.report
+        imgui.text(f"IPS {report['achieved_ips']:.0f} / {report['requested_ips']}")
+        imgui.text(f"Draws/frame {report['draws_per_frame']:.1f}, collisions {report['collisions_per_frame']:.1f}")
+
+        if imgui.begin_table("profiler_handlers", 3, imgui.TABLE_BORDERS | imgui.TABLE_SIZING_FIXED_FIT):
+            imgui.table_setup_column("Handler")
+            imgui.table_setup_column("Count")
+            imgui.table_setup_column("ms")
+            imgui.table_headers_row()
+            for entry in report["handlers"][:8]:
+                imgui.table_next_row()
+                imgui.table_next_column()
+                imgui.text(entry["handler"])
+                imgui.table_next_column()
+                imgui.text(str(entry["count"]))
+                imgui.table_next_column()
+                imgui.text(f"{entry['total_ms']:.1f}")
+            imgui.end_table()
+
+        imgui.text("Hot PCs: " + " ".join(entry["pc"] for entry in report["hot_pcs"]))
+        self.render_heatmap()
+
+    def invalidate(self):
+        self.report = None
+
+    def update(self):
+        self.report_frame = self.emulator.frame_count
+        self.report = self.profiler.report(top=8)
+        self.update_heatmap()
+
+    def update_heatmap(self):
+        """(x, y, heat) of every executed address, brighter for hotter code, on a log scale."""
+        heatmap = self.profiler.heatmap(self.HEATMAP_WIDTH)
+        peak = max(max(row) for row in heatmap)
+        self.heatmap_rows = len(heatmap)
+        self.heatmap_cells = []
+        if peak:
+            scale = math.log1p(peak)
+            self.heatmap_cells = [(x, y, math.log1p(count) / scale)
+                                  for y, row in enumerate(heatmap) for x, count in enumerate(row) if count]
+
+    def render_heatmap(self):
+        cell = imgui.get_content_region_available()[0] / self.HEATMAP_WIDTH
+        left, top = imgui.get_cursor_screen_pos()
+        draw_list = imgui.get_window_draw_list()
+        draw_list.add_rect_filled(left, top, left + cell * self.HEATMAP_WIDTH, top + cell * self.heatmap_rows,
+                                  imgui.get_color_u32_rgba(0.1, 0.1, 0.1, 1))
+        for x, y, heat in self.heatmap_cells:
+            draw_list.add_rect_filled(left + x * cell, top + y * cell,
+                                      left + (x + 1) * cell, top + (y + 1) * cell,
+                                      imgui.get_color_u32_rgba(heat, 0.3 * heat, 0.1, 1))
+        imgui.dummy(cell * self.HEATMAP_WIDTH, cell * self.heatmap_rows)
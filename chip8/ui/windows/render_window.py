@@ -2,10 +2,18 @@ import imgui
 import numpy as np
 from OpenGL.GL import *
 
+# Grey level of each colour index: off, plane 0, plane 1, both planes
+LEVELS = np.array([0, 255, 170, 85], dtype=np.uint8)
+
+
 class RenderWindow:
     def __init__(self, emulator):
         self.emulator = emulator
         self.texture_id = None
+        # Pixel buffer reused for every upload, one byte per pixel; reallocated
+        # with the texture when the resolution changes
+        self.pixels = np.zeros((32, 64), dtype=np.uint8)
+        self.uploaded_sequence = -1  # Last frame uploaded from the emulator's frame buffer
         self.init_texture()
 
     def init_texture(self):
@@ -15,19 +23,51 @@ class RenderWindow:
         glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
         glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
         glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+        self.allocate_texture()
+
+    def allocate_texture(self):
+        # Storage is only reallocated on a resolution change; frames replace the rows that changed
+        height, width = self.pixels.shape
+        glBindTexture(GL_TEXTURE_2D, self.texture_id)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_RED, width, height, 0, GL_RED, GL_UNSIGNED_BYTE, self.pixels)
+
+    def update_texture(self):
+        # Take the latest completed frame; the emulator thread never touches it again
+        frame = self.emulator.frame_buffer.latest()
+        if frame.sequence == self.uploaded_sequence:
+            return
+        if self.pixels.shape != (frame.height, frame.width):
+            self.pixels = np.zeros((frame.height, frame.width), dtype=np.uint8)
+            self.allocate_texture()
+            dirty = (0, frame.height)
+        else:
+            dirty = frame.dirty_rows(self.uploaded_sequence)
+        self.uploaded_sequence = frame.sequence
+        if dirty is None:
+            return
+
+        top, bottom = dirty
+        width = frame.width
+        row_bytes = width // 8
+        rows = self.pixels[top:bottom]
+        packed = b"".join(row.to_bytes(row_bytes, "big") for row in frame.rows[top:bottom])
+        rows[:] = np.unpackbits(np.frombuffer(packed, dtype=np.uint8)).reshape(bottom - top, width)
+        if len(frame.planes) > 1:
+            packed = b"".join(row.to_bytes(row_bytes, "big") for row in frame.planes[1][top:bottom])
+            rows |= np.unpackbits(np.frombuffer(packed, dtype=np.uint8)).reshape(bottom - top, width) << 1
+            rows[:] = LEVELS[rows]
+        else:
+            rows *= 255
 
-    def update_texture(self, display_data):
         glBindTexture(GL_TEXTURE_2D, self.texture_id)
-        display_array = np.array(display_data, dtype=np.uint8) * 255
-        glTexImage2D(GL_TEXTURE_2D, 0, GL_RED, 64, 32, 0, GL_RED, GL_UNSIGNED_BYTE, display_array)
+        glTexSubImage2D(GL_TEXTURE_2D, 0, 0, top, width, bottom - top, GL_RED, GL_UNSIGNED_BYTE, rows)
 
     def render(self):
-        display_data = self.emulator.get_display()
-        self.update_texture(display_data)
+        self.update_texture()
 
         window_width = imgui.get_window_width()
         window_height = imgui.get_window_height()
-        aspect_ratio = 64 / 32
+        aspect_ratio = 2  # 64x32 and 128x64 alike
 
         if window_width / window_height > aspect_ratio:
             image_height = window_height - 20
@@ -36,4 +76,4 @@ class RenderWindow:
             image_width = window_width - 20
             image_height = image_width / aspect_ratio
 
-        imgui.image(self.texture_id, image_width, image_height)
\ No newline at end of file
+        imgui.image(self.texture_id, image_width, image_height)
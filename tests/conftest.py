@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Run from anywhere, like the scripts under benchmarks/
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+ROMS_DIR = os.path.join(os.path.dirname(__file__), "..", "roms")
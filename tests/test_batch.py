@@ -0,0 +1,62 @@
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from chip8.emulator.batch import BatchEmulator
+from chip8.emulator.chip8_emulator import Chip8Emulator
+from chip8.emulator.quirks import PROFILES
+
+from conftest import ROMS_DIR
+
+# ROMs that never draw random numbers, so every lane matches a scalar run exactly
+ROMS = ["IBM_logo.ch8", "Sierpi.ch8", "chip8logo.ch8", "chip8picture.ch8", "trip8.ch8"]
+
+# One instruction for each quirk, then draws in a loop that counts passes in VC
+QUIRKS_ROM = bytes.fromhex(
+    "6105"  # 200: LD V1, 05
+    "6002"  # 202: LD V0, 02
+    "6F07"  # 204: LD VF, 07
+    "8016"  # 206: SHR V0 (V1)  shift_vy
+    "6F07"  # 208: LD VF, 07
+    "8311"  # 20A: OR V3, V1    logic_resets_vf
+    "A300"  # 20C: LD I, 300
+    "FF55"  # 20E: LD [I], VF   index_increment; stores the results above
+    "6002"  # 210: LD V0, 02
+    "6204"  # 212: LD V2, 04
+    "B21A"  # 214: JP V0, 21A   jump_vx
+    "0000"  # 216
+    "0000"  # 218
+    "0000"  # 21A
+    "6A01"  # 21C: LD VA, 01
+    "6B01"  # 21E: LD VB, 01
+    "D015"  # 220: DRW V0, V1, 5  display_wait
+    "7C01"  # 222: ADD VC, 01
+    "1220"  # 224: JP 220
+)
+
+
+@pytest.mark.parametrize("quirks", sorted(PROFILES))
+def test_batch_matches_scalar_core(quirks):
+    roms = [os.path.join(ROMS_DIR, rom) for rom in ROMS] + [QUIRKS_ROM]
+    batch = BatchEmulator(len(roms), instructions_per_second=1000, quirks=quirks)
+    for lane, rom in enumerate(roms):
+        batch.load_rom(rom, lanes=[lane])
+    batch.run_frames(300)
+
+    for lane, rom in enumerate(roms):
+        emulator = Chip8Emulator(1000, paced=False, platform="chip8", quirks=quirks)
+        emulator.load_rom(rom)
+        emulator.run_frames(300)
+        assert not batch.faulted[lane]
+        assert batch.pc[lane] == emulator.cpu.pc
+        assert batch.v[lane].tolist() == list(emulator.cpu.v)
+        assert batch.i[lane] == emulator.cpu.i
+        assert batch.memory[lane].tobytes() == bytes(emulator.memory.memory)
+        assert np.array_equal(batch.display[lane], np.array(emulator.get_display(), dtype=np.uint8))
+
+
+def test_batch_rejects_unknown_profile():
+    with pytest.raises(ValueError):
+        BatchEmulator(1, quirks="octo")
@@ -0,0 +1,67 @@
+import glob
+import os
+
+import pytest
+
+from chip8.emulator.chip8_emulator import Chip8Emulator
+from chip8.emulator.profiler import Profiler
+from chip8.emulator.recording import ReplayInput
+
+from conftest import ROMS_DIR
+
+ROMS = sorted(glob.glob(os.path.join(ROMS_DIR, "*.ch8")))
+
+# Rewrites the operand of the LD V0, NN at 0x208 on every pass, so a block
+# translated from the old bytes gives a different V2
+SELF_MODIFYING_ROM = bytes.fromhex(
+    "7101"  # 200: ADD V1, 01
+    "8010"  # 202: LD V0, V1
+    "A209"  # 204: LD I, 209
+    "F055"  # 206: LD [I], V0
+    "6000"  # 208: LD V0, NN (patched)
+    "8204"  # 20A: ADD V2, V0
+    "1200"  # 20C: JP 200
+)
+
+
+def run(rom, execution_mode, frames=300, events=()):
+    # Fast enough that hot code reaches the JIT's threshold many times over
+    emulator = Chip8Emulator(120000, execution_mode=execution_mode, paced=False, seed=1)
+    emulator.load_rom(rom)
+    emulator.input_source = ReplayInput(emulator, list(events))
+    emulator.run_frames(frames)
+    return emulator
+
+
+@pytest.mark.parametrize("rom", ROMS, ids=os.path.basename)
+def test_jit_matches_interpreter(rom):
+    # A key held for a while, then a couple of taps, to get past title screens and FX0A
+    events = [(200000, 5, True), (400000, 5, False), (1000000, 6, True), (1200000, 6, False),
+              (1600000, 8, True), (1800000, 8, False)]
+    interpreted = run(rom, "interpreter", events=events)
+    translated = run(rom, "jit", events=events)
+    assert translated.jit.blocks or translated.cpu.key_wait_register is not None
+    assert translated.save_state() == interpreted.save_state()
+
+
+def test_jit_retranslates_code_the_rom_rewrites():
+    interpreted = run(SELF_MODIFYING_ROM, "interpreter", frames=60)
+    translated = run(SELF_MODIFYING_ROM, "jit", frames=60)
+    assert translated.jit.blocks
+    assert translated.save_state() == interpreted.save_state()
+
+
+def test_profiler_drops_blocks_translated_under_old_quirks():
+    # 8XY6 shifts VX under chip48 and VY under vip: V0 ends at 2 >> 1 or 5 >> 1
+    rom = bytes.fromhex("6105" "6002" "8016" "1200")
+    emulator = Chip8Emulator(120000, execution_mode="jit", paced=False, skip_idle=False)
+    emulator.load_rom(rom, quirks="chip48")
+    emulator.run_instructions(4000)
+    assert emulator.jit.blocks and emulator.cpu.v[0] == 1
+
+    profiler = Profiler(emulator)
+    profiler.enable()
+    emulator.set_quirks("vip")
+    profiler.disable()
+    emulator.run_instructions(4000)
+    assert emulator.cpu.v[0] == 2
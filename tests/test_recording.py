@@ -0,0 +1,54 @@
+import os
+import random
+
+import pytest
+
+from chip8.emulator.chip8_emulator import Chip8Emulator
+from chip8.emulator.headless import display_hash
+from chip8.emulator.input_source import LiveInput
+from chip8.emulator.recording import InputRecorder, Recording, replay
+
+from conftest import ROMS_DIR
+
+SPEED_CHANGES = {300: 4000, 900: 700, 1300: 9000}  # Frame -> instructions per second
+
+
+def record(rom_path, frames=1500):
+    """Play a session with random key presses and a few speed changes, as the app would."""
+    live = LiveInput()
+    emulator = Chip8Emulator(paced=False, input_source=live, seed=3)
+    emulator.load_rom(rom_path)
+    recorder = InputRecorder(emulator, live)
+    emulator.input_source = recorder
+    keys = random.Random(5)
+    for frame in range(frames):
+        if keys.random() < 0.05:
+            live.push(keys.randrange(16), keys.random() < 0.5)
+        if frame in SPEED_CHANGES:
+            emulator.defer(emulator.set_instructions_per_second, SPEED_CHANGES[frame])
+        emulator.run_frame()
+    return emulator, recorder.recording()
+
+
+@pytest.mark.parametrize("rom", ["particles.ch8", "octopeg.ch8", "trip8.ch8"])
+@pytest.mark.parametrize("execution_mode", Chip8Emulator.EXECUTION_MODES)
+def test_replay_reproduces_the_session(rom, execution_mode, tmp_path):
+    rom_path = os.path.join(ROMS_DIR, rom)
+    emulator, recording = record(rom_path)
+    assert recording.events
+    assert recording.instructions_per_second == 2000
+    assert [ips for _, ips in recording.speed_changes] == list(SPEED_CHANGES.values())
+
+    path = tmp_path / "session.replay.json"
+    recording.save(path)
+    replayed = replay(Recording.load(path), rom_path, execution_mode)
+
+    assert display_hash(replayed) == recording.display_hash
+    assert replayed.instruction_count == recording.instruction_count
+    assert replayed.save_state() == emulator.save_state()
+
+
+def test_replay_rejects_another_rom(tmp_path):
+    _, recording = record(os.path.join(ROMS_DIR, "trip8.ch8"), frames=10)
+    with pytest.raises(ValueError):
+        replay(recording, os.path.join(ROMS_DIR, "maze.ch8"))